@@ -0,0 +1,74 @@
+# ======================================
+# ====== Resultados Comparacion ========
+# ======================================
+
+# Análisis de muchas partidas: estadísticas por estrategia y la comparación
+# entre la solución aleatoria y la estratégica. Antes se ejecutaba al importar
+# reto; ahora solo corre al llamarlo, así que importar el motor no juega nada.
+#
+#   python analisis.py              compara con 1000 iteraciones
+#   python analisis.py 200 otro.txt con otro número de iteraciones y archivo
+
+import sys
+
+from reto import ejecutarMultiplesIteraciones
+
+NUM_ITERACIONES = 1000
+
+def analizarResultados(resultados, nombre_estrategia):
+    print(f"\n=== ESTADÍSTICAS - {nombre_estrategia.upper()} ===")
+
+    # Métricas a analizar
+    metricas = ['victimasRescatadas', 'victimasPerdidas', 'puntosDano', 'turnos', 'fuegosFinales', 'humosFinales']
+
+    for metrica in metricas:
+        valores = [r[metrica] for r in resultados]
+
+        minimo = min(valores)
+        maximo = max(valores)
+        promedio = sum(valores) / len(valores)
+
+        print(f"{metrica}:")
+        print(f"  Mín: {minimo}")
+        print(f"  Pro: {promedio:.2f}")
+        print(f"  Máx: {maximo}")
+
+    # Contar resultados
+    resultados_conteo = {}
+    for r in resultados:
+        resultado = r['resultado']
+        resultados_conteo[resultado] = resultados_conteo.get(resultado, 0) + 1
+
+    print(f"\nResultados finales:")
+    for resultado, count in resultados_conteo.items():
+        porcentaje = (count / len(resultados)) * 100
+        print(f"  {resultado}: {count} ({porcentaje:.1f}%)")
+
+# Función que juega las dos estrategias y compara sus promedios.
+def compararEstrategias(num_iteraciones=NUM_ITERACIONES, archivo_config="txtxd.txt"):
+    print("Ejecutando análisis de múltiples iteraciones...")
+    print(f"Número de iteraciones por estrategia: {num_iteraciones}")
+
+    # Analizar estrategia aleatoria
+    print("\n--- Ejecutando estrategia ALEATORIA ---")
+    resultados_aleatorios = ejecutarMultiplesIteraciones(num_iteraciones, archivo_config, "aleatoria")
+    analizarResultados(resultados_aleatorios, "ALEATORIA")
+
+    # Analizar estrategia estratégica
+    print("\n--- Ejecutando estrategia ESTRATÉGICA ---")
+    resultados_estrategicos = ejecutarMultiplesIteraciones(num_iteraciones, archivo_config, "estrategica")
+    analizarResultados(resultados_estrategicos, "ESTRATÉGICA")
+
+    print(f"\n=== COMPARACIÓN DE PROMEDIOS ===")
+    print(f"Promedio víctimas rescatadas:")
+    print(f"  Solución Aleatoria: {sum(r['victimasRescatadas'] for r in resultados_aleatorios) / len(resultados_aleatorios):.2f}")
+    print(f"  Solución Estratégica: {sum(r['victimasRescatadas'] for r in resultados_estrategicos) / len(resultados_estrategicos):.2f}")
+
+    print(f"Promedio turnos:")
+    print(f"  Solución Aleatoria: {sum(r['turnos'] for r in resultados_aleatorios) / len(resultados_aleatorios):.2f}")
+    print(f"  Solución Estratégica: {sum(r['turnos'] for r in resultados_estrategicos) / len(resultados_estrategicos):.2f}")
+    return resultados_aleatorios, resultados_estrategicos
+
+if __name__ == "__main__":
+    compararEstrategias(int(sys.argv[1]) if len(sys.argv) > 1 else NUM_ITERACIONES,
+                        sys.argv[2] if len(sys.argv) > 2 else "txtxd.txt")
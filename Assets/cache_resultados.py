@@ -0,0 +1,72 @@
+# ======================================
+# ====== Cache de Resultados ===========
+# ======================================
+
+# Guarda en disco (SQLite) el resultado de runModel de cada juego ya jugado.
+# Un juego queda determinado por (huella de la plantilla, modo, semilla,
+# VERSION_MOTOR), así que al repetir un análisis con semillas que ya se jugaron
+# se toma el resultado guardado en vez de simular otra vez. Al subir
+# VERSION_MOTOR los resultados anteriores dejan de coincidir.
+
+import sqlite3
+
+from reto import VERSION_MOTOR
+
+# Llaves de runModel que se guardan además del resultado.
+METRICAS = ("victimasRescatadas", "victimasPerdidas", "puntosDano", "turnos",
+            "fuegosFinales", "humosFinales", "poisRestantes")
+
+# Semillas por consulta (SQLite limita los parámetros de cada consulta).
+SEMILLAS_POR_CONSULTA = 500
+
+class CCacheResultados:
+    def __init__(self, archivo="resultados.sqlite", version=VERSION_MOTOR):
+        self.archivo = archivo
+        self.version = version
+        self.conexion = sqlite3.connect(archivo)
+        # WAL deja leer el cache mientras otra corrida escribe en él.
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        columnas = ", ".join(f"{metrica} INTEGER" for metrica in METRICAS)
+        self.conexion.execute(
+            "CREATE TABLE IF NOT EXISTS resultados ("
+            "plantilla TEXT, modo TEXT, semilla TEXT, version INTEGER, resultado TEXT, "
+            f"{columnas}, PRIMARY KEY (plantilla, modo, semilla, version))")
+        self.conexion.commit()
+
+    # Método que regresa {semilla: resultado} de las semillas que ya están guardadas.
+    # Las semillas se guardan como texto porque pueden pasar de 64 bits con signo.
+    def buscar(self, plantilla, modo, semillas):
+        encontrados = {}
+        porTexto = {str(semilla): semilla for semilla in semillas}
+        textos = list(porTexto)
+        for inicio in range(0, len(textos), SEMILLAS_POR_CONSULTA):
+            bloque = textos[inicio:inicio + SEMILLAS_POR_CONSULTA]
+            filas = self.conexion.execute(
+                f"SELECT semilla, resultado, {', '.join(METRICAS)} FROM resultados "
+                f"WHERE plantilla = ? AND modo = ? AND version = ? "
+                f"AND semilla IN ({', '.join('?' * len(bloque))})",
+                (plantilla, modo, self.version, *bloque))
+            for semilla, resultado, *valores in filas:
+                encontrados[porTexto[semilla]] = {"resultado": resultado, **dict(zip(METRICAS, valores))}
+        return encontrados
+
+    # Método que guarda los resultados de una lista de (semilla, resultado).
+    def guardar(self, plantilla, modo, resultados):
+        with self.conexion:
+            self.conexion.executemany(
+                f"INSERT OR REPLACE INTO resultados VALUES (?, ?, ?, ?, ?, {', '.join('?' * len(METRICAS))})",
+                [(plantilla, modo, str(semilla), self.version, resultado["resultado"],
+                  *(resultado[metrica] for metrica in METRICAS))
+                 for semilla, resultado in resultados])
+
+    # Método que borra los resultados de otras versiones del motor.
+    def purgarOtrasVersiones(self):
+        with self.conexion:
+            return self.conexion.execute("DELETE FROM resultados WHERE version != ?", (self.version,)).rowcount
+
+    def cerrar(self):
+        self.conexion.close()
+
+    def __len__(self):
+        return self.conexion.execute("SELECT COUNT(*) FROM resultados WHERE version = ?",
+                                     (self.version,)).fetchone()[0]
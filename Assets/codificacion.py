@@ -0,0 +1,273 @@
+# ======================================
+# ===== Formatos Compactos de Estado ===
+# ======================================
+
+# Además del JSON normal (una lista de diccionarios por celda), el estado se
+# puede mandar en dos formatos más compactos:
+#
+# - "columnar": JSON con un arreglo por atributo (0/1 por celda en orden
+#   fila por fila, índice = y * ancho + x).
+# - "binario": bytes little-endian con esta estructura:
+#     encabezado    "RTC2", versión u8, ancho u32, alto u32, paso u32
+#     estadísticas  turno u32, rescatadas, perdidas, encontradas, daño u32,
+#                   juegoTerminado u8, fuegos, humos, pois u32,
+#                   maxDaño, maxPerdidas, paraGanar u32,
+#                   resultado (largo u8 + utf-8)
+#     capas         un plano de bits por capa en el orden de CAPAS_BINARIO,
+#                   ceil(ancho * alto / 8) bytes cada uno, bit menos
+#                   significativo primero
+#     paredes       un nibble por celda (arriba=8, izquierda=4, abajo=2,
+#                   derecha=1), la celda par en el nibble bajo
+#     puertas       cantidad u32 y por puerta: índice u32, dirección u8
+#     bomberos      cantidad u32 y por bombero: id u32, tipo u8, x u32, y u32,
+#                   estado u8, puntosAccion u8, maxPuntosAccion u8,
+#                   llevandoVictima u8, objetivoX i32, objetivoY i32, modo u8
+#                   (los enums van como su índice en la clase de reto.py)
+#   Los conteos y coordenadas van en 32 bits para que quepan tableros grandes
+#   (con 16 bits, un plano de 300x300 ya no cabía). La versión 1 ("RTC1") los
+#   tenía en 16 bits y ya no se lee.
+
+import struct
+
+from reto import CTipoBombero, CEstadoBombero, CModoAgente
+
+FORMATO_JSON = "json"
+FORMATO_COLUMNAR = "columnar"
+FORMATO_BINARIO = "binario"
+
+TIPOS_CONTENIDO = {
+    "application/x-reto-binario": FORMATO_BINARIO,
+    "application/x-reto-columnar+json": FORMATO_COLUMNAR
+}
+TIPO_CONTENIDO_BINARIO = "application/x-reto-binario"
+
+MAGICO = b"RTC2"
+VERSION_BINARIO = 2
+
+# Capas booleanas por celda que van en ambos formatos compactos.
+CAPAS_BINARIO = [
+    "esPiso", "esDescubierta", "tieneFuego", "tieneHumo", "tienePoi", "poiEsVictima",
+    "tieneVictimaEncontrada", "esPuertaCerrada", "esPuertaAbierta", "esEntrada"
+]
+
+TIPOS_BOMBERO = [t.value for t in CTipoBombero]
+ESTADOS_BOMBERO = [e.value for e in CEstadoBombero]
+MODOS_AGENTE = [m.value for m in CModoAgente]
+
+ENCABEZADO = struct.Struct("<4sBIII")
+ESTADISTICAS = struct.Struct("<IIIIIBIIIIII")
+CANTIDAD = struct.Struct("<I")
+PUERTA = struct.Struct("<IB")
+BOMBERO = struct.Struct("<IBIIBBBBiiB")
+
+# Función que lee una capa de una celda (poiEsVictima se deriva de tipoPoi).
+def valorCapa(celda, capa):
+    if capa == "poiEsVictima":
+        return celda["tipoPoi"] == "victima"
+    return celda[capa]
+
+# Función que convierte las paredes [arriba, izquierda, abajo, derecha] a un nibble.
+def paredesANibble(paredes):
+    return (paredes[0] << 3) | (paredes[1] << 2) | (paredes[2] << 1) | paredes[3]
+
+def nibbleAParedes(nibble):
+    return [(nibble >> 3) & 1, (nibble >> 2) & 1, (nibble >> 1) & 1, nibble & 1]
+
+# Función que obtiene la dirección de cada puerta a partir de los marcadores.
+def direccionesPuertas(estado, ancho):
+    direcciones = {}
+    for nombre in ("puertasCerradas", "puertasAbiertas"):
+        for puerta in estado["marcadores"][nombre]:
+            direcciones[puerta["y"] * ancho + puerta["x"]] = int(puerta["tipo"])
+    return direcciones
+
+# Función que codifica el estado completo en formato columnar.
+def codificarColumnar(estado):
+    grid = estado["grid"]
+    ancho = estado["dimensiones"]["ancho"]
+    capas = {capa: [int(valorCapa(celda, capa)) for celda in grid] for capa in CAPAS_BINARIO}
+    direcciones = direccionesPuertas(estado, ancho)
+
+    return {
+        "formato": FORMATO_COLUMNAR,
+        "paso": estado["paso"],
+        "dimensiones": estado["dimensiones"],
+        "capas": capas,
+        "paredes": [paredesANibble(celda["paredes"]) for celda in grid],
+        "direccionPuerta": [direcciones.get(i, -1) for i in range(len(grid))],
+        "bomberos": {
+            "id": [b["id"] for b in estado["bomberos"]],
+            "tipo": [b["tipo"] for b in estado["bomberos"]],
+            "x": [b["posicion"]["x"] for b in estado["bomberos"]],
+            "y": [b["posicion"]["y"] for b in estado["bomberos"]],
+            "estado": [b["estado"] for b in estado["bomberos"]],
+            "puntosAccion": [b["puntosAccion"] for b in estado["bomberos"]],
+            "llevandoVictima": [int(b["llevandoVictima"]) for b in estado["bomberos"]],
+            "objetivoX": [b["posicionObjetivo"]["x"] for b in estado["bomberos"]],
+            "objetivoY": [b["posicionObjetivo"]["y"] for b in estado["bomberos"]],
+            "modo": [b["modo"] for b in estado["bomberos"]]
+        },
+        "estadisticas": estado["estadisticas"],
+        "timestamp": estado["timestamp"]
+    }
+
+# Función que codifica el estado completo en formato binario.
+def codificarBinario(estado):
+    grid = estado["grid"]
+    ancho = estado["dimensiones"]["ancho"]
+    alto = estado["dimensiones"]["alto"]
+    est = estado["estadisticas"]
+    bytesPorPlano = (len(grid) + 7) // 8
+
+    partes = [ENCABEZADO.pack(MAGICO, VERSION_BINARIO, ancho, alto, estado["paso"])]
+
+    partes.append(ESTADISTICAS.pack(
+        est["turno"], est["victimasRescatadas"], est["victimasPerdidas"], est["victimasEncontradas"],
+        est["puntosDano"], int(est["juegoTerminado"]), est["totalFuegosActivos"],
+        est["totalHumosActivos"], est["totalPoisActivos"], est["maxPuntosDano"],
+        est["maxVictimasPerdidas"], est["victimasParaGanar"]
+    ))
+    resultado = (est["resultado"] or "").encode("utf-8")
+    partes.append(struct.pack("<B", len(resultado)) + resultado)
+
+    # Un entero por capa: el bit i es la celda i.
+    for capa in CAPAS_BINARIO:
+        plano = 0
+        for i, celda in enumerate(grid):
+            if valorCapa(celda, capa):
+                plano |= 1 << i
+        partes.append(plano.to_bytes(bytesPorPlano, "little"))
+
+    nibbles = bytearray((len(grid) + 1) // 2)
+    for i, celda in enumerate(grid):
+        nibbles[i >> 1] |= paredesANibble(celda["paredes"]) << (4 * (i & 1))
+    partes.append(bytes(nibbles))
+
+    direcciones = direccionesPuertas(estado, ancho)
+    partes.append(CANTIDAD.pack(len(direcciones)))
+    partes.extend(PUERTA.pack(indice, direccion) for indice, direccion in sorted(direcciones.items()))
+
+    partes.append(CANTIDAD.pack(len(estado["bomberos"])))
+    for b in estado["bomberos"]:
+        partes.append(BOMBERO.pack(
+            b["id"], TIPOS_BOMBERO.index(b["tipo"]), b["posicion"]["x"], b["posicion"]["y"],
+            ESTADOS_BOMBERO.index(b["estado"]), b["puntosAccion"], b["maxPuntosAccion"],
+            int(b["llevandoVictima"]), b["posicionObjetivo"]["x"], b["posicionObjetivo"]["y"],
+            MODOS_AGENTE.index(b["modo"])
+        ))
+
+    return b"".join(partes)
+
+# Función que reconstruye el estado (mismo formato que capturarEstadoActual) desde bytes.
+def decodificarBinario(datos):
+    magico, version, ancho, alto, paso = ENCABEZADO.unpack_from(datos, 0)
+    if magico != MAGICO or version != VERSION_BINARIO:
+        raise ValueError("Datos binarios de estado no válidos")
+    idx = ENCABEZADO.size
+
+    valores = ESTADISTICAS.unpack_from(datos, idx)
+    idx += ESTADISTICAS.size
+    largoResultado = datos[idx]
+    resultado = datos[idx + 1:idx + 1 + largoResultado].decode("utf-8") or None
+    idx += 1 + largoResultado
+
+    totalCeldas = ancho * alto
+    bytesPorPlano = (totalCeldas + 7) // 8
+    planos = {}
+    for capa in CAPAS_BINARIO:
+        planos[capa] = int.from_bytes(datos[idx:idx + bytesPorPlano], "little")
+        idx += bytesPorPlano
+
+    bytesParedes = (totalCeldas + 1) // 2
+    nibbles = datos[idx:idx + bytesParedes]
+    idx += bytesParedes
+
+    (totalPuertas,) = CANTIDAD.unpack_from(datos, idx)
+    idx += CANTIDAD.size
+    direcciones = {}
+    for _ in range(totalPuertas):
+        indice, direccion = PUERTA.unpack_from(datos, idx)
+        direcciones[indice] = direccion
+        idx += PUERTA.size
+
+    (totalBomberos,) = CANTIDAD.unpack_from(datos, idx)
+    idx += CANTIDAD.size
+    bomberos = []
+    for _ in range(totalBomberos):
+        (idB, tipo, x, y, estadoB, puntos, maxPuntos, llevando,
+         objetivoX, objetivoY, modo) = BOMBERO.unpack_from(datos, idx)
+        idx += BOMBERO.size
+        bomberos.append({
+            "id": idB,
+            "tipo": TIPOS_BOMBERO[tipo],
+            "posicion": {"x": x, "y": y},
+            "estado": ESTADOS_BOMBERO[estadoB],
+            "puntosAccion": puntos,
+            "maxPuntosAccion": maxPuntos,
+            "llevandoVictima": bool(llevando),
+            "posicionObjetivo": {"x": objetivoX, "y": objetivoY},
+            "modo": MODOS_AGENTE[modo]
+        })
+
+    grid = []
+    marcadores = {nombre: [] for nombre in
+                  ("fuego", "humo", "pois", "victimasEncontradas", "puertasCerradas", "puertasAbiertas", "entradas")}
+    for i in range(totalCeldas):
+        x, y = i % ancho, i // ancho
+        bit = {capa: bool((planos[capa] >> i) & 1) for capa in CAPAS_BINARIO}
+        tipoPoi = ("victima" if bit["poiEsVictima"] else "falsa_alarma") if bit["tienePoi"] else ""
+        grid.append({
+            "x": x,
+            "y": y,
+            "esPiso": bit["esPiso"],
+            "esDescubierta": bit["esDescubierta"],
+            "tieneFuego": bit["tieneFuego"],
+            "tieneHumo": bit["tieneHumo"],
+            "tienePoi": bit["tienePoi"],
+            "tipoPoi": tipoPoi,
+            "tieneVictimaEncontrada": bit["tieneVictimaEncontrada"],
+            "esPuertaCerrada": bit["esPuertaCerrada"],
+            "esPuertaAbierta": bit["esPuertaAbierta"],
+            "esEntrada": bit["esEntrada"],
+            "paredes": nibbleAParedes((nibbles[i >> 1] >> (4 * (i & 1))) & 0xF)
+        })
+        if bit["tieneFuego"]:
+            marcadores["fuego"].append({"x": x, "y": y})
+        if bit["tieneHumo"]:
+            marcadores["humo"].append({"x": x, "y": y})
+        if bit["tienePoi"]:
+            marcadores["pois"].append({"x": x, "y": y, "tipo": tipoPoi})
+        if bit["tieneVictimaEncontrada"]:
+            marcadores["victimasEncontradas"].append({"x": x, "y": y})
+        if bit["esPuertaCerrada"]:
+            marcadores["puertasCerradas"].append({"x": x, "y": y, "tipo": str(direcciones.get(i, 0))})
+        if bit["esPuertaAbierta"]:
+            marcadores["puertasAbiertas"].append({"x": x, "y": y, "tipo": str(direcciones.get(i, 0))})
+        if bit["esEntrada"]:
+            marcadores["entradas"].append({"x": x, "y": y})
+
+    (turno, rescatadas, perdidas, encontradas, dano, terminado, fuegos, humos, pois,
+     maxDano, maxPerdidas, paraGanar) = valores
+    return {
+        "paso": paso,
+        "dimensiones": {"ancho": ancho, "alto": alto},
+        "bomberos": bomberos,
+        "grid": grid,
+        "marcadores": marcadores,
+        "estadisticas": {
+            "turno": turno,
+            "victimasRescatadas": rescatadas,
+            "victimasPerdidas": perdidas,
+            "victimasEncontradas": encontradas,
+            "puntosDano": dano,
+            "juegoTerminado": bool(terminado),
+            "resultado": resultado,
+            "totalFuegosActivos": fuegos,
+            "totalHumosActivos": humos,
+            "totalPoisActivos": pois,
+            "maxPuntosDano": maxDano,
+            "maxVictimasPerdidas": maxPerdidas,
+            "victimasParaGanar": paraGanar
+        },
+        "timestamp": turno
+    }
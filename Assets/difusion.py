@@ -0,0 +1,113 @@
+# ======================================
+# ====== Difusión de Pasos (SSE) =======
+# ======================================
+
+# Cada paso se serializa una sola vez y los mismos bytes se reparten a todos
+# los clientes suscritos. Si un cliente no alcanza a leer, se descartan sus
+# frames pendientes y recibe un estado completo para volver a sincronizarse.
+
+import json
+import threading
+from collections import deque
+
+# Formatos de frame que puede pedir un suscriptor.
+FORMATO_DELTA = "delta"
+FORMATO_COMPLETO = "completo"
+
+# Función que arma un frame SSE ya codificado en bytes.
+def codificarFrame(evento, paso, datos):
+    contenido = json.dumps(datos, separators=(",", ":"), ensure_ascii=False)
+    return f"id: {paso}\nevent: {evento}\ndata: {contenido}\n\n".encode("utf-8")
+
+class CSuscriptor:
+    def __init__(self, formato=FORMATO_DELTA, maxFramesPendientes=8):
+        self.formato = formato
+        self.maxFramesPendientes = maxFramesPendientes
+        self.frames = deque()
+        self.condicion = threading.Condition()
+        self.cerrado = False
+        self.framesDescartados = 0
+        # El primer frame siempre es completo.
+        self.requiereCompleto = True
+
+    # Método que indica si el suscriptor necesita un estado completo en el siguiente paso.
+    def necesitaCompleto(self):
+        return (self.formato == FORMATO_COMPLETO or
+                self.requiereCompleto or
+                len(self.frames) >= self.maxFramesPendientes)
+
+    # Método que agrega un frame; si es completo, reemplaza a los pendientes.
+    def encolar(self, frame, completo=False):
+        with self.condicion:
+            if completo:
+                self.framesDescartados += len(self.frames)
+                self.frames.clear()
+                self.requiereCompleto = False
+            self.frames.append(frame)
+            self.condicion.notify()
+
+    # Método que espera el siguiente frame; regresa None si se agotó el tiempo.
+    def siguienteFrame(self, timeout):
+        with self.condicion:
+            if not self.frames and not self.cerrado:
+                self.condicion.wait(timeout)
+            if self.frames:
+                return self.frames.popleft()
+            return None
+
+    def cerrar(self):
+        with self.condicion:
+            self.cerrado = True
+            self.condicion.notify_all()
+
+class CDifusor:
+    def __init__(self, maxFramesPendientes=8):
+        self.maxFramesPendientes = maxFramesPendientes
+        self.suscriptores = set()
+        self.lock = threading.Lock()
+
+    # Método que registra un suscriptor nuevo y le manda el estado publicado.
+    def suscribir(self, estado, formato=FORMATO_DELTA):
+        suscriptor = CSuscriptor(formato, self.maxFramesPendientes)
+        suscriptor.encolar(codificarFrame(FORMATO_COMPLETO, estado["paso"], estado), completo=True)
+        with self.lock:
+            self.suscriptores.add(suscriptor)
+        return suscriptor
+
+    def desuscribir(self, suscriptor):
+        with self.lock:
+            self.suscriptores.discard(suscriptor)
+        suscriptor.cerrar()
+
+    # Método que publica el paso actual del modelo a todos los suscriptores.
+    # El delta y el estado completo se codifican como máximo una vez cada uno.
+    # Se llama desde el hilo dueño del modelo.
+    def publicar(self, modelo, reinicio=False):
+        with self.lock:
+            suscriptores = list(self.suscriptores)
+        if not suscriptores:
+            return
+
+        paso = modelo.pasoActual
+        frameCompleto = None
+        frameDelta = None
+        for suscriptor in suscriptores:
+            if reinicio or suscriptor.necesitaCompleto():
+                if frameCompleto is None:
+                    frameCompleto = codificarFrame(FORMATO_COMPLETO, paso, modelo.obtenerUltimoEstado())
+                suscriptor.encolar(frameCompleto, completo=True)
+            else:
+                if frameDelta is None:
+                    frameDelta = codificarFrame(FORMATO_DELTA, paso, modelo.obtenerCambiosDesde(paso - 1))
+                suscriptor.encolar(frameDelta)
+
+    # Método que cierra todas las conexiones (la sesión fue eliminada).
+    def cerrar(self):
+        with self.lock:
+            suscriptores = list(self.suscriptores)
+            self.suscriptores.clear()
+        for suscriptor in suscriptores:
+            suscriptor.cerrar()
+
+    def __len__(self):
+        return len(self.suscriptores)
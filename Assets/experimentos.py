@@ -0,0 +1,214 @@
+# ======================================
+# ====== Corridas de Experimentos ======
+# ======================================
+
+# Corre comparaciones sin editar el código: archivos de configuración, modos,
+# iteraciones, semilla, procesos, tope de turnos y motor se dan en la línea de
+# comandos. Los resultados de cada juego se pueden guardar en JSON, CSV,
+# columnas JSON ("columnar", un arreglo por campo) o columnas de NumPy (.npz).
+# Al terminar se imprime en la salida estándar un resumen en JSON con el
+# rendimiento de cada corrida (juegos/s y pasos/s); lo demás va a stderr.
+#
+#   python experimentos.py -n 1000 -s 0
+#   python experimentos.py -c txtxd.txt plano.txt -m estrategica -n 5000 -p 8 --max-turnos 200 -o noche.csv
+#   python experimentos.py -n 20000 --motor lote -o lote.npz
+
+import argparse
+import contextlib
+import csv
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+# Mesa puede imprimir avisos al importarse; van a stderr para que la salida
+# estándar sea solo el resumen.
+with contextlib.redirect_stdout(sys.stderr):
+    from analisis import analizarResultados
+    from paralelo import (CLASES_SOLUCION, METRICAS, RESULTADOS_TEXTO, TIPO_FILA, ejecutarEnParalelo,
+                          filasADiccionarios, imprimirProgreso, llenarFila)
+    from reto import RESULTADO_TOPE_TURNOS, semillaIteracion
+
+MOTOR_MODELO = "modelo"  # Un CJuego de Mesa por juego, repartidos en procesos.
+MOTOR_LOTE = "lote"      # CSimuladorLote: todos los juegos juntos con NumPy.
+
+FORMATOS_POR_EXTENSION = {".json": "json", ".csv": "csv", ".npz": "npz"}
+FORMATOS = ("json", "csv", "columnar", "npz")
+
+# Función que arma el parser de la línea de comandos.
+def crearParser():
+    parser = argparse.ArgumentParser(description="Corre partidas en lote y resume su rendimiento.")
+    parser.add_argument("-c", "--config", nargs="+", default=["txtxd.txt"],
+                        help="archivos de configuración del tablero")
+    parser.add_argument("-m", "--modos", nargs="+", choices=sorted(CLASES_SOLUCION),
+                        default=["aleatoria", "estrategica"], help="tipos de solución")
+    parser.add_argument("-n", "--iteraciones", type=int, default=1000, help="juegos por configuración y modo")
+    parser.add_argument("-s", "--semilla", type=int, default=None,
+                        help="semilla base (sin ella se elige una y se reporta en el resumen)")
+    parser.add_argument("-p", "--procesos", type=int, default=None, help="procesos (por omisión, uno por núcleo)")
+    parser.add_argument("--max-turnos", type=int, default=None, help="tope de turnos por juego")
+    parser.add_argument("--motor", choices=(MOTOR_MODELO, MOTOR_LOTE), default=MOTOR_MODELO)
+    parser.add_argument("--cache", default=None, help="archivo SQLite con resultados ya jugados (motor modelo)")
+    parser.add_argument("-o", "--salida", default=None, help="archivo para los resultados de cada juego")
+    parser.add_argument("--formato", choices=FORMATOS, default=None,
+                        help="formato de la salida (por omisión, según la extensión)")
+    parser.add_argument("--detalle", action="store_true", help="imprime las estadísticas de cada corrida en stderr")
+    parser.add_argument("--progreso", action="store_true", help="muestra el avance en stderr")
+    return parser
+
+# Función que juega una corrida (una configuración y un modo) y regresa sus filas.
+def jugarCorrida(argumentos, archivo, modo, semilla, cache):
+    if argumentos.motor == MOTOR_LOTE:
+        # Se importa aquí para no cargar el simulador en lote cuando no se usa.
+        from simulador_lote import ejecutarLote
+        filas = np.zeros(argumentos.iteraciones, dtype=TIPO_FILA)
+        resultados = ejecutarLote(argumentos.iteraciones, archivo, modo, semilla, argumentos.max_turnos)
+        for fila, resultado in zip(filas, resultados):
+            llenarFila(fila, resultado)
+        return filas
+    return ejecutarEnParalelo(argumentos.iteraciones, archivo, modo, argumentos.procesos, semilla=semilla,
+                              progreso=imprimirProgreso if argumentos.progreso else None,
+                              comoArreglo=True, cache=cache, maxTurnos=argumentos.max_turnos)
+
+# Función que resume una corrida: rendimiento, promedios, conteo de resultados y
+# cuántos juegos cortó el tope de turnos (sus promedios no son de juegos completos).
+def resumirCorrida(archivo, modo, filas, segundos):
+    juegos = len(filas)
+    pasos = int(filas["turnos"].sum())
+    cortados = int((filas["resultado"] == RESULTADOS_TEXTO.index(RESULTADO_TOPE_TURNOS)).sum())
+    textos, conteos = np.unique(filas["resultado"], return_counts=True)
+    return {
+        "config": archivo,
+        "modo": modo,
+        "juegos": juegos,
+        "pasos": pasos,
+        "juegos_cortados_por_tope": cortados,
+        "segundos": round(segundos, 4),
+        "juegos_por_segundo": round(juegos / segundos, 2) if segundos else None,
+        "pasos_por_segundo": round(pasos / segundos, 2) if segundos else None,
+        "promedios": {metrica: round(float(filas[metrica].mean()), 4) if juegos else None for metrica in METRICAS},
+        "resultados": {RESULTADOS_TEXTO[texto]: int(conteo) for texto, conteo in zip(textos, conteos)}
+    }
+
+# Función que arma las columnas de la salida con las filas de una corrida.
+def agregarColumnas(columnas, archivo, modo, filas, semilla, motor):
+    juegos = len(filas)
+    columnas["config"].extend([archivo] * juegos)
+    columnas["modo"].extend([modo] * juegos)
+    columnas["iteracion"].extend(range(juegos))
+    # En el motor modelo cada juego tiene su semilla; el lote usa un solo generador.
+    if motor == MOTOR_MODELO:
+        columnas["semilla"].extend(semillaIteracion(semilla, i) for i in range(juegos))
+    columnas["resultado"].extend(RESULTADOS_TEXTO[texto] for texto in filas["resultado"].tolist())
+    for metrica in METRICAS:
+        columnas[metrica].extend(filas[metrica].tolist())
+
+# Función que guarda las columnas en el formato pedido.
+def guardarSalida(archivo, formato, columnas):
+    nombres = list(columnas)
+    if formato == "npz":
+        arreglos = {}
+        for nombre in nombres:
+            valores = columnas[nombre]
+            if nombre == "semilla":
+                arreglos[nombre] = np.array(valores, dtype=np.uint64)
+            elif nombre in ("config", "modo", "resultado"):
+                arreglos[nombre] = np.array(valores)
+            else:
+                arreglos[nombre] = np.array(valores, dtype=np.int32)
+        np.savez_compressed(archivo, **arreglos)
+        return
+
+    with open(archivo, "w", encoding="utf-8", newline="") as f:
+        if formato == "columnar":
+            json.dump(columnas, f, ensure_ascii=False)
+        elif formato == "json":
+            json.dump([dict(zip(nombres, valores)) for valores in zip(*columnas.values())], f, ensure_ascii=False)
+        else:
+            escritor = csv.writer(f)
+            escritor.writerow(nombres)
+            escritor.writerows(zip(*columnas.values()))
+
+def main(argv=None):
+    parser = crearParser()
+    argumentos = parser.parse_args(argv)
+
+    formato = argumentos.formato
+    if argumentos.salida is not None and formato is None:
+        formato = FORMATOS_POR_EXTENSION.get(os.path.splitext(argumentos.salida)[1].lower())
+        if formato is None:
+            parser.error("no se reconoce la extensión de --salida; usa --formato")
+    if argumentos.motor == MOTOR_LOTE and argumentos.cache is not None:
+        parser.error("--cache solo sirve con --motor modelo (el lote no tiene una semilla por juego)")
+    if argumentos.iteraciones < 1:
+        parser.error("--iteraciones debe ser al menos 1")
+    if argumentos.max_turnos is not None and argumentos.max_turnos < 1:
+        parser.error("--max-turnos debe ser al menos 1")
+    if argumentos.procesos is not None and argumentos.procesos < 1:
+        parser.error("--procesos debe ser al menos 1")
+    for archivo in argumentos.config:
+        if not os.path.isfile(archivo):
+            parser.error(f"no existe el archivo de configuración {archivo}")
+
+    semilla = argumentos.semilla
+    if semilla is None:
+        semilla = int(np.random.SeedSequence().generate_state(1, np.uint32)[0])
+
+    cache = None
+    if argumentos.cache is not None:
+        from cache_resultados import CCacheResultados
+        cache = CCacheResultados(argumentos.cache)
+
+    columnas = {nombre: [] for nombre in ("config", "modo", "iteracion", "semilla", "resultado") + METRICAS}
+    if argumentos.motor == MOTOR_LOTE:
+        del columnas["semilla"]
+
+    corridas = []
+    inicioTotal = time.perf_counter()
+    try:
+        for archivo in argumentos.config:
+            for modo in argumentos.modos:
+                inicio = time.perf_counter()
+                filas = jugarCorrida(argumentos, archivo, modo, semilla, cache)
+                segundos = time.perf_counter() - inicio
+                corridas.append(resumirCorrida(archivo, modo, filas, segundos))
+                if argumentos.salida is not None:
+                    agregarColumnas(columnas, archivo, modo, filas, semilla, argumentos.motor)
+                if argumentos.detalle:
+                    with contextlib.redirect_stdout(sys.stderr):
+                        analizarResultados(filasADiccionarios(filas), f"{modo} - {archivo}")
+    finally:
+        if cache is not None:
+            cache.cerrar()
+    segundosTotales = time.perf_counter() - inicioTotal
+
+    if argumentos.salida is not None:
+        guardarSalida(argumentos.salida, formato, columnas)
+
+    juegos = sum(corrida["juegos"] for corrida in corridas)
+    pasos = sum(corrida["pasos"] for corrida in corridas)
+    cortados = sum(corrida["juegos_cortados_por_tope"] for corrida in corridas)
+    resumen = {
+        "motor": argumentos.motor,
+        "semilla": semilla,
+        "procesos": (argumentos.procesos or os.cpu_count()) if argumentos.motor == MOTOR_MODELO else 1,
+        "max_turnos": argumentos.max_turnos,
+        "cache": argumentos.cache,
+        "salida": argumentos.salida,
+        "corridas": corridas,
+        "total": {
+            "juegos": juegos,
+            "pasos": pasos,
+            "juegos_cortados_por_tope": cortados,
+            "segundos": round(segundosTotales, 4),
+            "juegos_por_segundo": round(juegos / segundosTotales, 2),
+            "pasos_por_segundo": round(pasos / segundosTotales, 2)
+        }
+    }
+    print(json.dumps(resumen, ensure_ascii=False))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+# ======================================
+# ====== Tiempo de Importación =========
+# ======================================
+
+# Mide cuánto tarda importar los módulos del motor, cada uno en un proceso
+# nuevo (sin nada cargado de antes), y revisa que no pasen de su presupuesto ni
+# carguen librerías que no les tocan. Importar el motor no debe jugar partidas:
+# eso lo hacen analisis.py y los módulos de experimentos cuando se les pide.
+#
+#   python importacion.py      imprime los tiempos; sale con 1 si algo se pasa
+
+import json
+import os
+import subprocess
+import sys
+
+# Segundos que puede tardar cada módulo (el mejor de varias mediciones). Casi
+# todo es Mesa, que ya trae pandas; el motor en sí tarda unas decenas de ms.
+PRESUPUESTOS = {
+    "reto": 1.0,
+    "simulador_lote": 1.0,
+    "paralelo": 1.0,
+    "experimentos": 1.0,
+    "servidor_flask": 1.5
+}
+
+# Librerías de gráficas y del servidor que solo debe cargar quien las usa.
+PROHIBIDOS = ("seaborn", "matplotlib", "flask")
+PERMITIDOS = {"servidor_flask": ("flask",)}
+
+# Código que se corre en el proceso nuevo: importa, mide y reporta en JSON.
+CODIGO_MEDICION = """
+import json, sys, time
+inicio = time.perf_counter()
+__import__({modulo!r})
+segundos = time.perf_counter() - inicio
+print(json.dumps({{"segundos": segundos, "modulos": sorted(sys.modules)}}))
+"""
+
+# Función que importa un módulo en un proceso nuevo. Regresa los segundos y los
+# módulos que quedaron cargados.
+def medirImportacion(modulo):
+    proceso = subprocess.run([sys.executable, "-c", CODIGO_MEDICION.format(modulo=modulo)],
+                             cwd=os.path.dirname(os.path.abspath(__file__)),
+                             capture_output=True, text=True, check=True)
+    datos = json.loads(proceso.stdout.strip().splitlines()[-1])
+    return datos["segundos"], set(datos["modulos"])
+
+# Función que revisa todos los presupuestos. Regresa {módulo: (segundos,
+# presupuesto, librerías prohibidas que cargó)}.
+def revisarPresupuestos(repeticiones=3):
+    resultados = {}
+    for modulo, presupuesto in PRESUPUESTOS.items():
+        mediciones = [medirImportacion(modulo) for _ in range(repeticiones)]
+        segundos = min(segundos for segundos, _ in mediciones)
+        cargados = mediciones[0][1]
+        prohibidos = [nombre for nombre in PROHIBIDOS
+                      if nombre in cargados and nombre not in PERMITIDOS.get(modulo, ())]
+        resultados[modulo] = (segundos, presupuesto, prohibidos)
+    return resultados
+
+if __name__ == "__main__":
+    bien = True
+    for modulo, (segundos, presupuesto, prohibidos) in revisarPresupuestos().items():
+        estado = "ok" if segundos <= presupuesto and not prohibidos else "EXCEDE"
+        bien &= estado == "ok"
+        extra = f"  carga {', '.join(prohibidos)}" if prohibidos else ""
+        print(f"{modulo}: {segundos * 1000:.0f} ms (presupuesto {presupuesto * 1000:.0f} ms) {estado}{extra}")
+    sys.exit(0 if bien else 1)
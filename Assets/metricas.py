@@ -0,0 +1,152 @@
+# ======================================
+# ======== Métricas (Prometheus) =======
+# ======================================
+
+# Contadores, histogramas y medidores que se exponen en formato de texto de
+# Prometheus. Registrar un valor solo cuesta tomar un lock y sumar; el texto
+# se arma únicamente cuando alguien consulta /metrics.
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+
+TIPO_CONTENIDO_PROMETHEUS = "text/plain; version=0.0.4; charset=utf-8"
+
+# Límites (en segundos) de los buckets de latencia: de 50 µs a 2.5 s.
+BUCKETS_LATENCIA = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Función que escapa el valor de una etiqueta.
+def escaparEtiqueta(valor):
+    return str(valor).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+# Función que arma el bloque {a="x",b="y"} de una muestra.
+def formatearEtiquetas(nombres, valores):
+    if not nombres:
+        return ""
+    pares = ",".join(f'{nombre}="{escaparEtiqueta(valor)}"' for nombre, valor in zip(nombres, valores))
+    return "{" + pares + "}"
+
+# Función que formatea un número como lo espera Prometheus.
+def formatearValor(valor):
+    if valor == float("inf"):
+        return "+Inf"
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return repr(valor) if isinstance(valor, float) else str(valor)
+
+class CContador:
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.valores = {}  # {valores de las etiquetas: cuenta}
+        self.lock = threading.Lock()
+
+    def incrementar(self, *valoresEtiquetas, cantidad=1):
+        with self.lock:
+            self.valores[valoresEtiquetas] = self.valores.get(valoresEtiquetas, 0) + cantidad
+
+    # Método que genera las líneas de texto de la métrica.
+    def lineas(self):
+        with self.lock:
+            valores = sorted(self.valores.items())
+        yield f"# HELP {self.nombre} {self.ayuda}"
+        yield f"# TYPE {self.nombre} counter"
+        for valoresEtiquetas, valor in valores:
+            yield f"{self.nombre}{formatearEtiquetas(self.etiquetas, valoresEtiquetas)} {formatearValor(valor)}"
+
+class CHistograma:
+    def __init__(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_LATENCIA):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.buckets = tuple(buckets)
+        # {valores de las etiquetas: [cuentas por bucket (la última es +Inf), suma]}
+        self.series = {}
+        self.lock = threading.Lock()
+
+    # Método que registra una observación.
+    def observar(self, valor, *valoresEtiquetas):
+        indice = bisect_left(self.buckets, valor)
+        with self.lock:
+            serie = self.series.get(valoresEtiquetas)
+            if serie is None:
+                serie = self.series[valoresEtiquetas] = [[0] * (len(self.buckets) + 1), 0.0]
+            serie[0][indice] += 1
+            serie[1] += valor
+
+    # Método para medir un bloque con "with histograma.medir(...):".
+    @contextmanager
+    def medir(self, *valoresEtiquetas):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(time.perf_counter() - inicio, *valoresEtiquetas)
+
+    def lineas(self):
+        with self.lock:
+            series = sorted((llave, list(cuentas), suma) for llave, (cuentas, suma) in self.series.items())
+        yield f"# HELP {self.nombre} {self.ayuda}"
+        yield f"# TYPE {self.nombre} histogram"
+        nombresBucket = self.etiquetas + ("le",)
+        for valoresEtiquetas, cuentas, suma in series:
+            acumulado = 0
+            for limite, cuenta in zip(self.buckets + (float("inf"),), cuentas):
+                acumulado += cuenta
+                etiquetas = formatearEtiquetas(nombresBucket, valoresEtiquetas + (formatearValor(limite),))
+                yield f"{self.nombre}_bucket{etiquetas} {acumulado}"
+            etiquetas = formatearEtiquetas(self.etiquetas, valoresEtiquetas)
+            yield f"{self.nombre}_sum{etiquetas} {formatearValor(suma)}"
+            yield f"{self.nombre}_count{etiquetas} {acumulado}"
+
+# Medidor cuyo valor se calcula al consultar las métricas. La función regresa
+# una lista de (valores de las etiquetas, valor). Con tipo="counter" sirve para
+# exponer contadores que ya lleva otro objeto.
+class CMedidor:
+    def __init__(self, nombre, ayuda, funcion, etiquetas=(), tipo="gauge"):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.funcion = funcion
+        self.etiquetas = tuple(etiquetas)
+        self.tipo = tipo
+
+    def lineas(self):
+        yield f"# HELP {self.nombre} {self.ayuda}"
+        yield f"# TYPE {self.nombre} {self.tipo}"
+        for valoresEtiquetas, valor in self.funcion():
+            yield f"{self.nombre}{formatearEtiquetas(self.etiquetas, valoresEtiquetas)} {formatearValor(valor)}"
+
+class CRegistroMetricas:
+    def __init__(self):
+        self.metricas = []
+
+    # Método que agrega una métrica al registro y la regresa.
+    def registrar(self, metrica):
+        self.metricas.append(metrica)
+        return metrica
+
+    # Método que genera el texto de todas las métricas.
+    def generarTexto(self):
+        lineas = []
+        for metrica in self.metricas:
+            lineas.extend(metrica.lineas())
+        return "\n".join(lineas) + "\n"
+
+# Función que reemplaza un método de una clase por uno que mide su duración.
+# Así se instrumenta el modelo sin que la simulación dependa de las métricas.
+def instrumentarMetodo(clase, nombreMetodo, histograma, *valoresEtiquetas):
+    original = getattr(clase, nombreMetodo)
+
+    @wraps(original)
+    def medido(*args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            histograma.observar(time.perf_counter() - inicio, *valoresEtiquetas)
+
+    setattr(clase, nombreMetodo, medido)
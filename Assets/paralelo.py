@@ -0,0 +1,163 @@
+# ======================================
+# ===== Iteraciones en Paralelo ========
+# ======================================
+
+# Reparte las iteraciones de ejecutarMultiplesIteraciones entre varios procesos.
+# Los juegos se mandan en bloques y cada proceso regresa sus resultados como un
+# arreglo compacto (una fila de enteros por juego) en vez de un diccionario por
+# juego. Cada iteración tiene su propia semilla, derivada de la semilla base y
+# de su número, así que el resultado no depende de cómo se reparten los bloques.
+# Si un proceso se cae, los bloques sin terminar se vuelven a mandar a un grupo
+# nuevo; el intento solo se le cuenta al bloque que falló. Con un
+# cache de resultados solo se mandan los juegos que no estén guardados.
+#
+#   python paralelo.py 1000                  compara las dos estrategias
+#   python paralelo.py 1000 txtxd.txt 8      con otro archivo y 8 procesos
+
+import math
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from analisis import analizarResultados
+from reto import RESULTADO_TOPE_TURNOS, CAleatorio, CEstrategia, modoCache, obtenerPlantilla, semillaIteracion
+
+# Clase del modelo para cada tipo de solución.
+CLASES_SOLUCION = {"aleatoria": CAleatorio, "estrategica": CEstrategia}
+
+# Textos que puede tener "resultado"; en el arreglo se guarda su índice.
+RESULTADOS_TEXTO = ("🏆.", "💀.", "💥.", RESULTADO_TOPE_TURNOS)
+
+# Una fila por juego con las llaves de runModel.
+METRICAS = ("victimasRescatadas", "victimasPerdidas", "puntosDano", "turnos",
+            "fuegosFinales", "humosFinales", "poisRestantes")
+TIPO_FILA = np.dtype([("resultado", np.int8)] + [(metrica, np.int32) for metrica in METRICAS])
+
+# Mesa (por mesa.batchrunner) cambia el arranque de procesos a "spawn", que vuelve
+# a importar todo en cada proceso; con "fork" los procesos nacen con el motor y
+# las plantillas ya cargados.
+CONTEXTO_PROCESOS = multiprocessing.get_context(
+    "fork" if "fork" in multiprocessing.get_all_start_methods() else None)
+
+# Función que copia el diccionario de runModel a una fila.
+def llenarFila(fila, resultado):
+    fila["resultado"] = RESULTADOS_TEXTO.index(resultado["resultado"])
+    for metrica in METRICAS:
+        fila[metrica] = resultado[metrica]
+
+# Función que juega los juegos con los números dados de una corrida. Se ejecuta
+# en los procesos del grupo y regresa sus filas.
+def jugarBloque(archivo_config, tipo_solucion, semilla, indices, maxTurnos=None):
+    clase = CLASES_SOLUCION[tipo_solucion]
+    filas = np.zeros(len(indices), dtype=TIPO_FILA)
+    for fila, indice in zip(filas, indices):
+        modelo = clase(archivo_config, semilla=semillaIteracion(semilla, int(indice)))
+        llenarFila(fila, modelo.runModel(maxTurnos))
+    return filas
+
+# Función que convierte las filas en la lista de diccionarios de
+# ejecutarMultiplesIteraciones (la que recibe analizarResultados).
+def filasADiccionarios(filas):
+    resultados = []
+    for fila in filas.tolist():
+        resultado = {"resultado": RESULTADOS_TEXTO[fila[0]]}
+        resultado.update(zip(METRICAS, fila[1:]))
+        resultados.append(resultado)
+    return resultados
+
+# Función que imprime cuántos juegos van, en la misma línea.
+def imprimirProgreso(completados, total):
+    print(f"\r  {completados}/{total} juegos", end="\n" if completados == total else "",
+          file=sys.stderr, flush=True)
+
+# Función equivalente a ejecutarMultiplesIteraciones con varios procesos.
+#   procesos:     cuántos procesos (None = uno por núcleo).
+#   tamanoBloque: juegos por envío (None = unos 4 bloques por proceso).
+#   semilla:      semilla base de la corrida (None = una al azar).
+#   reintentos:   veces que se vuelve a mandar un bloque que falló.
+#   progreso:     función (completados, total) que se llama al terminar cada bloque.
+#   comoArreglo:  regresa las filas en vez de la lista de diccionarios.
+#   cache:        CCacheResultados de donde se toman y donde se guardan los juegos.
+#   maxTurnos:    tope de turnos de cada juego (se pasa a runModel).
+def ejecutarEnParalelo(num_iteraciones, archivo_config, tipo_solucion, procesos=None, tamanoBloque=None,
+                       semilla=None, reintentos=2, progreso=None, comoArreglo=False, cache=None,
+                       maxTurnos=None):
+    if tipo_solucion not in CLASES_SOLUCION:
+        raise ValueError(f"Tipo de solución no válido: {tipo_solucion}")
+    procesos = procesos or os.cpu_count() or 1
+    if semilla is None:
+        semilla = np.random.SeedSequence().entropy
+
+    filas = np.zeros(num_iteraciones, dtype=TIPO_FILA)
+    faltan = np.arange(num_iteraciones)
+    if cache is not None:
+        huella = obtenerPlantilla(archivo_config).huella
+        modo = modoCache(tipo_solucion, maxTurnos)
+        semillas = [semillaIteracion(semilla, indice) for indice in range(num_iteraciones)]
+        guardados = cache.buscar(huella, modo, semillas)
+        for indice, semillaJuego in enumerate(semillas):
+            if semillaJuego in guardados:
+                llenarFila(filas[indice], guardados[semillaJuego])
+        faltan = np.array([indice for indice, semillaJuego in enumerate(semillas)
+                           if semillaJuego not in guardados], dtype=np.int64)
+
+    if tamanoBloque is None:
+        tamanoBloque = max(1, math.ceil(len(faltan) / (procesos * 4)))
+    # {(inicio, fin) dentro de faltan: veces que ha fallado}
+    pendientes = {(inicio, min(inicio + tamanoBloque, len(faltan))): 0
+                  for inicio in range(0, len(faltan), tamanoBloque)}
+    completados = num_iteraciones - len(faltan)
+    if progreso is not None and completados:
+        progreso(completados, num_iteraciones)
+
+    # Cada vuelta usa un grupo nuevo: si un proceso se cae, el grupo ya no sirve
+    # y todos sus bloques sin terminar se vuelven a mandar en la siguiente. Al
+    # caerse, todos los futuros sin terminar fallan juntos y el primero que avisa
+    # es el del bloque más antiguo que seguía en curso; solo a ese se le cuenta
+    # el intento, para que un bloque que tumba procesos no agote los reintentos
+    # de los que solo iban en la misma vuelta.
+    while pendientes:
+        with ProcessPoolExecutor(max_workers=min(procesos, len(pendientes)), mp_context=CONTEXTO_PROCESOS) as grupo:
+            futuros = {grupo.submit(jugarBloque, archivo_config, tipo_solucion, semilla,
+                                    faltan[inicio:fin], maxTurnos): (inicio, fin)
+                       for inicio, fin in pendientes}
+            for futuro in as_completed(futuros):
+                inicio, fin = bloque = futuros[futuro]
+                indices = faltan[inicio:fin]
+                try:
+                    filas[indices] = futuro.result()
+                except Exception as e:
+                    pendientes[bloque] += 1
+                    if pendientes[bloque] > reintentos:
+                        grupo.shutdown(cancel_futures=True)
+                        raise RuntimeError(f"Un bloque de {fin - inicio} juegos falló {pendientes[bloque]} veces") from e
+                    if isinstance(e, BrokenProcessPool):
+                        break
+                    continue
+
+                if cache is not None:
+                    cache.guardar(huella, modo,
+                                  zip((semillas[indice] for indice in indices), filasADiccionarios(filas[indices])))
+                del pendientes[bloque]
+                completados += fin - inicio
+                if progreso is not None:
+                    progreso(completados, num_iteraciones)
+
+    return filas if comoArreglo else filasADiccionarios(filas)
+
+if __name__ == "__main__":
+    numIteraciones = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    archivo = sys.argv[2] if len(sys.argv) > 2 else "txtxd.txt"
+    procesos = int(sys.argv[3]) if len(sys.argv) > 3 else None
+
+    for tipo, nombre in (("aleatoria", "ALEATORIA"), ("estrategica", "ESTRATÉGICA")):
+        inicio = time.perf_counter()
+        resultados = ejecutarEnParalelo(numIteraciones, archivo, tipo, procesos, semilla=0,
+                                        progreso=imprimirProgreso)
+        print(f"\n{numIteraciones} juegos en {time.perf_counter() - inicio:.2f} s")
+        analizarResultados(resultados, nombre)
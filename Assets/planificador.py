@@ -0,0 +1,118 @@
+# ======================================
+# ===== Planificador de Auto-Run =======
+# ======================================
+
+# Un solo hilo lleva un heap con el siguiente momento en que le toca un paso a
+# cada sesión con auto-run. El hilo solo despierta cuando a alguna sesión le
+# toca su paso (sin sesiones activas se queda dormido), y cada sesión puede
+# tener su propio intervalo, incluyendo 0 = "lo más rápido posible".
+
+import heapq
+import itertools
+import math
+import threading
+import time
+from functools import partial
+
+# Qué hacer cuando un paso tarda más que su intervalo.
+POLITICA_SALTAR = "saltar"        # Se brincan los pasos atrasados y se sigue en el siguiente intervalo.
+POLITICA_RECUPERAR = "recuperar"  # Se ejecutan los pasos atrasados seguidos hasta alcanzar el ritmo.
+
+class CPlanificador:
+    def __init__(self, maxRecuperacion=5):
+        # Máximo de intervalos atrasados que se recuperan antes de rendirse y reiniciar el ritmo.
+        self.maxRecuperacion = maxRecuperacion
+        self.condicion = threading.Condition()
+        self.heap = []  # (momento, secuencia, sesion, version)
+        self.secuencia = itertools.count()
+        # Sesiones programadas: {idSesion: (sesion, version)}. Una entrada del heap
+        # con otra versión es vieja y se ignora.
+        self.activas = {}
+        self.versiones = itertools.count()
+        self.hilo = threading.Thread(target=self.ejecutarCiclo, daemon=True, name="planificador")
+        self.hilo.start()
+
+    # Método que programa (o reprograma con su intervalo nuevo) el auto-run de una sesión.
+    def programar(self, sesion):
+        with self.condicion:
+            version = next(self.versiones)
+            self.activas[sesion.idSesion] = (sesion, version)
+            heapq.heappush(self.heap, (time.monotonic(), next(self.secuencia), sesion, version))
+            self.condicion.notify()
+
+    # Método que deja de programar pasos para una sesión.
+    def cancelar(self, idSesion):
+        with self.condicion:
+            self.activas.pop(idSesion, None)
+
+    # Método que indica si la entrada sigue vigente; si la sesión ya no tiene auto-run, la quita.
+    # Se debe llamar con la condición tomada.
+    def entradaVigente(self, sesion, version):
+        if self.activas.get(sesion.idSesion) != (sesion, version):
+            return False
+        if not sesion.autoRun:
+            del self.activas[sesion.idSesion]
+            return False
+        return True
+
+    # Método del hilo del planificador: espera a la siguiente sesión que le toca y le pide un paso.
+    def ejecutarCiclo(self):
+        while True:
+            with self.condicion:
+                while True:
+                    if not self.heap:
+                        self.condicion.wait()
+                        continue
+                    momento, _, sesion, version = self.heap[0]
+                    espera = momento - time.monotonic()
+                    if espera > 0:
+                        self.condicion.wait(espera)
+                        continue
+                    heapq.heappop(self.heap)
+                    if self.entradaVigente(sesion, version):
+                        break
+
+            # El paso corre en el hilo de la sesión; al terminar se programa el siguiente.
+            futuro = sesion.avanzar()
+            futuro.add_done_callback(partial(self.pasoTerminado, sesion, version, momento))
+
+    # Método que se llama cuando la sesión termina su paso.
+    def pasoTerminado(self, sesion, version, momento, futuro):
+        try:
+            avanzo = futuro.result()
+        except Exception:
+            avanzo = False
+
+        with self.condicion:
+            if not self.entradaVigente(sesion, version):
+                return
+            # Juego terminado o sesión cerrada: no hay más pasos que programar.
+            if not avanzo:
+                del self.activas[sesion.idSesion]
+                return
+            siguiente = self.siguienteMomento(sesion, momento)
+            heapq.heappush(self.heap, (siguiente, next(self.secuencia), sesion, version))
+            self.condicion.notify()
+
+    # Método que calcula cuándo le toca el siguiente paso a la sesión.
+    def siguienteMomento(self, sesion, momento):
+        intervalo = sesion.intervaloAutoRun
+        ahora = time.monotonic()
+        if intervalo <= 0:
+            return ahora
+
+        siguiente = momento + intervalo
+        if siguiente >= ahora:
+            return siguiente
+
+        # El paso se pasó de su intervalo.
+        if sesion.politicaAutoRun == POLITICA_RECUPERAR:
+            if ahora - siguiente <= intervalo * self.maxRecuperacion:
+                return siguiente
+            return ahora
+
+        atrasados = math.ceil((ahora - siguiente) / intervalo)
+        return siguiente + atrasados * intervalo
+
+    def __len__(self):
+        return len(self.activas)
@@ -0,0 +1,131 @@
+# ======================================
+# ======= Planos de Edificios ==========
+# ======================================
+
+# Genera planos sintéticos en el formato por secciones (cuartos iguales con una
+# puerta hacia cada cuarto vecino y una entrada en cada lado del edificio) y
+# mide cuánto tarda el motor con ellos. Sirve para probar tableros mucho más
+# grandes que el de 8 x 6.
+#
+#   python planos.py 200 200          mide un plano de 200 x 200
+#   python planos.py 200 200 plano.txt  además guarda el plano
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Función que genera, línea por línea, un plano de ancho x alto con cuartos de
+# tamanoCuarto x tamanoCuarto. Las puertas y las entradas no llevan pared.
+def generarPlano(ancho, alto, tamanoCuarto=6, fuegos=10, pois=3, semilla=None):
+    generador = random.Random(semilla)
+    ancho, alto = int(ancho), int(alto)
+
+    # Puertas: una a la mitad de cada pared entre dos cuartos (los cuartos del
+    # borde pueden quedar más chicos).
+    mitadesFilas = [(y + min(y + tamanoCuarto, alto) - 1) // 2 for y in range(0, alto, tamanoCuarto)]
+    mitadesColumnas = [(x + min(x + tamanoCuarto, ancho) - 1) // 2 for x in range(0, ancho, tamanoCuarto)]
+    puertas = []
+    for y in mitadesFilas:
+        for x in range(tamanoCuarto - 1, ancho - 1, tamanoCuarto):
+            puertas.append(((x, y), (x + 1, y)))
+    for x in mitadesColumnas:
+        for y in range(tamanoCuarto - 1, alto - 1, tamanoCuarto):
+            puertas.append(((x, y), (x, y + 1)))
+    entradas = [(ancho // 2, 0), (0, alto // 2), (ancho // 2, alto - 1), (ancho - 1, alto // 2)]
+
+    # Lados abiertos de cada celda: (x, y, dirección) con dirección en (arriba, izquierda, abajo, derecha).
+    abiertos = set()
+    for (x1, y1), (x2, y2) in puertas:
+        if y1 == y2:
+            abiertos.update({(x1, y1, 3), (x2, y2, 1)})
+        else:
+            abiertos.update({(x1, y1, 2), (x2, y2, 0)})
+    abiertos.update({(ancho // 2, 0, 0), (0, alto // 2, 1), (ancho // 2, alto - 1, 2), (ancho - 1, alto // 2, 3)})
+
+    yield f"[tablero] {ancho} {alto}"
+    for y in range(alto):
+        celdas = []
+        for x in range(ancho):
+            paredes = (y % tamanoCuarto == 0,
+                       x % tamanoCuarto == 0,
+                       y == alto - 1 or (y + 1) % tamanoCuarto == 0,
+                       x == ancho - 1 or (x + 1) % tamanoCuarto == 0)
+            celdas.append("".join("1" if pared and (x, y, d) not in abiertos else "0"
+                                  for d, pared in enumerate(paredes)))
+        yield " ".join(celdas)
+
+    celdas = generador.sample([(x, y) for y in range(alto) for x in range(ancho)
+                               if (x, y) not in entradas], fuegos + pois)
+    yield "[pois]"
+    for x, y in celdas[:pois]:
+        yield f"{y + 1} {x + 1} {generador.choice('vvf')}"
+    yield "[fuegos]"
+    for x, y in celdas[pois:]:
+        yield f"{y + 1} {x + 1}"
+    yield "[puertas]"
+    for (x1, y1), (x2, y2) in puertas:
+        yield f"{y1 + 1} {x1 + 1} {y2 + 1} {x2 + 1}"
+    yield "[entradas]"
+    for x, y in entradas:
+        yield f"{y + 1} {x + 1}"
+
+# Función que guarda un plano generado en un archivo.
+def escribirPlano(archivo, ancho, alto, **opciones):
+    with open(archivo, "w", encoding="utf-8") as f:
+        for linea in generarPlano(ancho, alto, **opciones):
+            f.write(linea + "\n")
+    return archivo
+
+# Función que mide el motor con un plano: leer la plantilla, construir modelos
+# y dar pasos. Regresa los tiempos en segundos.
+def medirPlano(archivo, turnos=100, clases=None, tablero=None):
+    import reto
+
+    if clases is None:
+        clases = (reto.CEstrategia, reto.CAleatorio, reto.CEstrategiaUnity)
+    if tablero is None:
+        tablero = reto.TABLERO_CONJUNTOS
+
+    resultados = {}
+    inicio = time.perf_counter()
+    plantilla = reto.obtenerPlantilla(archivo)
+    resultados["plantilla"] = time.perf_counter() - inicio
+    resultados["dimensiones"] = (plantilla.ancho, plantilla.alto)
+
+    for clase in clases:
+        inicio = time.perf_counter()
+        modelo = clase(archivo, tablero)
+        construccion = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        pasos = 0
+        while pasos < turnos and not modelo.juegoTerminado:
+            modelo.step()
+            pasos += 1
+        duracion = time.perf_counter() - inicio
+        resultados[clase.__name__] = {
+            "construccion": construccion,
+            "pasos": pasos,
+            "segundosPorPaso": duracion / pasos if pasos else 0.0
+        }
+    return resultados
+
+if __name__ == "__main__":
+    ancho = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    alto = int(sys.argv[2]) if len(sys.argv) > 2 else ancho
+    if len(sys.argv) > 3:
+        archivo = sys.argv[3]
+    else:
+        descriptor, archivo = tempfile.mkstemp(suffix=".txt", prefix="plano_")
+        os.close(descriptor)
+    escribirPlano(archivo, ancho, alto, semilla=0)
+
+    resultados = medirPlano(archivo)
+    print(f"Plano {ancho} x {alto}: {archivo}")
+    print(f"  plantilla: {resultados['plantilla'] * 1000:.1f} ms")
+    for nombre, datos in resultados.items():
+        if isinstance(datos, dict):
+            print(f"  {nombre}: construcción {datos['construccion'] * 1000:.1f} ms, "
+                  f"{datos['pasos']} pasos, {datos['segundosPorPaso'] * 1000:.2f} ms/paso")
@@ -0,0 +1,83 @@
+# ======================================
+# ======= Reserva de Modelos Listos ====
+# ======================================
+
+# Construir un modelo implica leer la configuración, armar el grid de Mesa,
+# colocar a los bomberos y capturar el estado inicial. La reserva mantiene
+# unos cuantos modelos ya construidos por (configuración, modo) y los repone
+# en un hilo aparte, así reiniciar una sesión solo cambia un modelo por otro.
+
+import threading
+from collections import deque
+
+class CReservaModelos:
+    def __init__(self, fabrica, tamano=2):
+        # fabrica(configuracion, modo) construye un modelo nuevo.
+        self.fabrica = fabrica
+        self.tamano = tamano
+        self.modelos = {}      # {(configuracion, modo): deque de modelos listos}
+        self.construyendo = {} # {(configuracion, modo): modelos en construcción}
+        self.aciertos = 0
+        self.fallos = 0
+        self.condicion = threading.Condition()
+        self.hilo = threading.Thread(target=self.rellenar, daemon=True, name="reserva-modelos")
+        self.hilo.start()
+
+    # Método que empieza a preparar modelos para una configuración y modo.
+    def precalentar(self, configuracion, modo):
+        with self.condicion:
+            self.modelos.setdefault((configuracion, modo), deque())
+            self.condicion.notify()
+
+    # Método que regresa un modelo listo; si no hay, lo construye en el momento.
+    def obtener(self, configuracion, modo):
+        llave = (configuracion, modo)
+        with self.condicion:
+            cola = self.modelos.setdefault(llave, deque())
+            modelo = cola.popleft() if cola else None
+            if modelo is not None:
+                self.aciertos += 1
+            else:
+                self.fallos += 1
+            self.condicion.notify()
+
+        if modelo is None:
+            modelo = self.fabrica(configuracion, modo)
+        return modelo
+
+    # Método que regresa la llave que necesita otro modelo, o None si todas están completas.
+    # Se debe llamar con la condición tomada.
+    def llavePendiente(self):
+        for llave, cola in self.modelos.items():
+            if len(cola) + self.construyendo.get(llave, 0) < self.tamano:
+                return llave
+        return None
+
+    # Método del hilo de la reserva: construye modelos mientras falten.
+    def rellenar(self):
+        while True:
+            with self.condicion:
+                llave = self.llavePendiente()
+                while llave is None:
+                    self.condicion.wait()
+                    llave = self.llavePendiente()
+                self.construyendo[llave] = self.construyendo.get(llave, 0) + 1
+
+            try:
+                modelo = self.fabrica(*llave)
+            except Exception:
+                modelo = None
+
+            with self.condicion:
+                self.construyendo[llave] -= 1
+                if modelo is not None:
+                    self.modelos[llave].append(modelo)
+                else:
+                    # Si la configuración no se puede cargar se deja de intentar;
+                    # obtener() construye en el momento y el error le llega al cliente.
+                    del self.modelos[llave]
+
+    # Método que regresa cuántos modelos hay listos por llave.
+    def disponibles(self):
+        with self.condicion:
+            return {llave: len(cola) for llave, cola in self.modelos.items()}
@@ -22,9 +22,6 @@ from mesa.time import RandomActivation
 # Haremos uso de ''DataCollector'' para obtener información de cada paso de la simulación.
 from mesa.datacollection import DataCollector
 
-# Haremos uso de ''batch_run'' para ejecutar varias simulaciones
-from mesa.batchrunner import batch_run
-
 # matplotlib lo usaremos crear una animación de cada uno de los pasos del modelo.
 #%matplotlib inline
 #import matplotlib
@@ -34,24 +31,34 @@ from mesa.batchrunner import batch_run
 #matplotlib.rcParams['animation.embed_limit'] = 2**128
 
 # Importamos los siguientes paquetes para el mejor manejo de valores numéricos.
+# Importar este módulo no debe jugar partidas ni cargar pandas, seaborn o Flask:
+# el análisis de resultados está en analisis.py y el servidor en servidor_flask.py.
 import numpy as np
-import pandas as pd
-import seaborn as sns
-import random
-sns.set()
-
-# Definimos otros paquetes que vamos a usar para medir el tiempo de ejecución de nuestro algoritmo.
-import time
-import datetime
 
 # Definimos los paquetes que vamos a usar para las estructuras de datos del modelo.
 from enum import Enum
 
-# Para el servidor en flask.
-from flask import Flask, jsonify, request
-from flask_cors import CORS
+# Para el historial de estados.
 import json
-import copy
+
+# Para guardar las plantillas del tablero ya procesadas.
+import hashlib
+import os
+import threading
+from types import MappingProxyType
+
+# Para la búsqueda de rutas y los campos de distancias de los bomberos.
+import heapq
+from collections import deque
+from functools import lru_cache
+
+# Versión de las reglas del motor. Una corrida queda determinada por la plantilla,
+# el modo, la semilla y esta versión; se sube cuando cambian las reglas o el orden
+# en que se usa el generador, para no reusar resultados guardados de otra versión.
+VERSION_MOTOR = 5
+
+# Resultado de un juego que runModel corta por el tope de turnos.
+RESULTADO_TOPE_TURNOS = "Tope de turnos"
 
 # ======================================
 # ========== Clases Bomberos ===========
@@ -105,6 +112,12 @@ class CBombero(Agent):
         self.llevandoVictima = False
         self.path = []
         self.modo = CModoAgente.ESTRATEGIA
+        # Ruta guardada hacia el objetivo: costo de cada paso, objetivo, posición
+        # desde la que sigue y versión de las puertas con la que se calculó.
+        self.costosRuta = []
+        self.objetivoRuta = None
+        self.inicioRuta = None
+        self.versionRuta = None
 
     # Método que cambia el modo del agente.
     def cambiarModo(self, nuevoModo):
@@ -112,6 +125,7 @@ class CBombero(Agent):
         # Resetear estado cuando cambia el modo.
         self.estadoBombero = CEstadoBombero.AFK
         self.posicionObjetivo = None
+        self.path = []
 
 # Método que reinicia los puntos de acción al inicio del turno.
     def recargarPuntosAccion(self):
@@ -138,9 +152,7 @@ class CBombero(Agent):
         posicionActual = self.pos
 
         # Obtener posiciones adyacentes válidas.
-        posicionesAdyacentes = self.model.grid.get_neighborhood(
-            posicionActual, moore=False, include_center=False
-        )
+        posicionesAdyacentes = self.model.adyacentes[posicionActual]
 
         posicionesValidas = []
         for pos in posicionesAdyacentes:
@@ -148,9 +160,8 @@ class CBombero(Agent):
                 posicionesValidas.append(pos)
 
         if posicionesValidas:
-            # Seleccionar posición aleatoria.
-            import random
-            nuevaPosicion = random.choice(posicionesValidas)
+            # Seleccionar posición aleatoria con el generador del modelo.
+            nuevaPosicion = self.model.random.choice(posicionesValidas)
             costo = self.obtenerCostoMovimiento(nuevaPosicion)
 
             if self.puntosAccion >= costo:
@@ -162,41 +173,127 @@ class CBombero(Agent):
 
         return False
 
-# Función que mueve el agente hacia un objetivo usando la distancia
-# de Manhattan (pathfinding).
+# Método que calcula la ruta más barata hasta el objetivo (A* con la distancia de
+# Manhattan, que nunca sobreestima porque cada paso cuesta al menos 1). Respeta
+# las paredes, que son del plano y se conocen desde el inicio; las celdas sin
+# descubrir se pueden cruzar porque el bombero descubre sus vecinas antes de cada
+# paso. Cada paso cuesta lo que indica obtenerCostoMovimiento, más 1 si hay que
+# abrir una puerta cerrada para darlo (moverseAlObjetivo la abre al pasar).
+# Regresa las posiciones a recorrer sin la actual, o None si no hay ruta.
+    def calcularRuta(self, posicionObjetivo):
+        inicio = self.pos
+        ox, oy = posicionObjetivo
+        pasos = self.model.plantilla.pasos
+        cerradas = self.model.puertasCerradas
+        obtenerCosto = self.obtenerCostoMovimiento
+
+        costos = {inicio: 0}
+        anteriores = {}
+        costosPaso = {}  # {celda: costo de entrar}
+        pendientes = [(abs(inicio[0] - ox) + abs(inicio[1] - oy), 0, inicio)]
+
+        while pendientes:
+            _, costo, posicion = heapq.heappop(pendientes)
+            if posicion == posicionObjetivo:
+                break
+            if costo > costos[posicion]:
+                continue
+            for vecino, puerta in pasos[posicion]:
+                costoPaso = costosPaso.get(vecino)
+                if costoPaso is None:
+                    costoPaso = costosPaso[vecino] = obtenerCosto(vecino)
+                if puerta and all(celda in cerradas for celda in puerta):
+                    costoPaso += 1
+                nuevoCosto = costo + costoPaso
+                if nuevoCosto < costos.get(vecino, float('inf')):
+                    costos[vecino] = nuevoCosto
+                    anteriores[vecino] = posicion
+                    estimado = nuevoCosto + abs(vecino[0] - ox) + abs(vecino[1] - oy)
+                    heapq.heappush(pendientes, (estimado, nuevoCosto, vecino))
+        else:
+            return None
+
+        ruta = []
+        posicion = posicionObjetivo
+        while posicion != inicio:
+            ruta.append(posicion)
+            posicion = anteriores[posicion]
+        ruta.reverse()
+        return ruta
+
+# Método que calcula y guarda la ruta hacia el objetivo (vacía si no hay).
+    def planearRuta(self, posicionObjetivo):
+        self.path = self.calcularRuta(posicionObjetivo) or []
+        self.costosRuta = [self.obtenerCostoMovimiento(pos) for pos in self.path]
+        self.objetivoRuta = posicionObjetivo
+        self.inicioRuta = self.pos
+        self.versionRuta = self.model.versionPuertas
+
+# Método que indica si la ruta guardada sigue sirviendo: mismo objetivo y posición,
+# no se ha abierto ninguna puerta y las celdas que faltan no cambiaron de humo o fuego.
+    def rutaVigente(self, posicionObjetivo):
+        if self.objetivoRuta != posicionObjetivo or not self.path:
+            return False
+        if self.inicioRuta != self.pos or self.versionRuta != self.model.versionPuertas:
+            return False
+        for pos, costo in zip(self.path, self.costosRuta):
+            if self.obtenerCostoMovimiento(pos) != costo:
+                return False
+        return True
+
+# Método que regresa el objetivo que encontró el bombero o, si no tiene ninguno
+# con ruta, la celda de piso sin descubrir más cercana, para ir a explorarla.
+    def elegirObjetivo(self, objetivo):
+        return objetivo or self.model.objetivoCercano("exploracion", self.pos)
+
+# Método que suelta el objetivo para que el bombero busque otro en su siguiente
+# turno. El que lleva una víctima sigue cargándola y vuelve a buscar entrada.
+    def soltarObjetivo(self):
+        self.posicionObjetivo = None
+        self.path = []
+        if self.estadoBombero != CEstadoBombero.LLEVANDO_VICTIMA:
+            self.estadoBombero = CEstadoBombero.AFK
+
+# Función que mueve el agente un paso hacia el objetivo siguiendo su ruta.
+# La ruta se calcula una vez y se reutiliza mientras siga vigente. Sin ruta el
+# agente no se mueve (nunca cruza paredes) y suelta el objetivo. Si el paso cruza
+# una puerta cerrada, la abre (1 punto de acción) y pasa en el mismo turno.
     def moverseAlObjetivo(self, posicionObjetivo):
-        if not posicionObjetivo or posicionObjetivo == self.pos:
+        if not posicionObjetivo:
             return True
 
         posicionActual = self.pos
 
-        # Descubrir celdas adyacentes al moverse
+        # Descubrir celdas adyacentes al moverse (también si el objetivo era la
+        # celda sin descubrir donde empezó, para no volver a elegirla).
         self.model.descubrirCeldasAdyacentesAlAgente(posicionActual)
+        if posicionObjetivo == posicionActual:
+            return True
 
-        dx = posicionObjetivo[0] - posicionActual[0]
-        dy = posicionObjetivo[1] - posicionActual[1]
-
-        nuevaX, nuevaY = posicionActual
-
-        if abs(dx) > abs(dy):
-            if dx != 0:
-                nuevaX += 1 if dx > 0 else -1
-            elif dy != 0:
-                nuevaY += 1 if dy > 0 else -1
-        else:
-            if dy != 0:
-                nuevaY += 1 if dy > 0 else -1
-            elif dx != 0:
-                nuevaX += 1 if dx > 0 else -1
+        if not self.rutaVigente(posicionObjetivo):
+            self.planearRuta(posicionObjetivo)
 
-        nuevaPosicion = (nuevaX, nuevaY)
+        if not self.path:
+            self.soltarObjetivo()
+            return False
+        nuevaPosicion = self.path[0]
 
         # Verificar si el movimiento se puede realizar.
         if self.puedeMoverseA(nuevaPosicion):
             costo = self.obtenerCostoMovimiento(nuevaPosicion)
+            puerta = self.model.puertaCerradaEntre(posicionActual, nuevaPosicion)
+            if puerta is not None:
+                costo += 1
             if self.puntosAccion >= costo:
+                if puerta is not None:
+                    # Abrir la puerta no invalida la ruta propia, que ya contaba con ella.
+                    self.model.abrirPuerta(puerta)
+                    self.versionRuta = self.model.versionPuertas
                 self.model.grid.move_agent(self, nuevaPosicion)
                 self.puntosAccion -= costo
+                self.path.pop(0)
+                self.costosRuta.pop(0)
+                self.inicioRuta = nuevaPosicion
                 # Descubrir celdas adyacentes en la nueva posición.
                 self.model.descubrirCeldasAdyacentesAlAgente(nuevaPosicion)
                 return nuevaPosicion == posicionObjetivo
@@ -216,25 +313,9 @@ class CApagafuegos(CBombero):
 
 # Método para encontrar el fuego más cercano en las zonas descubiertas.
     def encontrarFuegoCercano(self):
-        posicionesFuego = []
-        for pos in self.model.obtenerPosicionesFuego():
-            if self.model.esCeldaDescubierta(pos):
-                posicionesFuego.append(pos)
-
-        if not posicionesFuego:
-            return None
-
-        posicionActual = self.pos
-        distanciaMinima = float('inf')
-        fuegoCercano = None
-
-        for posicionFuego in posicionesFuego:
-            distancia = abs(posicionFuego[0] - posicionActual[0]) + abs(posicionFuego[1] - posicionActual[1])
-            if distancia < distanciaMinima:
-                distanciaMinima = distancia
-                fuegoCercano = posicionFuego
-
-        return fuegoCercano
+        # El modelo lleva un campo de distancias por tipo de objetivo, así que
+        # buscar el más cercano es una sola consulta.
+        return self.model.objetivoCercano("fuego", self.pos)
 
 # Método para apagar el fuego en la posición actual o adyacente.
     def apagarFuego(self):
@@ -247,7 +328,7 @@ class CApagafuegos(CBombero):
             return True
 
         # Obtener posiciones adyacentes.
-        posicionesAdyacentes = self.model.grid.get_neighborhood(posicionActual, moore=False, include_center=False)
+        posicionesAdyacentes = self.model.adyacentes[posicionActual]
 
         for posicionAdyacente in posicionesAdyacentes:
             if (self.model.esPosicionValida(posicionAdyacente) and
@@ -279,7 +360,7 @@ class CApagafuegos(CBombero):
 
             # Buscar el fuego más cercano y cambiar el estado del agente.
             if self.estadoBombero == CEstadoBombero.AFK:
-                fuegoCercano = self.encontrarFuegoCercano()
+                fuegoCercano = self.elegirObjetivo(self.encontrarFuegoCercano())
                 if fuegoCercano:
                     self.posicionObjetivo = fuegoCercano
                     self.estadoBombero = CEstadoBombero.MOVIENDOSE_AL_OBJETIVO
@@ -297,25 +378,7 @@ class CBuscador(CBombero):
 
 # Método para encontrar el Poi más cercano.
     def encontrarPoiCercano(self):
-        posicionesPoi = []
-        for pos in self.model.obtenerPosicionesPoi():
-            if self.model.esCeldaDescubierta(pos):
-                posicionesPoi.append(pos)
-
-        if not posicionesPoi:
-            return None
-
-        posicionActual = self.pos
-        distanciaMinima = float('inf')
-        poiCercano = None
-
-        for posicionPoi in posicionesPoi:
-            distancia = abs(posicionPoi[0] - posicionActual[0]) + abs(posicionPoi[1] - posicionActual[1])
-            if distancia < distanciaMinima:
-                distanciaMinima = distancia
-                poiCercano = posicionPoi
-
-        return poiCercano
+        return self.model.objetivoCercano("pois", self.pos)
 
 # Método para buscar y revelar el POI en la posición actual.
     def buscarPoi(self):
@@ -354,7 +417,7 @@ class CBuscador(CBombero):
 
             # Buscar el POI más cercano y cambiar estado del agente.
             if self.estadoBombero == CEstadoBombero.AFK:
-                poiCercano = self.encontrarPoiCercano()
+                poiCercano = self.elegirObjetivo(self.encontrarPoiCercano())
                 if poiCercano:
                     self.posicionObjetivo = poiCercano
                     self.estadoBombero = CEstadoBombero.MOVIENDOSE_AL_OBJETIVO
@@ -367,26 +430,12 @@ class CBuscador(CBombero):
 
 # Clase Salvador - Recoge víctimas encontradas y las lleva a la zona de rescate.
 class CSalvador(CBombero):
-    def __init__(self, idBombero, model):
-        super().__init__(idBombero, model, CTipoBombero.SALVADOR)
+    def __init__(self, idBombero, model, tipoBombero=CTipoBombero.SALVADOR):
+        super().__init__(idBombero, model, tipoBombero)
 
 # Método que busca a la víctima encontrada más cercana.
     def buscarVictimaEncontradaCercana(self):
-        victimasEncontradas = self.model.obtenerPosicionesVictimaEncontrada()
-        if not victimasEncontradas:
-            return None
-
-        posicionActual = self.pos
-        distanciaMinima = float('inf')
-        victimaCercana = None
-
-        for posicionVictima in victimasEncontradas:
-            distancia = abs(posicionVictima[0] - posicionActual[0]) + abs(posicionVictima[1] - posicionActual[1])
-            if distancia < distanciaMinima:
-                distanciaMinima = distancia
-                victimaCercana = posicionVictima
-
-        return victimaCercana
+        return self.model.objetivoCercano("victimas", self.pos)
 
 # Método que recoge a la victima de la posición actual.
     def recogerVictima(self):
@@ -403,6 +452,18 @@ class CSalvador(CBombero):
             return True
         return False
 
+# Método que mueve al salvador hacia el objetivo con todos sus puntos de acción
+# (como el especialista en rescate de Flash Point): sigue avanzando por su ruta
+# mientras le alcancen los puntos y no haya llegado. Regresa si llegó.
+    def moverseAlObjetivo(self, posicionObjetivo):
+        llego = super().moverseAlObjetivo(posicionObjetivo)
+        while not llego and self.puntosAccion > 0 and self.path and self.inicioRuta == self.pos:
+            posicionAnterior = self.pos
+            llego = super().moverseAlObjetivo(posicionObjetivo)
+            if self.pos == posicionAnterior:
+                break
+        return llego
+
 # Método para entregar la victima en la zona de rescate.
     def entregarVictima(self):
         posicionActual = self.pos
@@ -442,12 +503,15 @@ class CSalvador(CBombero):
 
             # Si el agente está cargando una víctima, moverse a la salida más cercana.
             if self.llevandoVictima and self.estadoBombero == CEstadoBombero.LLEVANDO_VICTIMA:
+                if not self.posicionObjetivo:
+                    # Ninguna entrada tenía ruta al recogerla; se vuelve a buscar.
+                    self.posicionObjetivo = self.model.obtenerEntradaCercana(self.pos)
                 if self.posicionObjetivo and self.moverseAlObjetivo(self.posicionObjetivo):
                     self.entregarVictima()
 
             # Buscar víctimas encontradas y cambiar estado del agente.
             elif self.estadoBombero == CEstadoBombero.AFK and not self.llevandoVictima:
-                victimaCercana = self.buscarVictimaEncontradaCercana()
+                victimaCercana = self.elegirObjetivo(self.buscarVictimaEncontradaCercana())
                 if victimaCercana:
                     self.posicionObjetivo = victimaCercana
                     self.estadoBombero = CEstadoBombero.MOVIENDOSE_AL_OBJETIVO
@@ -458,35 +522,13 @@ class CSalvador(CBombero):
                     self.estadoBombero = CEstadoBombero.AFK
                     self.posicionObjetivo = None
 
-# Clase Abre Puertas - Descubre nuevas zonas abriendo puertas.
-class CAbrePuertas(CBombero):
+# Clase Abre Puertas - Descubre nuevas zonas abriendo puertas. En modo estrategia
+# cualquier bombero abre las puertas de su ruta, así que este ayuda al salvador:
+# abre la puerta donde está y, si no hay, rescata víctimas como él.
+class CAbrePuertas(CSalvador):
     def __init__(self, idBombero, model):
         super().__init__(idBombero, model, CTipoBombero.ABRE_PUERTAS)
 
-# Método para encontrar la puerta cerrada más cercana.
-    def encontrarPuertaCerradaCercana(self):
-        puertasCerradas = []
-        for pos in self.model.obtenerPosicionesPuertaCerrada():
-            # Solo buscar puertas en zonas descubiertas o adyacentes a zonas descubiertas.
-            if (self.model.esCeldaDescubierta(pos) or
-                self.model.tieneCeldaAdyacenteDescubierta(pos)):
-                puertasCerradas.append(pos)
-
-        if not puertasCerradas:
-            return None
-
-        posicionActual = self.pos
-        distanciaMinima = float('inf')
-        puertaCercana = None
-
-        for posicionPuerta in puertasCerradas:
-            distancia = abs(posicionPuerta[0] - posicionActual[0]) + abs(posicionPuerta[1] - posicionActual[1])
-            if distancia < distanciaMinima:
-                distanciaMinima = distancia
-                puertaCercana = posicionPuerta
-
-        return puertaCercana
-
 # Método para abrir la puerta de la posición actual.
     def abrirPuerta(self):
         posicionActual = self.pos
@@ -504,32 +546,18 @@ class CAbrePuertas(CBombero):
         if self.puntosAccion <= 0:
             return
 
+        # Si el agente está en una puerta cerrada, abrirla.
+        if self.abrirPuerta():
+            return
+
         # Comportamiento según el modo.
         if self.modo == CModoAgente.ALEATORIO:
-            # Si el agente está en una puerta cerrada, abrirla.
-            if self.abrirPuerta():
-                return
-
             # Moverse aleatoriamente.
             self.movimientoAleatorio()
 
         elif self.modo == CModoAgente.ESTRATEGIA:
-            # Si el agente está en una puerta cerrada, abrirla.
-            if self.abrirPuerta():
-                return
-
-            # Buscar puerta cerrada más cercana y cambiar estado.
-            if self.estadoBombero == CEstadoBombero.AFK:
-                puertaCercana = self.encontrarPuertaCerradaCercana()
-                if puertaCercana:
-                    self.posicionObjetivo = puertaCercana
-                    self.estadoBombero = CEstadoBombero.MOVIENDOSE_AL_OBJETIVO
-
-            # Mover el agente hacia objetivo.
-            if self.estadoBombero == CEstadoBombero.MOVIENDOSE_AL_OBJETIVO and self.posicionObjetivo:
-                if self.moverseAlObjetivo(self.posicionObjetivo):
-                    self.estadoBombero = CEstadoBombero.AFK
-                    self.posicionObjetivo = None
+            # Recoger y llevar víctimas igual que el salvador.
+            super().step()
 
 # Función para crear el dream team de bomberos.
 def crearBomberos(model, modo=CModoAgente.ESTRATEGIA):
@@ -569,18 +597,561 @@ def cambiarModoBomberos(bomberos, nuevoModo):
     for bombero in bomberos:
         bombero.cambiarModo(nuevoModo)
 
+# ======================================
+# ======== Plantilla del Tablero =======
+# ======================================
+
+# Índice en (arriba, izquierda, abajo, derecha) de cada dirección de movimiento (dx, dy).
+DIRECCIONES = {(0, -1): 0, (-1, 0): 1, (0, 1): 2, (1, 0): 3}
+
+# Función que da la llave para ordenar celdas por filas, el mismo orden de su
+# índice en la plantilla (y * ancho + x). Las fuentes de los campos de
+# distancias se ordenan con ella, así que un empate no depende del orden en que
+# un conjunto guarda sus posiciones.
+def ordenCelda(posicion):
+    return posicion[1], posicion[0]
+
+# Función que calcula la distancia en pasos desde varias fuentes a la vez (BFS).
+# Regresa {celda: (pasos, fuente más cercana)}; vecinosDe(celda) da las celdas
+# a las que se puede pasar desde ella.
+# En un empate gana la fuente que viene primero, igual que al recorrer las
+# fuentes en orden y quedarse con la primera de distancia mínima.
+def calcularCampoDistancias(fuentes, vecinosDe):
+    campo = {}
+    cola = deque()
+    for fuente in fuentes:
+        if fuente not in campo:
+            campo[fuente] = (0, fuente)
+            cola.append(fuente)
+
+    while cola:
+        celda = cola.popleft()
+        distancia, fuente = campo[celda]
+        for vecino in vecinosDe(celda):
+            if vecino not in campo:
+                campo[vecino] = (distancia + 1, fuente)
+                cola.append(vecino)
+    return campo
+
+# Dimensiones del tablero cuando no se pudo leer la configuración.
+ANCHO_POR_DEFECTO = 8
+ALTO_POR_DEFECTO = 6
+
+# Secciones del formato anterior (sin encabezados): después de las filas del
+# tablero vienen estas líneas, en este orden y en esta cantidad.
+SECCIONES_FORMATO_ANTERIOR = (("pois", 3), ("fuegos", 10), ("puertas", 8), ("entradas", 4))
+
+# Tableros de hasta este número de celdas guardan la máscara de bits de cada celda.
+MAX_CELDAS_MASCARAS = 4096
+
+# Función que regresa las palabras de la siguiente línea, o None si ya no hay.
+# Con saltarVacias se brincan las líneas vacías y los comentarios.
+def siguientesDatos(lineas, saltarVacias=False):
+    for linea in lineas:
+        datos = linea.split()
+        if not saltarVacias or (datos and not datos[0].startswith("#")):
+            return datos
+    return None
+
+# Función que convierte el texto de una celda ("1100") en sus paredes
+# (arriba, izquierda, abajo, derecha) y si es piso. Solo hay 16 combinaciones,
+# así que todas las celdas iguales comparten la misma tupla.
+@lru_cache(maxsize=None)
+def leerCelda(texto):
+    paredesCelda = tuple(int(d) for d in texto)
+    return paredesCelda, not all(p == 1 for p in paredesCelda)
+
+# Función que indica si las palabras de una línea forman una fila del tablero.
+def esFilaTablero(datos):
+    return bool(datos) and all(len(celda) == 4 and celda.isdigit() for celda in datos)
+
+# Función que arma una máscara con los bits dados en un solo paso (sumar los
+# bits uno por uno es cuadrático en tableros grandes).
+def mascaraDeIndices(indices, totalBits):
+    if totalBits == 0:
+        return 0
+    digitos = bytearray(b"0" * totalBits)
+    for i in indices:
+        digitos[totalBits - 1 - i] = ord("1")
+    return int(digitos, 2)
+
+# Máscaras de las celdas que se calculan al pedirlas, para tableros grandes.
+class CMascarasCeldas:
+    def __init__(self, indices):
+        self.indices = indices
+
+    def __getitem__(self, posicion):
+        return 1 << self.indices[posicion]
+
+    def get(self, posicion, default=None):
+        indice = self.indices.get(posicion)
+        return default if indice is None else 1 << indice
+
+# La plantilla guarda todo lo que no cambia durante una partida: paredes, piso,
+# dirección de las puertas, entradas y las celdas vecinas de cada celda. Se
+# procesa una sola vez por archivo y contenido, y todos los modelos que usan
+# ese archivo la comparten. Las posiciones iniciales de fuego, POIs y puertas
+# también se guardan aquí, pero cada modelo hace su propia copia para jugar.
+
+class CPlantillaTablero:
+    def __init__(self, lineas, ancho=None, alto=None, huella=None):
+        # Si no se dan, las dimensiones salen del archivo.
+        self.ancho = ancho
+        self.alto = alto
+        # Hash del contenido del archivo (None si no salió de uno).
+        self.huella = huella
+
+        self.paredes = {}
+        self.gridPiso = {}
+        self.poisIniciales = {}
+        self.fuegosIniciales = {}
+        self.puertasIniciales = {}
+        self.puertaDirs = {}
+        self.entradas = set()
+
+        try:
+            self.leer(lineas)
+        except Exception as e:
+            print(f"Error cargando configuración: {e}")
+
+        if self.ancho is None or self.alto is None:
+            self.ancho, self.alto = ANCHO_POR_DEFECTO, ALTO_POR_DEFECTO
+        ancho, alto = self.ancho, self.alto
+        paredes = self.paredes
+        puertaDirs = self.puertaDirs
+
+        # Todo se guarda en estructuras de solo lectura.
+        self.paredes = MappingProxyType(paredes)  # {(x, y): (arriba, izquierda, abajo, derecha)}
+        self.gridPiso = MappingProxyType(self.gridPiso)  # {(x, y): True/False} - True = piso, False = pared
+        self.puertaDirs = MappingProxyType(puertaDirs)  # {(x,y): dir}
+        self.entradas = frozenset(self.entradas)
+        # Fuegos y puertas iniciales en el orden del archivo, para que cada modelo
+        # arme sus conjuntos igual que si leyera el archivo.
+        self.poisIniciales = MappingProxyType(self.poisIniciales)
+        self.fuegosIniciales = tuple(self.fuegosIniciales)
+        self.puertasIniciales = tuple(self.puertasIniciales)
+
+        # Índice de bit de cada celda (por filas) y máscaras para el tablero de bits.
+        self.posiciones = tuple((x, y) for y in range(alto) for x in range(ancho))
+        self.indices = MappingProxyType({pos: i for i, pos in enumerate(self.posiciones)})
+        # En tableros grandes no se guardan las máscaras de cada celda: cada una mide
+        # tantos bits como el tablero y juntas ocuparían memoria cuadrática.
+        if ancho * alto <= MAX_CELDAS_MASCARAS:
+            self.mascaras = MappingProxyType({pos: 1 << i for i, pos in enumerate(self.posiciones)})
+        else:
+            self.mascaras = CMascarasCeldas(self.indices)
+        totalCeldas = ancho * alto
+        self.mascaraTablero = (1 << totalCeldas) - 1
+        columnaInicial = mascaraDeIndices((y * ancho for y in range(alto)), totalCeldas)
+        self.mascaraSinPrimeraColumna = self.mascaraTablero & ~columnaInicial
+        self.mascaraSinUltimaColumna = self.mascaraTablero & ~(columnaInicial << (ancho - 1))
+        # Celdas donde puede empezar una línea horizontal de tres (x <= ancho - 3).
+        self.mascaraInicioTresHorizontal = mascaraDeIndices(
+            (y * ancho + x for y in range(alto) for x in range(ancho - 2)), totalCeldas)
+        self.pisoBits = mascaraDeIndices(
+            (self.indices[pos] for pos, esPiso in self.gridPiso.items() if esPiso), totalCeldas)
+        self.paredesEmpacadas = CParedesEmpacadas(self, paredes)
+
+        # Todas las líneas de tres celdas seguidas (horizontales y verticales)
+        # y las líneas que pasan por cada celda.
+        lineas = [tuple((x + i, y) for i in range(3)) for y in range(alto) for x in range(ancho - 2)]
+        lineas += [tuple((x, y + i) for i in range(3)) for x in range(ancho) for y in range(alto - 2)]
+        self.lineas = tuple(lineas)
+        lineasPorCelda = {pos: [] for pos in self.posiciones}
+        for linea in self.lineas:
+            for celda in linea:
+                lineasPorCelda[celda].append(linea)
+        self.lineasPorCelda = MappingProxyType({pos: tuple(l) for pos, l in lineasPorCelda.items()})
+
+        # Celdas vecinas (sin diagonales) de cada celda, en el mismo orden que
+        # regresa get_neighborhood de Mesa para que las elecciones aleatorias no cambien:
+        # izquierda, arriba, abajo, derecha.
+        self.adyacentes = MappingProxyType({
+            (x, y): tuple((vx, vy) for vx, vy in ((x - 1, y), (x, y - 1), (x, y + 1), (x + 1, y))
+                          if 0 <= vx < ancho and 0 <= vy < alto)
+            for x in range(ancho) for y in range(alto)
+        })
+
+        # Pasos posibles desde cada celda: vecinos a los que no los separa una pared,
+        # en el orden de adyacentes. Cada paso lleva las celdas de la puerta que hay
+        # entre las dos (vacío si no hay puerta); las paredes con puerta no se marcan
+        # en el archivo, así que la puerta es lo único que puede cerrar el paso.
+        pasos = {}
+        for pos, vecinos in self.adyacentes.items():
+            pasosCelda = []
+            for vecino in vecinos:
+                direccion = DIRECCIONES[(vecino[0] - pos[0], vecino[1] - pos[1])]
+                opuesta = (direccion + 2) % 4
+                if paredes.get(pos, (0, 0, 0, 0))[direccion] == 1 or paredes.get(vecino, (0, 0, 0, 0))[opuesta] == 1:
+                    continue
+                puerta = tuple(celda for celda, d in ((pos, direccion), (vecino, opuesta))
+                               if puertaDirs.get(celda) == d)
+                pasosCelda.append((vecino, puerta))
+            pasos[pos] = tuple(pasosCelda)
+        self.pasos = MappingProxyType(pasos)
+        # Los mismos pasos separados en los que no tienen puerta y los que sí.
+        self.pasosSinPuerta = MappingProxyType({pos: tuple(v for v, puerta in p if not puerta)
+                                                for pos, p in pasos.items()})
+        self.pasosConPuerta = MappingProxyType({pos: tuple((v, puerta) for v, puerta in p if puerta)
+                                                for pos, p in pasos.items()})
+        # Vecinos a los que se puede pasar sin cruzar una pared; las puertas no
+        # cuentan porque cualquier bombero las abre al pasar.
+        self.vecinosPaso = MappingProxyType({pos: tuple(v for v, puerta in p) for pos, p in pasos.items()})
+
+    # Método que lee el archivo línea por línea (sin cargarlo completo). Si la
+    # primera línea es un encabezado [seccion] se usa el formato por secciones;
+    # si no, el formato anterior de tamaño fijo.
+    def leer(self, lineas):
+        lineas = iter(lineas)
+        datos = siguientesDatos(lineas, saltarVacias=True)
+        if datos is None:
+            return
+        if datos[0].startswith("["):
+            self.leerSecciones(datos, lineas)
+        else:
+            self.leerFormatoAnterior(datos, lineas)
+
+    # Formato por secciones:
+    #   [tablero] ancho alto
+    #   alto filas de ancho celdas (arriba, izquierda, abajo, derecha)
+    #   [pois]      fila columna v|f
+    #   [fuegos]    fila columna
+    #   [puertas]   fila1 columna1 fila2 columna2
+    #   [entradas]  fila columna
+    # Filas y columnas empiezan en 1, cada sección lleva las líneas que necesite,
+    # las líneas vacías y las que empiezan con # se ignoran, y [tablero] va primero.
+    def leerSecciones(self, datos, lineas):
+        seccion = None
+        y = 0
+        while datos is not None:
+            if not datos or datos[0].startswith("#"):
+                pass
+            elif datos[0].startswith("["):
+                seccion = datos[0].strip("[]").lower()
+                if seccion == "tablero":
+                    self.ancho, self.alto = int(datos[1]), int(datos[2])
+            elif seccion == "tablero":
+                if y < self.alto:
+                    self.leerFila(y, datos)
+                    y += 1
+            elif seccion is not None:
+                self.leerElemento(seccion, datos)
+            datos = siguientesDatos(lineas)
+
+    # Formato anterior: filas del tablero (el ancho es el de la primera fila y el
+    # alto las filas que haya) y luego un número fijo de líneas por sección.
+    def leerFormatoAnterior(self, datos, lineas):
+        if self.ancho is None:
+            self.ancho = len(datos)
+        y = 0
+        while datos is not None and esFilaTablero(datos) and (self.alto is None or y < self.alto):
+            self.leerFila(y, datos)
+            y += 1
+            datos = siguientesDatos(lineas)
+        self.alto = y
+
+        for seccion, cantidad in SECCIONES_FORMATO_ANTERIOR:
+            for i in range(cantidad):
+                if datos is None:
+                    return
+                self.leerElemento(seccion, datos)
+                datos = siguientesDatos(lineas)
+
+    # Método que lee las paredes de una fila del tablero.
+    def leerFila(self, y, fila):
+        for x in range(self.ancho):
+            self.paredes[(x, y)], self.gridPiso[(x, y)] = leerCelda(fila[x])
+
+    # Método que verifica si la fila y columna (empezando en 0) están en el tablero.
+    def estaEnTablero(self, fila, col):
+        return 0 <= fila < self.alto and 0 <= col < self.ancho
+
+    # Método que lee una línea de POI, fuego, puerta o entrada.
+    def leerElemento(self, seccion, datos):
+        if seccion == "pois":
+            if len(datos) >= 3:
+                fila, col, tipo = int(datos[0])-1, int(datos[1])-1, datos[2]
+                if self.estaEnTablero(fila, col):
+                    self.poisIniciales[(col, fila)] = "victima" if tipo == "v" else "falsa_alarma"
+
+        elif seccion == "fuegos":
+            if len(datos) >= 2:
+                fila, col = int(datos[0])-1, int(datos[1])-1
+                if self.estaEnTablero(fila, col):
+                    self.fuegosIniciales[(col, fila)] = True
+
+        elif seccion == "puertas":
+            if len(datos) >= 4:
+                r1, c1, r2, c2 = int(datos[0])-1, int(datos[1])-1, int(datos[2])-1, int(datos[3])-1
+                if self.estaEnTablero(r1, c1) and self.estaEnTablero(r2, c2):
+
+                    # Detectar dirección según diferencia entre celdas
+                    if r1 == r2:  # horizontal
+                        if c1 < c2:
+                            self.puertasIniciales[(c1, r1)] = True
+                            self.puertaDirs[(c1, r1)] = 3  # derecha
+                            self.puertasIniciales[(c2, r2)] = True
+                            self.puertaDirs[(c2, r2)] = 1  # izquierda
+                    elif c1 == c2:  # vertical
+                        if r1 < r2:
+                            self.puertasIniciales[(c1, r1)] = True
+                            self.puertaDirs[(c1, r1)] = 2  # abajo
+                            self.puertasIniciales[(c2, r2)] = True
+                            self.puertaDirs[(c2, r2)] = 0  # arriba
+
+        elif seccion == "entradas":
+            if len(datos) >= 2:
+                fila, col = int(datos[0])-1, int(datos[1])-1
+                if self.estaEnTablero(fila, col):
+                    self.entradas.add((col, fila))
+
+# ======================================
+# ========= Tablero de Bits ============
+# ======================================
+
+# Representaciones del tablero que puede usar CJuego.
+TABLERO_CONJUNTOS = "conjuntos"  # Conjuntos y diccionarios de tuplas (x, y).
+TABLERO_BITS = "bits"            # Un entero por capa, un bit por celda.
+
+# Capa del tablero guardada como máscara de bits (bit y * ancho + x). Se comporta
+# como un conjunto de posiciones, así que el resto del modelo la usa igual; además
+# permite operar la capa completa (unión, vecinos, conteo) con operaciones de enteros.
+# Se recorre siempre por filas, de arriba a abajo.
+class CCapaBits:
+    def __init__(self, plantilla, bits=0):
+        self.plantilla = plantilla
+        self.bits = bits
+
+    def __contains__(self, posicion):
+        return self.bits & self.plantilla.mascaras.get(posicion, 0) != 0
+
+    def add(self, posicion):
+        self.bits |= self.plantilla.mascaras[posicion]
+
+    def discard(self, posicion):
+        self.bits &= ~self.plantilla.mascaras.get(posicion, 0)
+
+    def remove(self, posicion):
+        if posicion not in self:
+            raise KeyError(posicion)
+        self.discard(posicion)
+
+    def update(self, posiciones):
+        for posicion in posiciones:
+            self.add(posicion)
+
+    def clear(self):
+        self.bits = 0
+
+    def __len__(self):
+        return self.bits.bit_count()
+
+    def __bool__(self):
+        return self.bits != 0
+
+    def __iter__(self):
+        posiciones = self.plantilla.posiciones
+        bits = self.bits
+        while bits:
+            menor = bits & -bits
+            yield posiciones[menor.bit_length() - 1]
+            bits ^= menor
+
+    def __or__(self, otra):
+        return CCapaBits(self.plantilla, self.bits | otra.bits)
+
+    def __and__(self, otra):
+        return CCapaBits(self.plantilla, self.bits & otra.bits)
+
+    def __sub__(self, otra):
+        return CCapaBits(self.plantilla, self.bits & ~otra.bits)
+
+    # Método que regresa las celdas vecinas (sin diagonales) de todas las celdas de la capa.
+    def vecinos(self):
+        bits = self.bits
+        plantilla = self.plantilla
+        ancho = plantilla.ancho
+        return CCapaBits(plantilla, (((bits << 1) & plantilla.mascaraSinPrimeraColumna) |
+                                     ((bits >> 1) & plantilla.mascaraSinUltimaColumna) |
+                                     (bits << ancho) | (bits >> ancho)) & plantilla.mascaraTablero)
+
+    # Método que indica si hay tres celdas seguidas en una fila o en una columna.
+    def tieneTresEnLinea(self):
+        bits = self.bits
+        ancho = self.plantilla.ancho
+        horizontal = bits & (bits >> 1) & (bits >> 2) & self.plantilla.mascaraInicioTresHorizontal
+        vertical = bits & (bits >> ancho) & (bits >> (2 * ancho))
+        return (horizontal | vertical) != 0
+
+# POIs como dos máscaras: dónde hay POI y cuáles de ellos son víctima.
+# Se comporta como el diccionario {(x, y): "victima"|"falsa_alarma"}.
+class CPoisBits:
+    def __init__(self, plantilla):
+        self.capa = CCapaBits(plantilla)
+        self.victimas = CCapaBits(plantilla)
+
+    def __contains__(self, posicion):
+        return posicion in self.capa
+
+    def __getitem__(self, posicion):
+        if posicion not in self.capa:
+            raise KeyError(posicion)
+        return "victima" if posicion in self.victimas else "falsa_alarma"
+
+    def get(self, posicion, default=None):
+        return self[posicion] if posicion in self.capa else default
+
+    def __setitem__(self, posicion, tipo):
+        self.capa.add(posicion)
+        if tipo == "victima":
+            self.victimas.add(posicion)
+        else:
+            self.victimas.discard(posicion)
+
+    def __delitem__(self, posicion):
+        self.capa.remove(posicion)
+        self.victimas.discard(posicion)
+
+    def update(self, pois):
+        for posicion, tipo in pois.items():
+            self[posicion] = tipo
+
+    def keys(self):
+        return list(self.capa)
+
+    def items(self):
+        return [(posicion, self[posicion]) for posicion in self.capa]
+
+    def __iter__(self):
+        return iter(self.capa)
+
+    def __len__(self):
+        return len(self.capa)
+
+# Paredes de todo el tablero empacadas en un entero, un nibble por celda
+# (arriba=8, izquierda=4, abajo=2, derecha=1). Se lee como el diccionario
+# {(x, y): (arriba, izquierda, abajo, derecha)}.
+class CParedesEmpacadas:
+    def __init__(self, plantilla, paredes):
+        self.indices = plantilla.indices
+        self.nibbles = 0
+        for pos, (arriba, izquierda, abajo, derecha) in paredes.items():
+            nibble = (arriba << 3) | (izquierda << 2) | (abajo << 1) | derecha
+            self.nibbles |= nibble << (4 * self.indices[pos])
+        self.presentes = frozenset(paredes)
+
+    def __contains__(self, posicion):
+        return posicion in self.presentes
+
+    def __getitem__(self, posicion):
+        if posicion not in self.presentes:
+            raise KeyError(posicion)
+        nibble = (self.nibbles >> (4 * self.indices[posicion])) & 0xF
+        return ((nibble >> 3) & 1, (nibble >> 2) & 1, (nibble >> 1) & 1, nibble & 1)
+
+    def get(self, posicion, default=None):
+        return self[posicion] if posicion in self.presentes else default
+
+# Plantillas ya procesadas: {(ruta, hash del contenido): plantilla}.
+plantillasCargadas = {}
+lockPlantillas = threading.Lock()
+
+# Función que regresa la plantilla de un archivo de configuración.
+# Si el archivo cambia, su hash cambia y se procesa de nuevo. El archivo se lee
+# por partes, así que no se carga completo en memoria.
+def obtenerPlantilla(archivo):
+    try:
+        hashArchivo = hashlib.sha1()
+        with open(archivo, 'rb') as f:
+            for bloque in iter(lambda: f.read(1 << 16), b""):
+                hashArchivo.update(bloque)
+    except Exception as e:
+        print(f"Error cargando configuración: {e}")
+        return CPlantillaTablero([], ANCHO_POR_DEFECTO, ALTO_POR_DEFECTO)
+
+    llave = (os.path.abspath(archivo), hashArchivo.hexdigest())
+    with lockPlantillas:
+        plantilla = plantillasCargadas.get(llave)
+    if plantilla is None:
+        with open(archivo, encoding="utf-8") as f:
+            plantilla = CPlantillaTablero(f, huella=llave[1])
+        with lockPlantillas:
+            plantilla = plantillasCargadas.setdefault(llave, plantilla)
+    return plantilla
+
+# ======================================
+# ========== Índices de Celdas =========
+# ======================================
+
+# Conjunto de posiciones que además permite elegir una al azar en O(1): las
+# posiciones viven en una lista y un diccionario guarda el índice de cada una.
+# Al quitar, la última posición de la lista ocupa el hueco que queda.
+class CIndiceCeldas:
+    def __init__(self, posiciones=()):
+        self.posiciones = []
+        self.indices = {}  # {(x, y): índice en la lista}
+        for posicion in posiciones:
+            self.agregar(posicion)
+
+    def agregar(self, posicion):
+        if posicion not in self.indices:
+            self.indices[posicion] = len(self.posiciones)
+            self.posiciones.append(posicion)
+
+    def quitar(self, posicion):
+        indice = self.indices.pop(posicion, None)
+        if indice is None:
+            return
+        ultima = self.posiciones.pop()
+        if indice < len(self.posiciones):
+            self.posiciones[indice] = ultima
+            self.indices[ultima] = indice
+
+    # Método que deja la posición dentro o fuera del índice.
+    def actualizar(self, posicion, incluir):
+        if incluir:
+            self.agregar(posicion)
+        else:
+            self.quitar(posicion)
+
+    # Método que elige una posición al azar con el generador dado.
+    def elegir(self, generador):
+        return generador.choice(self.posiciones)
+
+    def __contains__(self, posicion):
+        return posicion in self.indices
+
+    def __len__(self):
+        return len(self.posiciones)
+
+    def __iter__(self):
+        return iter(self.posiciones)
+
 # ======================================
 # ========== Modelo del Juego ==========
 # ======================================
 
+# Capa de la que depende cada campo de distancias de objetivos.
+CAPAS_CAMPOS_DISTANCIA = {
+    "fuego": "fuego",
+    "pois": "pois",
+    "victimas": "victimasEncontradas",
+    "entradas": None,
+    "exploracion": None
+}
+
 class CJuego(Model):
 
-    def __init__(self, archivoConfiguracion=None):
-        super().__init__()
+    # tablero indica cómo se guardan las capas: TABLERO_CONJUNTOS o TABLERO_BITS.
+    # semilla fija el generador del modelo (self.random); None toma una al azar.
+    def __init__(self, archivoConfiguracion=None, tablero=TABLERO_CONJUNTOS, semilla=None):
+        super().__init__(seed=semilla)
+        self.tablero = tablero
 	
-        # Dimensiones de la grid.
-        self.width = 8
-        self.height = 6
+        # Dimensiones de la grid: las da el archivo de configuración.
+        self.plantilla = obtenerPlantilla(archivoConfiguracion) if archivoConfiguracion is not None else None
+        self.width = self.plantilla.ancho if self.plantilla is not None else ANCHO_POR_DEFECTO
+        self.height = self.plantilla.alto if self.plantilla is not None else ALTO_POR_DEFECTO
 
         # Configuración de la grid.
         self.grid = MultiGrid(self.width, self.height, torus=False)
@@ -616,8 +1187,32 @@ class CJuego(Model):
         self.gridPiso = {}  # {(x, y): True/False} - True = piso, False = pared
         self.puertaDirs = {}  # {(x,y): dir}
 
+        # Celdas y capas de marcadores que cambiaron desde la última captura del estado.
+        # Todos los métodos que modifican el tablero pasan por registrarCambioCelda.
+        self.celdasCambiadas = set()
+        self.capasCambiadas = set()
+        # Cuántas veces ha cambiado cada capa (None = celdas descubiertas).
+        self.versionesCapas = {}
+        # Campos de distancias ya calculados: {tipo: (versión, campo)}.
+        self.camposDistancia = {}
+
+        # Líneas de 3 fuegos seguidos que hay en el tablero (para el daño estructural)
+        # y POIs que empezaron sobre fuego.
+        self.lineasDeFuego = 0
+        self.poisSobreFuego = set()
+
+        # Cambia cada vez que se abre una puerta; las rutas guardadas de los
+        # bomberos con otra versión se vuelven a calcular.
+        self.versionPuertas = 0
+
         self.cargarConfiguracion(archivoConfiguracion)
 
+        # Celdas donde puede aparecer un POI y celdas de piso descubiertas (donde
+        # cae el humo de cada turno). Se mantienen en registrarCambioCelda.
+        self.celdasLibres = CIndiceCeldas()
+        self.pisoDescubierto = CIndiceCeldas()
+        self.construirIndicesCeldas()
+
         # Crear y colocar bomberos.
         self.bomberos = crearBomberos(self)
         self.colocarBomberos()
@@ -646,87 +1241,62 @@ class CJuego(Model):
         self.propagarHumoInicial()
 
     # Carga la configuración del txt.
+    # Lo que no cambia en la partida se toma de la plantilla compartida (que se
+    # obtiene en __init__ para conocer las dimensiones); fuego, POIs y puertas
+    # se copian porque cada modelo los modifica.
     def cargarConfiguracion(self, archivo):
         if archivo is None:
             self.configuracionPorDefecto()
             return
 
-        try:
-            with open(archivo, 'r') as f:
-                lineas = f.read().strip().split('\n')
-
-            idx = 0
-
-            # Cargar configuración de la grid.
+        if self.tablero == TABLERO_BITS:
+            self.usarCapasBits()
+        else:
+            self.paredes = self.plantilla.paredes
+        self.gridPiso = self.plantilla.gridPiso
+        self.puertaDirs = self.plantilla.puertaDirs
+        self.entradas = self.plantilla.entradas
+        self.adyacentes = self.plantilla.adyacentes
+        self.poiPosiciones.update(self.plantilla.poisIniciales)
+        self.fuegoPosiciones.update(self.plantilla.fuegosIniciales)
+        self.puertasCerradas.update(self.plantilla.puertasIniciales)
+
+        # Líneas de tres fuegos con las que empieza el tablero y POIs que la
+        # configuración puso sobre fuego.
+        self.lineasDeFuego = sum(1 for linea in self.plantilla.lineas
+                                 if all(celda in self.fuegoPosiciones for celda in linea))
+        self.poisSobreFuego = {pos for pos in self.poiPosiciones if pos in self.fuegoPosiciones}
+
+    # Método que cambia las capas del tablero por máscaras de bits.
+    def usarCapasBits(self):
+        self.celdasDescubiertas = CCapaBits(self.plantilla)
+        self.fuegoPosiciones = CCapaBits(self.plantilla)
+        self.humoPosiciones = CCapaBits(self.plantilla)
+        self.poiPosiciones = CPoisBits(self.plantilla)
+        self.victimasEncontradasPosiciones = CCapaBits(self.plantilla)
+        self.puertasCerradas = CCapaBits(self.plantilla)
+        self.puertasAbiertas = CCapaBits(self.plantilla)
+        self.paredes = self.plantilla.paredesEmpacadas
+
+    # Método que arma los índices de celdas recorriendo el tablero una sola vez.
+    def construirIndicesCeldas(self):
+        for x in range(self.width):
             for y in range(self.height):
-                fila = lineas[idx].split()
-                for x in range(self.width):
-                    celdaInfo = fila[x]
-                    paredes = [int(d) for d in celdaInfo]
-                    self.paredes[(x, y)] = paredes
-                    self.gridPiso[(x, y)] = not all(p == 1 for p in paredes)
-                idx += 1
-
-            # Cargar POIs iniciales.
-            poisIniciales = []
-            for i in range(3):
-                if idx < len(lineas):
-                    datos = lineas[idx].split()
-                    if len(datos) >= 3:
-                        fila, col, tipo = int(datos[0])-1, int(datos[1])-1, datos[2]
-                        if 0 <= fila < self.height and 0 <= col < self.width:
-                            poisIniciales.append((col, fila, "victima" if tipo == "v" else "falsa_alarma"))
-                    idx += 1
-
-            for poi in poisIniciales[:3]:
-                self.poiPosiciones[(poi[0], poi[1])] = poi[2]
-
-            # Cargar posiciones de fuego.
-            for i in range(10):
-                if idx < len(lineas):
-                    datos = lineas[idx].split()
-                    if len(datos) >= 2:
-                        fila, col = int(datos[0])-1, int(datos[1])-1
-                        if 0 <= fila < self.height and 0 <= col < self.width:
-                            self.fuegoPosiciones.add((col, fila))
-                    idx += 1
-
-            # Cargar puertas.
-            for i in range(8):
-                if idx < len(lineas):
-                    datos = lineas[idx].split()
-                    if len(datos) >= 4:
-                        r1, c1, r2, c2 = int(datos[0])-1, int(datos[1])-1, int(datos[2])-1, int(datos[3])-1
-                        if (0 <= r1 < self.height and 0 <= c1 < self.width and
-                            0 <= r2 < self.height and 0 <= c2 < self.width):
-
-                            # Detectar dirección según diferencia entre celdas
-                            if r1 == r2:  # horizontal
-                                if c1 < c2:
-                                    self.puertasCerradas.add((c1, r1))
-                                    self.puertaDirs[(c1, r1)] = 3  # derecha
-                                    self.puertasCerradas.add((c2, r2))
-                                    self.puertaDirs[(c2, r2)] = 1  # izquierda
-                            elif c1 == c2:  # vertical
-                                if r1 < r2:
-                                    self.puertasCerradas.add((c1, r1))
-                                    self.puertaDirs[(c1, r1)] = 2  # abajo
-                                    self.puertasCerradas.add((c2, r2))
-                                    self.puertaDirs[(c2, r2)] = 0  # arriba
-                    idx += 1
-
-            # Cargar entradas.
-            for i in range(4):
-                if idx < len(lineas):
-                    datos = lineas[idx].split()
-                    if len(datos) >= 2:
-                        fila, col = int(datos[0])-1, int(datos[1])-1
-                        if 0 <= fila < self.height and 0 <= col < self.width:
-                            self.entradas.add((col, fila))
-                    idx += 1
-
-        except Exception as e:
-            print(f"Error cargando configuración: {e}")
+                self.actualizarIndicesCelda((x, y))
+
+    # Método que indica si en la celda puede aparecer un POI nuevo.
+    def esCeldaLibre(self, pos):
+        return (self.gridPiso[pos] and
+                pos not in self.poiPosiciones and
+                pos not in self.fuegoPosiciones and
+                pos not in self.humoPosiciones and
+                pos not in self.entradas and
+                pos not in self.puertasCerradas)
+
+    # Método que pone o quita la celda de los índices según su estado actual.
+    def actualizarIndicesCelda(self, pos):
+        self.celdasLibres.actualizar(pos, self.esCeldaLibre(pos))
+        self.pisoDescubierto.actualizar(pos, self.gridPiso[pos] and self.esCeldaDescubierta(pos))
 
     # Método para generar los POIs iniciales.
     def generarPoisIniciales(self):
@@ -735,32 +1305,35 @@ class CJuego(Model):
 
     # Método para generar un nuevo POI.
     def generarNuevoPoi(self):
-        posicionesLibres = []
-        for x in range(self.width):
-            for y in range(self.height):
-                pos = (x, y)
-                if (self.gridPiso[pos] and
-                    pos not in self.poiPosiciones and
-                    pos not in self.fuegoPosiciones and
-                    pos not in self.humoPosiciones and
-                    pos not in self.entradas and
-                    pos not in self.puertasCerradas):
-                    posicionesLibres.append(pos)
-
-        if posicionesLibres:
-            nuevaPos = self.random.choice(posicionesLibres)
+        if self.celdasLibres:
+            nuevaPos = self.celdasLibres.elegir(self.random)
             tipo = "victima" if self.random.random() < 0.6 else "falsa_alarma"
             self.poiPosiciones[nuevaPos] = tipo
+            self.registrarCambioCelda(nuevaPos, "pois")
 
     # Método para propagar el humo inicial.
     def propagarHumoInicial(self):
-        for pos in list(self.fuegoPosiciones):
-            adyacentes = self.grid.get_neighborhood(pos, moore=False, include_center=False)
+        if self.tablero == TABLERO_BITS:
+            # Vecinos de todo el fuego que son piso y no tienen fuego, en una sola operación.
+            humo = self.fuegoPosiciones.vecinos().bits & self.plantilla.pisoBits & ~self.fuegoPosiciones.bits
+            for adj in CCapaBits(self.plantilla, humo):
+                self.humoPosiciones.add(adj)
+                self.registrarCambioCelda(adj, "humo")
+            return
+
+        humo = set()
+        for pos in self.fuegoPosiciones:
+            adyacentes = self.adyacentes[pos]
             for adj in adyacentes:
                 if (self.esPosicionValida(adj) and
                     adj not in self.fuegoPosiciones and
                     self.gridPiso[adj]):
-                    self.humoPosiciones.add(adj)
+                    humo.add(adj)
+        # Por celda, igual que con bits: el orden en que se registran mueve los
+        # índices de celdas, y con ellos las elecciones al azar.
+        for adj in sorted(humo, key=ordenCelda):
+            self.humoPosiciones.add(adj)
+            self.registrarCambioCelda(adj, "humo")
 
     # Método para colocar bomberos en la grid.
     def colocarBomberos(self):
@@ -785,18 +1358,65 @@ class CJuego(Model):
         x, y = posicion
         return 0 <= x < self.width and 0 <= y < self.height
 
+    # Método que regresa las celdas desde las que se mide un campo de distancias.
+    def fuentesCampo(self, tipo):
+        if tipo == "fuego":
+            fuentes = [pos for pos in self.fuegoPosiciones if pos in self.celdasDescubiertas]
+        elif tipo == "pois":
+            fuentes = [pos for pos in self.poiPosiciones if pos in self.celdasDescubiertas]
+        elif tipo == "victimas":
+            fuentes = list(self.victimasEncontradasPosiciones)
+        elif tipo == "entradas":
+            fuentes = list(self.entradas)
+        else:
+            # Piso sin descubrir; las posiciones de la plantilla ya van por celda.
+            return [pos for pos in self.plantilla.posiciones
+                    if self.gridPiso[pos] and pos not in self.celdasDescubiertas]
+        return sorted(fuentes, key=ordenCelda)
+
+    # Método que regresa el campo de distancias de un tipo de objetivo: para cada
+    # celda, el objetivo más cercano al que hay ruta, con los pasos de
+    # calcularRuta (sin cruzar paredes; las puertas cerradas se abren al pasar,
+    # así que no cortan el campo). Se recalcula solo cuando cambió su capa o las
+    # celdas descubiertas.
+    def obtenerCampoDistancias(self, tipo):
+        version = (self.versionesCapas.get(CAPAS_CAMPOS_DISTANCIA[tipo], 0),
+                   self.versionesCapas.get(None, 0))
+        guardado = self.camposDistancia.get(tipo)
+        if guardado is None or guardado[0] != version:
+            campo = calcularCampoDistancias(self.fuentesCampo(tipo), self.plantilla.vecinosPaso.__getitem__)
+            guardado = self.camposDistancia[tipo] = (version, campo)
+        return guardado[1]
+
+    # Método que regresa el objetivo más cercano de un tipo con ruta desde la
+    # posición, o None si no hay ninguno.
+    def objetivoCercano(self, tipo, posicion):
+        distancia = self.obtenerCampoDistancias(tipo).get(posicion)
+        return None if distancia is None else distancia[1]
+
     # Método que verifica si es una celda descubierta.
     def esCeldaDescubierta(self, posicion):
         return posicion in self.celdasDescubiertas
 
+    # Método que anota que una celda cambió (y a qué lista de marcadores afecta),
+    # para que la siguiente captura del estado solo rehaga lo que cambió.
+    # También mantiene al día los índices de celdas.
+    def registrarCambioCelda(self, posicion, capa=None):
+        self.celdasCambiadas.add(posicion)
+        if capa is not None:
+            self.capasCambiadas.add(capa)
+        self.versionesCapas[capa] = self.versionesCapas.get(capa, 0) + 1
+        self.actualizarIndicesCelda(posicion)
+
     # Método para descubrir una celda en la posición.
     def descubrirCelda(self, posicion):
-        if self.esPosicionValida(posicion):
+        if self.esPosicionValida(posicion) and posicion not in self.celdasDescubiertas:
             self.celdasDescubiertas.add(posicion)
+            self.registrarCambioCelda(posicion)
 
     # Método para descubrir las celdas adyacentes a la posición.
     def descubrirCeldasAdyacentes(self, posicion):
-        adyacentes = self.grid.get_neighborhood(posicion, moore=False, include_center=False)
+        adyacentes = self.adyacentes[posicion]
         for adj in adyacentes:
             if self.esPosicionValida(adj):
                 self.descubrirCelda(adj)
@@ -842,23 +1462,9 @@ class CJuego(Model):
     def esEntrada(self, posicion):
         return posicion in self.entradas
 
-    # Método para obtener la entrada más cercana.
+    # Método para obtener la entrada más cercana con ruta desde la posición.
     def obtenerEntradaCercana(self, posicion):
-        if not self.entradas:
-            return None
-
-        x, y = posicion
-        entradaCercana = None
-        distanciaMinima = float('inf')
-
-        for entrada in self.entradas:
-            ex, ey = entrada
-            distancia = abs(ex - x) + abs(ey - y)
-            if distancia < distanciaMinima:
-                distanciaMinima = distancia
-                entradaCercana = entrada
-
-        return entradaCercana
+        return self.objetivoCercano("entradas", posicion)
 
     # Método para obtener las posiciones de puertas cerradas.
     def obtenerPosicionesPuertaCerrada(self):
@@ -868,55 +1474,59 @@ class CJuego(Model):
     def tienePuertaCerradaEn(self, posicion):
         return posicion in self.puertasCerradas
 
+    # Método que regresa la celda de puerta que hay que abrir para pasar de la
+    # posición a su vecino, o None si entre las dos no hay una puerta cerrada de
+    # los dos lados. Se abre la del lado de la posición si la tiene.
+    def puertaCerradaEntre(self, posicion, vecino):
+        for celda, puerta in self.plantilla.pasosConPuerta[posicion]:
+            if celda == vecino and all(c in self.puertasCerradas for c in puerta):
+                return puerta[0]
+        return None
+
     # Método para verificar si hay celdas adyacentes descubiertas.
     def tieneCeldaAdyacenteDescubierta(self, posicion):
-        adyacentes = self.grid.get_neighborhood(posicion, moore=False, include_center=False)
+        adyacentes = self.adyacentes[posicion]
         for adj in adyacentes:
             if adj in self.celdasDescubiertas:
                 return True
         return False
 
+    # Método que cuenta las líneas de tres fuegos seguidos que pasan por una celda.
+    def contarLineasDeFuegoEn(self, posicion):
+        return sum(1 for linea in self.plantilla.lineasPorCelda[posicion]
+                   if all(celda in self.fuegoPosiciones for celda in linea))
+
+    # Método para encender fuego en una celda que no tenía.
+    # Mantiene la cuenta de líneas de tres fuegos del tablero.
+    def encenderFuego(self, posicion):
+        self.fuegoPosiciones.add(posicion)
+        self.lineasDeFuego += self.contarLineasDeFuegoEn(posicion)
+        self.registrarCambioCelda(posicion, "fuego")
+
     # Método para verificar el daño estructural.
+    # Hay daño si existe alguna línea de 3 fuegos consecutivos (horizontal o vertical)
+    # en el tablero. La cuenta de líneas se actualiza al encender y apagar fuego,
+    # así que no hace falta recorrer el tablero.
     def verificarDanoEstructural(self):
-        fuegos = list(self.fuegoPosiciones)
-
-        # Horizontalmente.
-        for y in range(self.height):
-            for x in range(self.width - 2):
-                consecutivos = 0
-                for i in range(3):
-                    if (x + i, y) in fuegos:
-                        consecutivos += 1
-                    else:
-                        break
-                # Si hay 3 fuegos consecutivos horizontalmente se añade daño estructural.
-                if consecutivos == 3:
-                    self.puntosDano += 1
-                    return
-
-        # Verticalmente.
-        for x in range(self.width):
-            for y in range(self.height - 2):
-                consecutivos = 0
-                for i in range(3):
-                    if (x, y + i) in fuegos:
-                        consecutivos += 1
-                    else:
-                        break
-                # Si hay 3 fuegos consecutivos verticalmente se añade daño estructural.
-                if consecutivos == 3:
-                    self.puntosDano += 1
-                    return
+        if self.lineasDeFuego > 0:
+            self.puntosDano += 1
 
     # Método para verificar si un POI fue alcanzado por fuego.
-    def verificarPoisAlcanzadosPorFuego(self):
+    # Los POIs nuevos nunca se colocan sobre fuego, así que solo se puede quemar el de
+    # la celda que se acaba de encender, más los que la configuración puso sobre
+    # fuego (esos se queman en la primera ignición del juego).
+    def verificarPoisAlcanzadosPorFuego(self, posicion):
+        candidatos = [posicion] + [pos for pos in self.poisSobreFuego if pos != posicion]
+        self.poisSobreFuego.clear()
+
         poisAEliminar = []
-        for pos, tipo in self.poiPosiciones.items():
-            if pos in self.fuegoPosiciones:
-                poisAEliminar.append((pos, tipo))
+        for pos in candidatos:
+            if pos in self.poiPosiciones and pos in self.fuegoPosiciones:
+                poisAEliminar.append((pos, self.poiPosiciones[pos]))
 
         for pos, tipo in poisAEliminar:
             del self.poiPosiciones[pos]
+            self.registrarCambioCelda(pos, "pois")
             if tipo == "victima":
                 self.victimasPerdidas += 1
             self.generarNuevoPoi()
@@ -926,8 +1536,11 @@ class CJuego(Model):
     # Método para apagar el fuego en la posición.
     def apagarFuego(self, posicion):
         if posicion in self.fuegoPosiciones:
+            self.lineasDeFuego -= self.contarLineasDeFuegoEn(posicion)
             self.fuegoPosiciones.remove(posicion)
             self.humoPosiciones.add(posicion)
+            self.registrarCambioCelda(posicion, "fuego")
+            self.registrarCambioCelda(posicion, "humo")
             return True
         return False
 
@@ -936,6 +1549,7 @@ class CJuego(Model):
         if posicion in self.poiPosiciones:
             tipo = self.poiPosiciones[posicion]
             del self.poiPosiciones[posicion]
+            self.registrarCambioCelda(posicion, "pois")
             self.generarNuevoPoi()
             return tipo
         return None
@@ -943,11 +1557,13 @@ class CJuego(Model):
     # Método para colocar un marcador de victima encontrada.
     def ponerMarcadorVictimaEncontrada(self, posicion):
         self.victimasEncontradasPosiciones.add(posicion)
+        self.registrarCambioCelda(posicion, "victimasEncontradas")
 
     # Método para remover un marcador de victima encontrada.
     def removerMarcadorVictimaEncontrada(self, posicion):
         if posicion in self.victimasEncontradasPosiciones:
             self.victimasEncontradasPosiciones.remove(posicion)
+            self.registrarCambioCelda(posicion, "victimasEncontradas")
 
     # Método para notificar que una victima fue encontrada.
     def notificarVictimaEncontrada(self, posicion):
@@ -964,6 +1580,9 @@ class CJuego(Model):
         if posicion in self.puertasCerradas:
             self.puertasCerradas.remove(posicion)
             self.puertasAbiertas.add(posicion)
+            self.registrarCambioCelda(posicion, "puertasCerradas")
+            self.registrarCambioCelda(posicion, "puertasAbiertas")
+            self.versionPuertas += 1
             return True
         return False
 
@@ -981,32 +1600,24 @@ class CJuego(Model):
 
     # Método para procesar la expansión del fuego.
     def procesarHumoYFuego(self):
-        posicionesValidas = []
-
-        for x in range(self.width):
-            for y in range(self.height):
-                posicion = (x, y)
-                if (self.esPosicionValida(posicion) and
-                    self.gridPiso[posicion] and
-                    self.esCeldaDescubierta(posicion)):
-                    posicionesValidas.append(posicion)
-
-        if not posicionesValidas:
+        if not self.pisoDescubierto:
             return
 
-        posicionElegida = self.random.choice(posicionesValidas)
+        posicionElegida = self.pisoDescubierto.elegir(self.random)
 
         if posicionElegida not in self.humoPosiciones and posicionElegida not in self.fuegoPosiciones:
             self.humoPosiciones.add(posicionElegida)
+            self.registrarCambioCelda(posicionElegida, "humo")
 
         elif posicionElegida in self.humoPosiciones:
             self.humoPosiciones.remove(posicionElegida)
-            self.fuegoPosiciones.add(posicionElegida)
-            self.verificarPoisAlcanzadosPorFuego()
+            self.registrarCambioCelda(posicionElegida, "humo")
+            self.encenderFuego(posicionElegida)
+            self.verificarPoisAlcanzadosPorFuego(posicionElegida)
             self.verificarDanoEstructural()
 
         elif posicionElegida in self.fuegoPosiciones:
-            adyacentes = self.grid.get_neighborhood(posicionElegida, moore=False, include_center=False)
+            adyacentes = self.adyacentes[posicionElegida]
 
             celdasValidas = []
             for adj in adyacentes:
@@ -1018,12 +1629,13 @@ class CJuego(Model):
 
             if celdasValidas:
                 celdaExpansion = self.random.choice(celdasValidas)
-                self.fuegoPosiciones.add(celdaExpansion)
+                self.encenderFuego(celdaExpansion)
 
                 if celdaExpansion in self.humoPosiciones:
                     self.humoPosiciones.remove(celdaExpansion)
+                    self.registrarCambioCelda(celdaExpansion, "humo")
 
-                self.verificarPoisAlcanzadosPorFuego()
+                self.verificarPoisAlcanzadosPorFuego(celdaExpansion)
                 self.verificarDanoEstructural()
 
     def step(self):
@@ -1048,12 +1660,17 @@ class CJuego(Model):
         # Recolectar datos.
         self.datacollector.collect(self)
 
-    def runModel(self):
+    # maxTurnos corta el juego en ese turno aunque no haya terminado.
+    def runModel(self, maxTurnos=None):
         stepCount = 0
-        while not self.juegoTerminado:
+        while not self.juegoTerminado and (maxTurnos is None or self.turno < maxTurnos):
             self.step()
             #stepCount += 1
 
+        if not self.juegoTerminado:
+            self.juegoTerminado = True
+            self.resultado = RESULTADO_TOPE_TURNOS
+
         return {
             "resultado": self.resultado,
             "victimasRescatadas": self.victimasRescatadas,
@@ -1071,73 +1688,234 @@ class CJuego(Model):
 
 class CAleatorio(CJuego):
 
-    def __init__(self, archivoConfiguracion=None):
-        super().__init__(archivoConfiguracion)
+    def __init__(self, archivoConfiguracion=None, tablero=TABLERO_CONJUNTOS, semilla=None):
+        super().__init__(archivoConfiguracion, tablero, semilla)
         # Cambiar todos los bomberos al modo aleatorio.
         cambiarModoBomberos(self.bomberos, CModoAgente.ALEATORIO)
 
-    def runModel(self):
-
-        while not self.juegoTerminado:
-            self.step()
-
-        if not self.juegoTerminado:
-            self.juegoTerminado = True
-            self.resultado = "Modo Aleatorio"
-
-        return {
-            "resultado": self.resultado,
-            "victimasRescatadas": self.victimasRescatadas,
-            "victimasPerdidas": self.victimasPerdidas,
-            "puntosDano": self.puntosDano,
-            "turnos": self.turno,
-            "fuegosFinales": len(self.fuegoPosiciones),
-            "humosFinales": len(self.humoPosiciones),
-            "poisRestantes": len(self.poiPosiciones)
-        }
-
 # ======================================
 # ========= Modelo Estrategia ==========
 # ======================================
 
 class CEstrategia(CJuego):
 
-    def __init__(self, archivoConfiguracion=None):
-        super().__init__(archivoConfiguracion)
+    def __init__(self, archivoConfiguracion=None, tablero=TABLERO_CONJUNTOS, semilla=None):
+        super().__init__(archivoConfiguracion, tablero, semilla)
         # Cambiar todos los bomberos al modo estrategia.
         cambiarModoBomberos(self.bomberos, CModoAgente.ESTRATEGIA)
 
-    def runModel(self):
-
-        while not self.juegoTerminado:
-            self.step()
-
-        if not self.juegoTerminado:
-            self.juegoTerminado = True
-            self.resultado = "Modo Estrategia"
-
-        return {
-            "resultado": self.resultado,
-            "victimasRescatadas": self.victimasRescatadas,
-            "victimasPerdidas": self.victimasPerdidas,
-            "puntosDano": self.puntosDano,
-            "turnos": self.turno,
-            "fuegosFinales": len(self.fuegoPosiciones),
-            "humosFinales": len(self.humoPosiciones),
-            "poisRestantes": len(self.poiPosiciones)
-        }
-
 # ======================================
 # ========= Clase para Unity ===========
 # ======================================
 
+# Función que calcula las diferencias entre dos estados capturados.
+# Solo incluye las celdas, bomberos, listas de marcadores y estadísticas
+# que cambiaron; el cliente las aplica sobre el estado que ya tiene.
+# Si se dan indicesCelda (ordenados), solo se revisan esas celdas del grid.
+def calcularDeltaEstados(estadoAnterior, estadoActual, indicesCelda=None):
+    gridAnterior = estadoAnterior["grid"]
+    gridActual = estadoActual["grid"]
+    if indicesCelda is None or len(gridActual) != len(gridAnterior):
+        indicesCelda = range(len(gridActual))
+    if gridActual is gridAnterior:
+        indicesCelda = ()
+    celdasCambiadas = [
+        gridActual[i] for i in indicesCelda
+        if i >= len(gridAnterior) or (gridActual[i] is not gridAnterior[i] and gridActual[i] != gridAnterior[i])
+    ]
+
+    bomberosAnteriores = {b["id"]: b for b in estadoAnterior["bomberos"]}
+    bomberosCambiados = [
+        bombero for bombero in estadoActual["bomberos"]
+        if bomberosAnteriores.get(bombero["id"]) is not bombero and bomberosAnteriores.get(bombero["id"]) != bombero
+    ]
+
+    # Las celdas y listas que no cambiaron son el mismo objeto, así que casi no se comparan.
+    marcadoresAnteriores = estadoAnterior["marcadores"]
+    marcadoresCambiados = {
+        nombre: lista for nombre, lista in estadoActual["marcadores"].items()
+        if marcadoresAnteriores.get(nombre) is not lista and marcadoresAnteriores.get(nombre) != lista
+    }
+
+    estadisticasCambiadas = {
+        nombre: valor for nombre, valor in estadoActual["estadisticas"].items()
+        if estadoAnterior["estadisticas"].get(nombre) != valor
+    }
+
+    return {
+        "paso": estadoActual["paso"],
+        "desde": estadoAnterior["paso"],
+        "completo": False,
+        "dimensiones": estadoActual["dimensiones"],
+        "bomberos": bomberosCambiados,
+        "grid": celdasCambiadas,
+        "marcadores": marcadoresCambiados,
+        "estadisticas": estadisticasCambiadas,
+        "timestamp": estadoActual["timestamp"]
+    }
+
+# Función que aplica un delta de calcularDeltaEstados sobre el estado anterior
+# y regresa el estado siguiente. No modifica el estado anterior: las celdas,
+# bomberos y listas que no cambiaron se comparten entre los dos.
+def aplicarDeltaEstado(estadoAnterior, delta):
+    ancho = delta["dimensiones"]["ancho"]
+    grid = list(estadoAnterior["grid"])
+    for celda in delta["grid"]:
+        grid[celda["y"] * ancho + celda["x"]] = celda
+
+    bomberosCambiados = {b["id"]: b for b in delta["bomberos"]}
+    bomberos = [bomberosCambiados.get(b["id"], b) for b in estadoAnterior["bomberos"]]
+
+    marcadores = dict(estadoAnterior["marcadores"])
+    marcadores.update(delta["marcadores"])
+    estadisticas = dict(estadoAnterior["estadisticas"])
+    estadisticas.update(delta["estadisticas"])
+
+    return {
+        "paso": delta["paso"],
+        "dimensiones": delta["dimensiones"],
+        "bomberos": bomberos,
+        "grid": grid,
+        "marcadores": marcadores,
+        "estadisticas": estadisticas,
+        "timestamp": delta["timestamp"]
+    }
+
+# Historial de estados de una partida. En lugar de una copia completa por paso,
+# guarda un estado completo (keyframe) cada cierto número de pasos y entre ellos
+# solo los cambios, ambos como JSON compacto. Los pasos más viejos se descartan
+# por bloques cuando se pasa del máximo de pasos o de bytes; los estados se
+# reconstruyen al pedirlos. Los estados que regresa no se deben modificar.
+class CHistorialEstados:
+    def __init__(self, intervaloKeyframe=20, maxPasos=None, maxBytes=None):
+        self.intervaloKeyframe = intervaloKeyframe
+        self.maxPasos = maxPasos
+        self.maxBytes = maxBytes
+        self.entradas = []  # [(esKeyframe, JSON del estado o del delta)]
+        self.primerPaso = 0
+        self.ultimo = None  # Último estado agregado, completo.
+        self.ultimoDelta = None  # Cambios del último paso (None si fue keyframe).
+        self.pasosDesdeKeyframe = 0
+        self.bytes = 0
+        self.reconstruido = None  # (paso, estado) de la última reconstrucción.
+        # El historial se escribe en el hilo del modelo y se puede leer desde otros.
+        self.lock = threading.Lock()
+
+    # Método que agrega el estado del siguiente paso. indicesCelda son las celdas
+    # del grid que pudieron cambiar desde el último estado agregado (None = todas).
+    def agregar(self, estado, indicesCelda=None):
+        with self.lock:
+            consecutivo = self.ultimo is not None and estado["paso"] == self.ultimo["paso"] + 1
+            if not consecutivo:
+                self.entradas.clear()
+                self.primerPaso = estado["paso"]
+                self.bytes = 0
+                self.reconstruido = None
+
+            esKeyframe = not consecutivo or self.pasosDesdeKeyframe + 1 >= self.intervaloKeyframe
+            self.ultimoDelta = None if esKeyframe else calcularDeltaEstados(self.ultimo, estado, indicesCelda)
+            self.pasosDesdeKeyframe = 0 if esKeyframe else self.pasosDesdeKeyframe + 1
+
+            datos = estado if esKeyframe else self.ultimoDelta
+            codificado = json.dumps(datos, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            self.entradas.append((esKeyframe, codificado))
+            self.bytes += len(codificado)
+            self.ultimo = estado
+            self.recortar()
+
+    # Método que descarta el bloque más viejo (de un keyframe al siguiente)
+    # mientras se pase de los límites. El último bloque nunca se descarta.
+    # Se debe llamar con el lock tomado.
+    def recortar(self):
+        while ((self.maxPasos is not None and len(self.entradas) > self.maxPasos) or
+               (self.maxBytes is not None and self.bytes > self.maxBytes)):
+            siguienteKeyframe = next((i for i in range(1, len(self.entradas)) if self.entradas[i][0]), None)
+            if siguienteKeyframe is None:
+                return
+            self.bytes -= sum(len(entrada[1]) for entrada in self.entradas[:siguienteKeyframe])
+            del self.entradas[:siguienteKeyframe]
+            self.primerPaso += siguienteKeyframe
+            self.reconstruido = None
+
+    # Método que regresa el estado completo de un paso, o None si ya no está.
+    def obtener(self, paso):
+        with self.lock:
+            return self.reconstruir(paso)
+
+    # Se debe llamar con el lock tomado.
+    def reconstruir(self, paso):
+        indice = paso - self.primerPaso
+        if not 0 <= indice < len(self.entradas):
+            return None
+        if paso == self.ultimo["paso"]:
+            return self.ultimo
+        if self.reconstruido is not None and self.reconstruido[0] == paso:
+            return self.reconstruido[1]
+
+        # Se parte del keyframe anterior, o de la última reconstrucción si está en medio.
+        inicio = indice
+        while not self.entradas[inicio][0]:
+            inicio -= 1
+        if self.reconstruido is not None and inicio <= self.reconstruido[0] - self.primerPaso <= indice:
+            inicio = self.reconstruido[0] - self.primerPaso
+            estado = self.reconstruido[1]
+        else:
+            estado = json.loads(self.entradas[inicio][1])
+
+        for i in range(inicio + 1, indice + 1):
+            estado = aplicarDeltaEstado(estado, json.loads(self.entradas[i][1]))
+        self.reconstruido = (paso, estado)
+        return estado
+
+    # Método que regresa los cambios de un paso respecto al anterior, o None si no están.
+    def obtenerDelta(self, paso):
+        with self.lock:
+            indice = paso - self.primerPaso
+            if not 1 <= indice < len(self.entradas):
+                return None
+            if paso == self.ultimo["paso"] and self.ultimoDelta is not None:
+                return self.ultimoDelta
+            esKeyframe, datos = self.entradas[indice]
+            if not esKeyframe:
+                return json.loads(datos)
+            return calcularDeltaEstados(self.reconstruir(paso - 1), self.reconstruir(paso))
+
+    # Método que regresa todos los estados guardados, del más viejo al más reciente.
+    def obtenerTodos(self):
+        with self.lock:
+            return [self.reconstruir(paso) for paso in range(self.primerPaso, self.primerPaso + len(self.entradas))]
+
+    def __len__(self):
+        return len(self.entradas)
+
 class CUnity(CJuego):
-    def __init__(self, archivoConfiguracion=None):
-        super().__init__(archivoConfiguracion)
-        self.estadosSimulacion = []
+    # Configuración del historial: un estado completo cada tantos pasos
+    # y cuántos pasos o bytes se guardan como máximo (None = sin límite).
+    intervaloKeyframe = 20
+    maxPasosHistorial = 1000
+    maxBytesHistorial = None
+
+    def __init__(self, archivoConfiguracion=None, tablero=TABLERO_CONJUNTOS, semilla=None):
+        super().__init__(archivoConfiguracion, tablero, semilla)
+        # Se guardan para que reiniciarSimulacion arme la misma partida.
+        self.archivoConfiguracion = archivoConfiguracion
+        self.semilla = semilla
+        self.estadosSimulacion = CHistorialEstados(self.intervaloKeyframe, self.maxPasosHistorial,
+                                                   self.maxBytesHistorial)
         self.simulacionActiva = False
         self.pasoActual = 0
-        
+        # Máximo de pasos de atraso para mandar solo cambios.
+        self.maxPasosDelta = 100
+
+        # Celdas y listas de marcadores de la última captura. Solo se rehacen las que
+        # cambiaron; las demás se comparten con el estado anterior (nunca se modifican).
+        self.celdasEstado = None
+        self.marcadoresEstado = None
+        self.bomberosEstado = None
+        self.clavesBomberos = None
+        # Índices del grid que cambiaron desde el último estado guardado en el historial.
+        self.indicesSinGuardar = set()
+
         # Capturar estado inicial
         self.capturarEstadoActual()
     
@@ -1149,60 +1927,38 @@ class CUnity(CJuego):
 
     def capturarEstadoActual(self):
         
-        # Información de los bomberos.
-        bomberosInfo = []
-        for bombero in self.bomberos:
-            bomberoData = {
-                "id": bombero.unique_id,
-                "tipo": bombero.tipoBombero.value,
-                "posicion": {
-                    "x": bombero.pos[0] if bombero.pos else 0,
-                    "y": bombero.pos[1] if bombero.pos else 0
-                },
-                "estado": bombero.estadoBombero.value,
-                "puntosAccion": bombero.puntosAccion,
-                "maxPuntosAccion": bombero.maxPuntosAccion,
-                "llevandoVictima": bombero.llevandoVictima,
-                "posicionObjetivo": {
-                    "x": bombero.posicionObjetivo[0] if bombero.posicionObjetivo else -1,
-                    "y": bombero.posicionObjetivo[1] if bombero.posicionObjetivo else -1
-                },
-                "modo": bombero.modo.value
-            }
-            bomberosInfo.append(bomberoData)
-        
-        # Información del grid.
-        gridInfo = []
-        for y in range(self.height):       # recorre filas
-            for x in range(self.width):    # recorre columnas
-                pos = (x, y)
-                celdaData = {
-                    "x": x,
-                    "y": y,
-                    "esPiso": self.gridPiso.get(pos, False),
-                    "esDescubierta": pos in self.celdasDescubiertas,
-                    "tieneFuego": pos in self.fuegoPosiciones,
-                    "tieneHumo": pos in self.humoPosiciones,
-                    "tienePoi": pos in self.poiPosiciones,
-                    "tipoPoi": self.poiPosiciones.get(pos, ""),
-                    "tieneVictimaEncontrada": pos in self.victimasEncontradasPosiciones,
-                    "esPuertaCerrada": pos in self.puertasCerradas,
-                    "esPuertaAbierta": pos in self.puertasAbiertas,
-                    "esEntrada": pos in self.entradas,
-                    "paredes": self.paredes.get(pos, [0, 0, 0, 0])
-                      }
-                gridInfo.append(celdaData)
-        
-        # Información de marcadores/efectos
-        marcadores = {
-            "fuego": [{"x": pos[0], "y": pos[1]} for pos in self.fuegoPosiciones],
-            "humo": [{"x": pos[0], "y": pos[1]} for pos in self.humoPosiciones],
-            "pois": [{"x": pos[0], "y": pos[1], "tipo": tipo} for pos, tipo in self.poiPosiciones.items()],
-            "victimasEncontradas": [{"x": pos[0], "y": pos[1]} for pos in self.victimasEncontradasPosiciones],
-            "puertasCerradas": [{"x": x, "y": y, "tipo": str(self.puertaDirs.get((x,y),0))} for (x, y) in self.puertasCerradas],
-            "puertasAbiertas": [{"x": x, "y": y, "tipo": str(self.puertaDirs.get((x,y),0))} for (x, y) in self.puertasAbiertas],
-            "entradas": [{"x": pos[0], "y": pos[1]} for pos in self.entradas]
-        }
+        # Información de los bomberos. Solo se rehace el diccionario de los que cambiaron;
+        # si ninguno cambió se comparte la lista del estado anterior.
+        bomberosInfo = self.capturarBomberos()
+
+        # Información del grid (recorre filas y luego columnas).
+        # La primera vez se arma completo; después solo se rehacen las celdas que cambiaron,
+        # sobre una copia porque los estados anteriores siguen usando la lista vieja.
+        # Si no cambió ninguna celda, el estado nuevo comparte la lista del anterior.
+        if self.celdasEstado is None:
+            self.celdasEstado = [self.capturarCelda((x, y))
+                                 for y in range(self.height) for x in range(self.width)]
+        elif self.celdasCambiadas:
+            self.celdasEstado = list(self.celdasEstado)
+            for pos in self.celdasCambiadas:
+                indice = pos[1] * self.width + pos[0]
+                self.celdasEstado[indice] = self.capturarCelda(pos)
+                self.indicesSinGuardar.add(indice)
+        self.celdasCambiadas.clear()
+        gridInfo = self.celdasEstado
+
+        # Información de marcadores/efectos, rehaciendo solo las capas que cambiaron
+        # (también sobre una copia, y compartida si no cambió ninguna).
+        if self.marcadoresEstado is None:
+            self.marcadoresEstado = {capa: self.capturarMarcadores(capa) for capa in
+                                     ("fuego", "humo", "pois", "victimasEncontradas",
+                                      "puertasCerradas", "puertasAbiertas", "entradas")}
+        elif self.capasCambiadas:
+            self.marcadoresEstado = dict(self.marcadoresEstado)
+            for capa in self.capasCambiadas:
+                self.marcadoresEstado[capa] = self.capturarMarcadores(capa)
+        self.capasCambiadas.clear()
+        marcadores = self.marcadoresEstado
         
         # Estadísticas del juego
         estadisticas = {
@@ -1234,36 +1990,150 @@ class CUnity(CJuego):
             "estadisticas": estadisticas,
             "timestamp": self.turno
         }
-        
-        self.estadosSimulacion.append(copy.deepcopy(estado))
+
+        # Solo se guarda un estado por paso, aunque se capture varias veces.
+        # No hace falta copiarlo: cada captura arma objetos nuevos y nadie los modifica.
+        if self.estadosSimulacion.ultimo is None or self.estadosSimulacion.ultimo["paso"] != self.pasoActual:
+            self.estadosSimulacion.agregar(estado, sorted(self.indicesSinGuardar))
+            self.indicesSinGuardar.clear()
+        self.ultimoEstado = estado
         return estado
-    
+
+    # Método que regresa la lista de bomberos para el estado. Cada bombero se compara
+    # con su última captura por una tupla de sus datos y solo se rehace si cambió.
+    def capturarBomberos(self):
+        anteriores = self.bomberosEstado
+        bomberosInfo = []
+        claves = []
+        completa = anteriores is None or len(anteriores) != len(self.bomberos)
+        cambio = completa
+        for i, bombero in enumerate(self.bomberos):
+            clave = (bombero.unique_id, bombero.tipoBombero, bombero.pos, bombero.estadoBombero,
+                     bombero.puntosAccion, bombero.maxPuntosAccion, bombero.llevandoVictima,
+                     bombero.posicionObjetivo, bombero.modo)
+            claves.append(clave)
+            if not completa and self.clavesBomberos[i] == clave:
+                bomberosInfo.append(anteriores[i])
+                continue
+            cambio = True
+            bomberosInfo.append({
+                "id": bombero.unique_id,
+                "tipo": bombero.tipoBombero.value,
+                "posicion": {
+                    "x": bombero.pos[0] if bombero.pos else 0,
+                    "y": bombero.pos[1] if bombero.pos else 0
+                },
+                "estado": bombero.estadoBombero.value,
+                "puntosAccion": bombero.puntosAccion,
+                "maxPuntosAccion": bombero.maxPuntosAccion,
+                "llevandoVictima": bombero.llevandoVictima,
+                "posicionObjetivo": {
+                    "x": bombero.posicionObjetivo[0] if bombero.posicionObjetivo else -1,
+                    "y": bombero.posicionObjetivo[1] if bombero.posicionObjetivo else -1
+                },
+                "modo": bombero.modo.value
+            })
+        if cambio:
+            self.bomberosEstado = bomberosInfo
+            self.clavesBomberos = claves
+        return self.bomberosEstado
+
+    # Método que arma la información de una celda para el estado.
+    def capturarCelda(self, pos):
+        x, y = pos
+        return {
+            "x": x,
+            "y": y,
+            "esPiso": self.gridPiso.get(pos, False),
+            "esDescubierta": pos in self.celdasDescubiertas,
+            "tieneFuego": pos in self.fuegoPosiciones,
+            "tieneHumo": pos in self.humoPosiciones,
+            "tienePoi": pos in self.poiPosiciones,
+            "tipoPoi": self.poiPosiciones.get(pos, ""),
+            "tieneVictimaEncontrada": pos in self.victimasEncontradasPosiciones,
+            "esPuertaCerrada": pos in self.puertasCerradas,
+            "esPuertaAbierta": pos in self.puertasAbiertas,
+            "esEntrada": pos in self.entradas,
+            "paredes": list(self.paredes.get(pos, (0, 0, 0, 0)))
+        }
+
+    # Método que arma la lista de marcadores de una capa para el estado.
+    def capturarMarcadores(self, capa):
+        if capa == "fuego":
+            return [{"x": pos[0], "y": pos[1]} for pos in self.fuegoPosiciones]
+        if capa == "humo":
+            return [{"x": pos[0], "y": pos[1]} for pos in self.humoPosiciones]
+        if capa == "pois":
+            return [{"x": pos[0], "y": pos[1], "tipo": tipo} for pos, tipo in self.poiPosiciones.items()]
+        if capa == "victimasEncontradas":
+            return [{"x": pos[0], "y": pos[1]} for pos in self.victimasEncontradasPosiciones]
+        if capa == "puertasCerradas":
+            return [{"x": x, "y": y, "tipo": str(self.puertaDirs.get((x,y),0))} for (x, y) in self.puertasCerradas]
+        if capa == "puertasAbiertas":
+            return [{"x": x, "y": y, "tipo": str(self.puertaDirs.get((x,y),0))} for (x, y) in self.puertasAbiertas]
+        return [{"x": pos[0], "y": pos[1]} for pos in self.entradas]
+
+    # Método que regresa el último estado capturado sin volver a recorrer el modelo.
+    # El estado solo cambia en step(), que ya lo captura al terminar.
+    def obtenerUltimoEstado(self):
+        return self.ultimoEstado
+
     def step(self):
         if self.juegoTerminado:
             return
-        
+
         super().step()
         self.pasoActual += 1
         self.capturarEstadoActual()
-    
+
     def obtenerEstados(self):
-        return self.estadosSimulacion
-    
+        return self.estadosSimulacion.obtenerTodos()
+
     def obtenerEstadoPaso(self, paso):
-        if 0 <= paso < len(self.estadosSimulacion):
-            return self.estadosSimulacion[paso]
-        return None
-    
+        return self.estadosSimulacion.obtener(paso)
+
+    # Método que regresa los cambios que produjo un paso respecto al anterior.
+    def obtenerDeltaPaso(self, paso):
+        return self.estadosSimulacion.obtenerDelta(paso)
+
+    # Método que regresa solo lo que cambió desde un paso anterior.
+    # Si el paso ya no existe o el cliente va muy atrasado, regresa el estado completo.
+    # Se le puede pasar un estado ya capturado para no volver a leer el modelo.
+    def obtenerCambiosDesde(self, paso, estadoActual=None):
+        if estadoActual is None:
+            estadoActual = self.obtenerUltimoEstado()
+        estadoAnterior = None
+        if paso is not None and 0 <= estadoActual["paso"] - paso <= self.maxPasosDelta:
+            # El delta del paso anterior ya está guardado en el historial.
+            if paso == estadoActual["paso"] - 1 and estadoActual is self.estadosSimulacion.ultimo:
+                delta = self.obtenerDeltaPaso(estadoActual["paso"])
+                if delta is not None:
+                    return delta
+            estadoAnterior = self.obtenerEstadoPaso(paso)
+
+        if estadoAnterior is None:
+            estadoCompleto = dict(estadoActual)
+            estadoCompleto["desde"] = paso
+            estadoCompleto["completo"] = True
+            return estadoCompleto
+
+        return calcularDeltaEstados(estadoAnterior, estadoActual)
+
+    # Método que vuelve a empezar la partida con el mismo archivo, tablero y semilla
+    # (con semilla None se juega una partida nueva al azar).
     def reiniciarSimulacion(self):
-        self.__init__(self.archivoConfiguracion if hasattr(self, 'archivoConfiguracion') else None)
+        # Mesa envuelve step al inicializar el modelo; se quita la envoltura
+        # anterior para que no quede envuelto dos veces.
+        self.__dict__.pop("step", None)
+        self.__init__(self.archivoConfiguracion, self.tablero, self.semilla)
 
 # ======================================
 # ======= Aleatorio para Unity =========
 # ======================================
 
 class CAleatorioUnity(CUnity, CAleatorio):
-    def __init__(self, archivoConfiguracion=None):
-        CUnity.__init__(self, archivoConfiguracion)
+    def __init__(self, archivoConfiguracion=None, tablero=TABLERO_CONJUNTOS, semilla=None):
+        CUnity.__init__(self, archivoConfiguracion, tablero, semilla)
         # Cambiar todos los bomberos al modo aleatorio.
         cambiarModoBomberos(self.bomberos, CModoAgente.ALEATORIO)
 
@@ -1272,8 +2142,8 @@ class CAleatorioUnity(CUnity, CAleatorio):
 # ======================================
 
 class CEstrategiaUnity(CUnity, CEstrategia):
-    def __init__(self, archivoConfiguracion=None):
-        CUnity.__init__(self, archivoConfiguracion)
+    def __init__(self, archivoConfiguracion=None, tablero=TABLERO_CONJUNTOS, semilla=None):
+        CUnity.__init__(self, archivoConfiguracion, tablero, semilla)
         # Cambiar todos los bomberos al modo estrategia.
         cambiarModoBomberos(self.bomberos, CModoAgente.ESTRATEGIA)
 
@@ -1281,71 +2151,47 @@ class CEstrategiaUnity(CUnity, CEstrategia):
 # ====== Resultados Comparacion ========
 # ======================================
 
-def ejecutarMultiplesIteraciones(num_iteraciones, archivo_config, tipo_solucion):
-    resultados = []
-
-    for i in range(num_iteraciones):
-        if tipo_solucion == "aleatoria":
-            modelo = CAleatorio(archivo_config)
-        elif tipo_solucion == "estrategica":
-            modelo = CEstrategia(archivo_config)
-        else:
-            raise ValueError(f"Tipo de solución no válido: {tipo_solucion}")
+# Función que regresa la semilla de la iteración número indice de una corrida
+# con semilla base; no depende de cuántas iteraciones haya ni de su orden.
+def semillaIteracion(semilla, indice):
+    secuencia = np.random.SeedSequence(semilla, spawn_key=(indice,))
+    return int(secuencia.generate_state(1, np.uint64)[0])
+
+# Función que regresa el modo con el que se guardan los resultados en el cache:
+# un tope de turnos cambia el resultado, así que forma parte de la llave.
+def modoCache(tipo_solucion, maxTurnos=None):
+    return tipo_solucion if maxTurnos is None else f"{tipo_solucion}:{maxTurnos}"
+
+# Con semilla, la iteración i usa semillaIteracion(semilla, i). Si además se da
+# un cache (CCacheResultados), solo se juegan las iteraciones que no tenga y
+# las nuevas se guardan en él. maxTurnos se pasa a runModel.
+def ejecutarMultiplesIteraciones(num_iteraciones, archivo_config, tipo_solucion, semilla=None, cache=None,
+                                 maxTurnos=None):
+    if tipo_solucion not in ("aleatoria", "estrategica"):
+        raise ValueError(f"Tipo de solución no válido: {tipo_solucion}")
+
+    semillas = [None] * num_iteraciones
+    guardados = {}
+    if semilla is not None:
+        semillas = [semillaIteracion(semilla, i) for i in range(num_iteraciones)]
+        if cache is not None:
+            huella = obtenerPlantilla(archivo_config).huella
+            guardados = cache.buscar(huella, modoCache(tipo_solucion, maxTurnos), semillas)
 
-        resultado = modelo.runModel()
+    resultados = []
+    nuevos = []
+    for semillaJuego in semillas:
+        resultado = guardados.get(semillaJuego)
+        if resultado is None:
+            if tipo_solucion == "aleatoria":
+                modelo = CAleatorio(archivo_config, semilla=semillaJuego)
+            else:
+                modelo = CEstrategia(archivo_config, semilla=semillaJuego)
+            resultado = modelo.runModel(maxTurnos)
+            if semillaJuego is not None:
+                nuevos.append((semillaJuego, resultado))
         resultados.append(resultado)
-    return resultados
-
-def analizarResultados(resultados, nombre_estrategia):
-    print(f"\n=== ESTADÍSTICAS - {nombre_estrategia.upper()} ===")
-
-    # Métricas a analizar
-    metricas = ['victimasRescatadas', 'victimasPerdidas', 'puntosDano', 'turnos', 'fuegosFinales', 'humosFinales']
-
-    for metrica in metricas:
-        valores = [r[metrica] for r in resultados]
-
-        minimo = min(valores)
-        maximo = max(valores)
-        promedio = sum(valores) / len(valores)
-
-        print(f"{metrica}:")
-        print(f"  Mín: {minimo}")
-        print(f"  Pro: {promedio:.2f}")
-        print(f"  Máx: {maximo}")
 
-    # Contar resultados
-    resultados_conteo = {}
-    for r in resultados:
-        resultado = r['resultado']
-        resultados_conteo[resultado] = resultados_conteo.get(resultado, 0) + 1
-
-    print(f"\nResultados finales:")
-    for resultado, count in resultados_conteo.items():
-        porcentaje = (count / len(resultados)) * 100
-        print(f"  {resultado}: {count} ({porcentaje:.1f}%)")
-
-# Ejecutar análisis
-NUM_ITERACIONES = 1000
-
-print("Ejecutando análisis de múltiples iteraciones...")
-print(f"Número de iteraciones por estrategia: {NUM_ITERACIONES}")
-
-# Analizar estrategia aleatoria
-print("\n--- Ejecutando estrategia ALEATORIA ---")
-resultados_aleatorios = ejecutarMultiplesIteraciones(NUM_ITERACIONES, "txtxd.txt", "aleatoria")
-analizarResultados(resultados_aleatorios, "ALEATORIA")
-
-# Analizar estrategia estratégica
-print("\n--- Ejecutando estrategia ESTRATÉGICA ---")
-resultados_estrategicos = ejecutarMultiplesIteraciones(NUM_ITERACIONES, "txtxd.txt", "estrategica")
-analizarResultados(resultados_estrategicos, "ESTRATÉGICA")
-
-print(f"\n=== COMPARACIÓN DE PROMEDIOS ===")
-print(f"Promedio víctimas rescatadas:")
-print(f"  Solución Aleatoria: {sum(r['victimasRescatadas'] for r in resultados_aleatorios) / len(resultados_aleatorios):.2f}")
-print(f"  Solución Estratégica: {sum(r['victimasRescatadas'] for r in resultados_estrategicos) / len(resultados_estrategicos):.2f}")
-
-print(f"Promedio turnos:")
-print(f"  Solución Aleatoria: {sum(r['turnos'] for r in resultados_aleatorios) / len(resultados_aleatorios):.2f}")
-print(f"  Solución Estratégica: {sum(r['turnos'] for r in resultados_estrategicos) / len(resultados_estrategicos):.2f}")
+    if cache is not None and nuevos:
+        cache.guardar(huella, modoCache(tipo_solucion, maxTurnos), nuevos)
+    return resultados
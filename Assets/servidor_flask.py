@@ -1,54 +1,271 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
 import json
-import threading
+import os
 import time
-from reto import CUnity, CEstrategiaUnity, CAleatorioUnity
+from reto import CJuego, CUnity, CEstrategiaUnity, CAleatorioUnity
+from sesiones import CGestorSesiones, SESION_POR_DEFECTO
+from planificador import CPlanificador, POLITICA_SALTAR, POLITICA_RECUPERAR
+from reserva import CReservaModelos
+from difusion import FORMATO_COMPLETO, FORMATO_DELTA
+from codificacion import (FORMATO_JSON, FORMATO_COLUMNAR, FORMATO_BINARIO, TIPOS_CONTENIDO,
+                          TIPO_CONTENIDO_BINARIO, codificarColumnar, codificarBinario)
+from metricas import (CContador, CHistograma, CMedidor, CRegistroMetricas,
+                      TIPO_CONTENIDO_PROMETHEUS, instrumentarMetodo)
 
 app = Flask(__name__)
 CORS(app)
 
 # Variables globales para la simulación
-modelo_actual = None
-simulacion_activa = False
-auto_run = False
 archivo_config = "txtxd.txt"
 
-def crear_modelo():
-    """Crea un nuevo modelo de simulación"""
-    global modelo_actual
-    modelo_actual = CEstrategiaUnity(archivo_config)
-    return modelo_actual
+# Límites de las sesiones (se pueden cambiar con variables de entorno)
+MAX_SESIONES = int(os.environ.get("MAX_SESIONES", 50))
+TIEMPO_INACTIVIDAD = float(os.environ.get("TIEMPO_INACTIVIDAD", 1800))
+# MAX_MEMORIA_SESIONES cuenta los bytes de los historiales de todas las sesiones juntas.
+MAX_MEMORIA_SESIONES = int(os.environ["MAX_MEMORIA_SESIONES"]) if "MAX_MEMORIA_SESIONES" in os.environ else None
 
-def auto_step_loop():
-    """Loop para ejecutar steps automáticamente cada segundo"""
-    global auto_run, modelo_actual
-    while True:
-        if auto_run and modelo_actual and not modelo_actual.juegoTerminado:
-            modelo_actual.step()
-        time.sleep(1)
+gestor_sesiones = CGestorSesiones(MAX_SESIONES, TIEMPO_INACTIVIDAD, MAX_MEMORIA_SESIONES)
 
-# Iniciar el hilo para auto-step
-auto_thread = threading.Thread(target=auto_step_loop, daemon=True)
-auto_thread.start()
+# El planificador solo despierta cuando a alguna sesión con auto-run le toca un paso
+planificador = CPlanificador()
+
+# Modo debug de Flask (recarga y consola interactiva en errores); solo para desarrollo local
+DEBUG_FLASK = os.environ.get("DEBUG_FLASK", "0").lower() in ("1", "true")
+
+# Segundos sin pasos antes de mandar un keep-alive por el stream
+INTERVALO_KEEPALIVE = 15
+
+# Máximo de pasos que se ejecutan en una sola llamada a /step
+MAX_PASOS_LOTE = int(os.environ.get("MAX_PASOS_LOTE", 1000))
+
+# Pasos por página de /historial (por defecto y máximo)
+PASOS_PAGINA_HISTORIAL = 100
+MAX_PASOS_PAGINA_HISTORIAL = int(os.environ.get("MAX_PASOS_PAGINA_HISTORIAL", 1000))
+
+# Retención del historial de cada modelo (pasos y bytes; vacío = sin límite)
+if "MAX_PASOS_HISTORIAL" in os.environ:
+    CUnity.maxPasosHistorial = int(os.environ["MAX_PASOS_HISTORIAL"]) or None
+if "MAX_BYTES_HISTORIAL" in os.environ:
+    CUnity.maxBytesHistorial = int(os.environ["MAX_BYTES_HISTORIAL"]) or None
+
+# Campos del estado que se pueden pedir en /historial ('paso' siempre se incluye)
+CAMPOS_ESTADO = ("dimensiones", "bomberos", "grid", "marcadores", "estadisticas", "timestamp")
+
+# Métricas expuestas en /metrics
+registro_metricas = CRegistroMetricas()
+metrica_simulacion = registro_metricas.registrar(CHistograma(
+    "reto_simulacion_segundos", "Duración de las operaciones del modelo", ("operacion",)))
+metrica_codificacion = registro_metricas.registrar(CHistograma(
+    "reto_codificacion_segundos", "Duración de la codificación del estado", ("formato",)))
+metrica_peticiones = registro_metricas.registrar(CContador(
+    "reto_peticiones_total", "Peticiones atendidas por endpoint", ("endpoint", "metodo", "codigo")))
+metrica_errores = registro_metricas.registrar(CContador(
+    "reto_errores_total", "Peticiones que terminaron en error por endpoint", ("endpoint",)))
+metrica_latencia = registro_metricas.registrar(CHistograma(
+    "reto_peticion_segundos", "Duración de las peticiones por endpoint", ("endpoint",)))
+registro_metricas.registrar(CMedidor(
+    "reto_sesiones", "Sesiones vivas",
+    lambda: [((), len(gestor_sesiones))]))
+registro_metricas.registrar(CMedidor(
+    "reto_sesiones_auto_run", "Sesiones con auto-run programado",
+    lambda: [((), len(planificador))]))
+registro_metricas.registrar(CMedidor(
+    "reto_suscriptores_stream", "Clientes conectados a /stream por sesión",
+    lambda: [((s.idSesion,), len(s.difusor)) for s in gestor_sesiones.listarSesiones()], ("sesion",)))
+registro_metricas.registrar(CMedidor(
+    "reto_historial_estados", "Estados guardados en el historial de cada sesión",
+    lambda: [((s.idSesion,), len(s.publicado[0].estadosSimulacion)) for s in gestor_sesiones.listarSesiones()],
+    ("sesion",)))
+registro_metricas.registrar(CMedidor(
+    "reto_historial_bytes", "Bytes del historial codificado de cada sesión",
+    lambda: [((s.idSesion,), s.publicado[0].estadosSimulacion.bytes) for s in gestor_sesiones.listarSesiones()],
+    ("sesion",)))
+
+def construir_modelo(configuracion, modo):
+    """Construye un modelo de simulación desde cero"""
+    if modo == "aleatorio":
+        return CAleatorioUnity(configuracion)
+    return CEstrategiaUnity(configuracion)
+
+# Modelos ya construidos por (configuración, modo), repuestos en segundo plano.
+# La reserva la crea iniciar_servidor(); mientras no exista, cada modelo se construye en el momento.
+MODELOS_EN_RESERVA = int(os.environ.get("MODELOS_EN_RESERVA", 2))
+reserva_modelos = None
+
+registro_metricas.registrar(CMedidor(
+    "reto_reserva_modelos", "Modelos listos en la reserva por modo",
+    lambda: [((modo,), n) for (_, modo), n in sorted(reserva_modelos.disponibles().items())]
+    if reserva_modelos is not None else [], ("modo",)))
+registro_metricas.registrar(CMedidor(
+    "reto_reserva_solicitudes_total", "Modelos pedidos a la reserva (acierto = ya estaba construido)",
+    lambda: [(("acierto",), reserva_modelos.aciertos), (("fallo",), reserva_modelos.fallos)]
+    if reserva_modelos is not None else [], ("resultado",), tipo="counter"))
+
+def iniciar_servidor():
+    """Arranca lo que el servidor necesita antes de atender peticiones: mide el paso del
+    juego y la captura del estado, y crea y precalienta la reserva de modelos.
+    Importar el módulo no arranca hilos ni toca las clases del motor; llamarla otra vez no hace nada."""
+    global reserva_modelos
+    if reserva_modelos is not None:
+        return
+    # Se miden el paso del juego y la captura del estado sin tocar la simulación
+    instrumentarMetodo(CJuego, "step", metrica_simulacion, "step")
+    instrumentarMetodo(CUnity, "capturarEstadoActual", metrica_simulacion, "capturarEstadoActual")
+
+    reserva_modelos = CReservaModelos(construir_modelo, MODELOS_EN_RESERVA)
+    for modo_reserva in ("estrategia", "aleatorio"):
+        reserva_modelos.precalentar(archivo_config, modo_reserva)
+
+def crear_modelo(modo="estrategia"):
+    """Regresa un modelo nuevo, tomado de la reserva si hay uno listo"""
+    modo = "aleatorio" if modo == "aleatorio" else "estrategia"
+    if reserva_modelos is None:
+        return construir_modelo(archivo_config, modo)
+    return reserva_modelos.obtener(archivo_config, modo)
+
+def obtener_id_sesion():
+    """Lee el id de sesión de la query, del cuerpo JSON o del header X-Sesion"""
+    id_sesion = request.args.get("sesion")
+    if id_sesion is None:
+        data = request.get_json(force=True, silent=True) or {}
+        id_sesion = data.get("sesion")
+    if id_sesion is None:
+        id_sesion = request.headers.get("X-Sesion")
+    return id_sesion or SESION_POR_DEFECTO
+
+def obtener_sesion():
+    """Regresa la sesión de la petición o None si no existe"""
+    return gestor_sesiones.obtenerSesion(obtener_id_sesion())
+
+def obtener_parametro(nombre, default=None):
+    """Lee un parámetro de la query o del cuerpo JSON"""
+    valor = request.args.get(nombre)
+    if valor is None:
+        data = request.get_json(force=True, silent=True) or {}
+        valor = data.get(nombre)
+    return default if valor is None else valor
+
+def obtener_paso_desde():
+    """Lee el parámetro 'desde' de la query o del cuerpo JSON"""
+    desde = obtener_parametro("desde")
+    return int(desde) if desde is not None else None
+
+def obtener_numero_pasos():
+    """Lee el parámetro 'n' (pasos a avanzar, 1 por omisión); debe ser un entero positivo"""
+    n = obtener_parametro("n", 1)
+    if isinstance(n, str) and n.strip().isdigit():
+        n = int(n)
+    if isinstance(n, bool) or not isinstance(n, int) or n < 1:
+        raise ValueError("El parámetro 'n' debe ser un entero positivo")
+    return n
+
+def ejecutar_lote(sesion, n, hasta_fin, trayectoria):
+    """Avanza varios pasos y arma la trayectoria compacta (en el hilo de la sesión)"""
+    modelo = sesion.modelo
+    limite = MAX_PASOS_LOTE if hasta_fin else min(n, MAX_PASOS_LOTE)
+    pasos = []
+    while len(pasos) < limite and sesion.procesarPaso():
+        pasos.append(modelo.pasoActual)
+
+    # "deltas": los cambios de cada paso; "final": solo los cambios de estadísticas por paso.
+    if trayectoria == "final":
+        eventos = []
+        for paso in pasos:
+            delta = modelo.obtenerDeltaPaso(paso)
+            if delta is not None:
+                eventos.append({"paso": paso, "estadisticas": delta["estadisticas"]})
+        return pasos, {"eventos": eventos}
+    return pasos, {"trayectoria": [modelo.obtenerDeltaPaso(paso) for paso in pasos]}
+
+def codificar_json(datos):
+    """JSON compacto en bytes"""
+    return json.dumps(datos, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def formato_solicitado():
+    """Formato de estado pedido con ?formato= o con el header Accept"""
+    formato = request.args.get("formato")
+    if formato is None:
+        formato = request.accept_mimetypes.best_match(list(TIPOS_CONTENIDO), default=None)
+        formato = TIPOS_CONTENIDO.get(formato, FORMATO_JSON)
+    if formato not in (FORMATO_JSON, FORMATO_COLUMNAR, FORMATO_BINARIO):
+        raise ValueError(f"Formato no válido: {formato}")
+    return formato
+
+def estado_codificado(sesion, desde, formato):
+    """Estado publicado ya codificado y su llave (generación, paso, formato, desde).
+    Los lectores del mismo paso comparten una sola codificación."""
+    modelo, estado, generacion = sesion.publicado
+    llave = (generacion, estado["paso"], formato, desde)
+
+    def codificar():
+        if formato == FORMATO_BINARIO:
+            return codificarBinario(estado)
+        if formato == FORMATO_COLUMNAR:
+            # El formato columnar siempre es completo.
+            return codificar_json(codificarColumnar(estado))
+        if desde is None:
+            return codificar_json(estado)
+        return codificar_json(modelo.obtenerCambiosDesde(desde, estado))
+
+    def generar():
+        etiqueta = "json-delta" if formato == FORMATO_JSON and desde is not None else formato
+        with metrica_codificacion.medir(etiqueta):
+            return codificar()
+
+    return llave, sesion.cacheRespuestas.obtener(llave, generar)
+
+def etag_estado(sesion, llave):
+    """ETag de una respuesta de estado; cambia con el paso, el reinicio y el auto-run"""
+    generacion, paso, formato, desde = llave
+    return f"{sesion.idSesion}-{generacion}-{paso}-{formato}-{desde}-{int(sesion.autoRun)}"
+
+def respuesta_estado(sesion, datos, llave, estado_bytes):
+    """Arma la respuesta con el estado ya codificado.
+    En JSON el estado va dentro de 'estado'; en binario los demás datos van en headers."""
+    if llave[2] == FORMATO_BINARIO:
+        response = Response(estado_bytes, mimetype=TIPO_CONTENIDO_BINARIO)
+        response.headers["X-Status"] = datos["status"]
+        response.headers["X-Sesion"] = sesion.idSesion
+        response.headers["X-Auto-Run"] = str(sesion.autoRun).lower()
+        return response
+    cuerpo = codificar_json(datos)[:-1] + b',"estado":' + estado_bytes + b"}"
+    return Response(cuerpo, mimetype="application/json")
+
+def sesion_no_inicializada():
+    return jsonify({"status": "error", "message": "Simulación no inicializada"}), 400
+
+@app.before_request
+def iniciar_medicion():
+    g.inicio_peticion = time.perf_counter()
+
+@app.after_request
+def registrar_peticion(response):
+    """Cuenta la petición y su duración por endpoint (la ruta, no la URL, para no crear series por id)"""
+    endpoint = request.url_rule.rule if request.url_rule else "desconocido"
+    metrica_peticiones.incrementar(endpoint, request.method, str(response.status_code))
+    if response.status_code >= 400:
+        metrica_errores.incrementar(endpoint)
+    inicio = g.get("inicio_peticion")
+    if inicio is not None:
+        metrica_latencia.observar(time.perf_counter() - inicio, endpoint)
+    return response
 
 @app.route('/inicializar', methods=['POST'])
 def inicializar_simulacion():
-    global simulacion_activa, modelo_actual
     try:
         data = request.get_json(force=True)
         modo = data.get("modo", "estrategia")
 
-        if modo == "aleatorio":
-            modelo_actual = CAleatorioUnity(archivo_config)
-        else:
-            modelo_actual = CEstrategiaUnity(archivo_config)
+        # Una sesión nueva recibe un id generado; si no, se usa (o reemplaza) la indicada.
+        id_sesion = None if data.get("nueva_sesion") else obtener_id_sesion()
+        sesion = gestor_sesiones.crearSesion(crear_modelo(modo), modo, id_sesion)
 
-        simulacion_activa = True
-        estado_inicial = modelo_actual.capturarEstadoActual()
+        estado_inicial = sesion.estado
         return jsonify({
             "status": "success",
             "message": f"Simulación {modo} inicializada correctamente",
+            "sesion": sesion.idSesion,
             "estado": estado_inicial
         })
     except Exception as e:
@@ -57,43 +274,68 @@ def inicializar_simulacion():
 @app.route('/step', methods=['POST'])
 def ejecutar_step():
     """Ejecuta un paso de la simulación"""
-    global modelo_actual
     try:
-        if not modelo_actual:
-            return jsonify({"status": "error", "message": "Simulación no inicializada"}), 400
-        
-        if modelo_actual.juegoTerminado:
-            estado_actual = modelo_actual.capturarEstadoActual()
-            return jsonify({
-                "status": "warning", 
-                "message": "El juego ya terminó", 
-                "estado": estado_actual
-            })
-        
-        modelo_actual.step()
-        estado_actual = modelo_actual.capturarEstadoActual()
-        
+        sesion = obtener_sesion()
+        if not sesion:
+            return sesion_no_inicializada()
+
+        desde = obtener_paso_desde()
+        formato = formato_solicitado()
+        n = obtener_numero_pasos()
+
+        if sesion.estado["estadisticas"]["juegoTerminado"]:
+            llave, estado_bytes = estado_codificado(sesion, desde, formato)
+            return respuesta_estado(sesion, {
+                "status": "warning",
+                "message": "El juego ya terminó",
+                "sesion": sesion.idSesion
+            }, llave, estado_bytes)
+
+        hasta_fin = str(obtener_parametro("hasta_fin", False)).lower() in ("1", "true")
+        if n > 1 or hasta_fin:
+            # Avance en lote: se regresa el estado final y la trayectoria de todos los pasos.
+            if formato == FORMATO_BINARIO:
+                raise ValueError("El avance en lote solo se regresa en JSON")
+            trayectoria = obtener_parametro("trayectoria", "deltas")
+            pasos, datos_trayectoria = sesion.ejecutar(ejecutar_lote, sesion, n, hasta_fin, trayectoria).result()
+            response = {
+                "status": "success",
+                "message": f"{len(pasos)} steps ejecutados correctamente",
+                "sesion": sesion.idSesion,
+                "pasos_ejecutados": len(pasos)
+            }
+            response.update(datos_trayectoria)
+            llave, estado_bytes = estado_codificado(sesion, desde, formato)
+            return respuesta_estado(sesion, response, llave, estado_bytes)
+
+        sesion.avanzar().result()
+        llave, estado_bytes = estado_codificado(sesion, desde, formato)
+
         response = {
             "status": "success",
             "message": "Step ejecutado correctamente",
-            "estado": estado_actual
+            "sesion": sesion.idSesion
         }
-        return jsonify(response)
+        return respuesta_estado(sesion, response, llave, estado_bytes)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
 @app.route('/reiniciar', methods=['POST'])
 def reiniciar_simulacion():
     """Reinicia la simulación"""
-    global auto_run
     try:
-        auto_run = False  # Pausar auto-run al reiniciar
-        crear_modelo()
-        estado_inicial = modelo_actual.capturarEstadoActual()
-        
+        # Se conserva el modo de la sesión; el auto-run se pausa al reiniciar.
+        anterior = obtener_sesion()
+        modo = anterior.modo if anterior else "estrategia"
+        sesion = gestor_sesiones.crearSesion(crear_modelo(modo), modo, obtener_id_sesion())
+        estado_inicial = sesion.estado
+
         response = {
             "status": "success",
             "message": "Simulación reiniciada correctamente",
+            "sesion": sesion.idSesion,
             "estado": estado_inicial
         }
         return jsonify(response)
@@ -103,26 +345,52 @@ def reiniciar_simulacion():
 @app.route('/auto_run', methods=['POST', 'PUT'])
 def toggle_auto_run():
     """Activa/desactiva la ejecución automática"""
-    global auto_run
     try:
+        sesion = obtener_sesion()
+        if not sesion:
+            return sesion_no_inicializada()
+
         # Manejar diferentes tipos de content-type
         if request.is_json:
             data = request.get_json()
         else:
             # Para WWWForm
-            data = {"activate": not auto_run}
-        
-        if data and 'activate' in data:
-            auto_run = bool(data['activate'])
+            data = {"activate": not sesion.autoRun}
+
+        data = data or {}
+
+        # Segundos entre pasos (0 = lo más rápido posible) y política cuando un paso se atrasa
+        if "intervalo" in data:
+            intervalo = float(data["intervalo"])
+            if intervalo < 0:
+                raise ValueError("El intervalo no puede ser negativo")
+            sesion.intervaloAutoRun = intervalo
+        if "politica" in data:
+            if data["politica"] not in (POLITICA_SALTAR, POLITICA_RECUPERAR):
+                raise ValueError(f"Política no soportada: {data['politica']}")
+            sesion.politicaAutoRun = data["politica"]
+
+        if 'activate' in data:
+            sesion.autoRun = bool(data['activate'])
+        else:
+            sesion.autoRun = not sesion.autoRun
+
+        if sesion.autoRun:
+            planificador.programar(sesion)
         else:
-            auto_run = not auto_run
-        
+            planificador.cancelar(sesion.idSesion)
+
         response = {
             "status": "success",
-            "message": f"Auto-run {'activado' if auto_run else 'desactivado'}",
-            "auto_run": auto_run
+            "message": f"Auto-run {'activado' if sesion.autoRun else 'desactivado'}",
+            "sesion": sesion.idSesion,
+            "auto_run": sesion.autoRun,
+            "intervalo": sesion.intervaloAutoRun,
+            "politica": sesion.politicaAutoRun
         }
         return jsonify(response)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
@@ -130,64 +398,244 @@ def toggle_auto_run():
 def obtener_estado():
     """Obtiene el estado actual de la simulación"""
     try:
-        if not modelo_actual:
-            return jsonify({"status": "error", "message": "Simulación no inicializada"}), 400
-        
-        estado_actual = modelo_actual.capturarEstadoActual()
-        
-        response = {
+        sesion = obtener_sesion()
+        if not sesion:
+            return sesion_no_inicializada()
+
+        desde = obtener_paso_desde()
+        formato = formato_solicitado()
+
+        # Si el cliente ya tiene este paso, no se vuelve a codificar nada.
+        modelo, estado, generacion = sesion.publicado
+        etag = etag_estado(sesion, (generacion, estado["paso"], formato, desde))
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+
+        llave, estado_bytes = estado_codificado(sesion, desde, formato)
+        response = respuesta_estado(sesion, {
             "status": "success",
-            "estado": estado_actual,
-            "auto_run": auto_run
-        }
-        return jsonify(response)
+            "sesion": sesion.idSesion,
+            "auto_run": sesion.autoRun
+        }, llave, estado_bytes)
+        response.set_etag(etag_estado(sesion, llave))
+        return response
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
 @app.route('/info', methods=['GET'])
 def info_simulacion():
     """Información básica de la simulación"""
-    global modelo_actual
     try:
-        if not modelo_actual:
+        sesion = obtener_sesion()
+        if not sesion:
             return jsonify({
                 "status": "no_initialized",
                 "message": "Simulación no inicializada"
             })
-        
-        info = {
-            "status": "initialized",
-            "turno": modelo_actual.turno,
-            "juego_terminado": modelo_actual.juegoTerminado,
-            "resultado": modelo_actual.resultado,
-            "auto_run": auto_run,
-            "dimensiones": {
-                "ancho": modelo_actual.width,
-                "alto": modelo_actual.height
-            },
-            "estadisticas": {
-                "victimas_rescatadas": modelo_actual.victimasRescatadas,
-                "victimas_perdidas": modelo_actual.victimasPerdidas,
-                "puntos_dano": modelo_actual.puntosDano,
-                "fuegos_activos": len(modelo_actual.fuegoPosiciones),
-                "humos_activos": len(modelo_actual.humoPosiciones)
+        modelo, estado, generacion = sesion.publicado
+        etag = etag_estado(sesion, (generacion, estado["paso"], "info", None))
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+
+        def generar_info():
+            estadisticas = estado["estadisticas"]
+            return codificar_json({
+                "status": "initialized",
+                "sesion": sesion.idSesion,
+                "turno": estadisticas["turno"],
+                "juego_terminado": estadisticas["juegoTerminado"],
+                "resultado": estadisticas["resultado"],
+                "auto_run": sesion.autoRun,
+                "dimensiones": estado["dimensiones"],
+                "estadisticas": {
+                    "victimas_rescatadas": estadisticas["victimasRescatadas"],
+                    "victimas_perdidas": estadisticas["victimasPerdidas"],
+                    "puntos_dano": estadisticas["puntosDano"],
+                    "fuegos_activos": estadisticas["totalFuegosActivos"],
+                    "humos_activos": estadisticas["totalHumosActivos"]
+                }
+            })
+
+        cuerpo = sesion.cacheRespuestas.obtener((generacion, estado["paso"], "info", sesion.autoRun), generar_info)
+        response = Response(cuerpo, mimetype="application/json")
+        response.set_etag(etag)
+        return response
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@app.route('/stream', methods=['GET'])
+def stream_simulacion():
+    """Stream SSE con cada paso nuevo (formato=delta o completo)"""
+    sesion = obtener_sesion()
+    if not sesion:
+        return sesion_no_inicializada()
+
+    formato = request.args.get("formato", FORMATO_DELTA)
+    if formato not in (FORMATO_DELTA, FORMATO_COMPLETO):
+        return jsonify({"status": "error", "message": f"Formato no válido: {formato}"}), 400
+
+    # La suscripción pasa por el hilo de la sesión para no perder ningún paso.
+    difusor = sesion.difusor
+    suscriptor = sesion.ejecutar(lambda: difusor.suscribir(sesion.estado, formato)).result()
+
+    # La suscripción se quita al salir del generador (el cliente se desconectó o se
+    # cerró la sesión) y también al cerrar la respuesta, por si el generador nunca
+    # llegó a empezar; quitarla dos veces no hace nada.
+    def generar():
+        try:
+            while not suscriptor.cerrado:
+                frame = suscriptor.siguienteFrame(INTERVALO_KEEPALIVE)
+                yield frame if frame is not None else b": keepalive\n\n"
+        finally:
+            difusor.desuscribir(suscriptor)
+
+    try:
+        respuesta = Response(generar(), mimetype="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+        respuesta.call_on_close(lambda: difusor.desuscribir(suscriptor))
+    except Exception:
+        difusor.desuscribir(suscriptor)
+        raise
+    return respuesta
+
+@app.route('/historial', methods=['GET'])
+def historial_simulacion():
+    """Estados guardados de la simulación por páginas, para reproducir una partida.
+    Parámetros: desde, hasta, limite (pasos por página), campos (separados por coma)
+    y modo=completo|delta (delta: el primer paso completo y los demás solo con cambios).
+    La respuesta se escribe paso por paso en lugar de armarla completa en memoria."""
+    try:
+        sesion = obtener_sesion()
+        if not sesion:
+            return sesion_no_inicializada()
+
+        # Solo se leen pasos ya publicados; el historial de un paso no cambia después.
+        modelo, estado, generacion = sesion.publicado
+        ultimo = estado["paso"]
+
+        desde = int(obtener_parametro("desde", 0))
+        hasta = int(obtener_parametro("hasta", ultimo))
+        limite = int(obtener_parametro("limite", PASOS_PAGINA_HISTORIAL))
+        modo = obtener_parametro("modo", "completo")
+        campos = obtener_parametro("campos")
+
+        if desde < 0 or limite < 1:
+            raise ValueError("'desde' debe ser >= 0 y 'limite' >= 1")
+        if modo not in ("completo", "delta"):
+            raise ValueError(f"Modo no válido: {modo}")
+        if campos is not None:
+            campos = [c.strip() for c in campos.split(",")] if isinstance(campos, str) else list(campos)
+            invalidos = [c for c in campos if c not in CAMPOS_ESTADO]
+            if invalidos:
+                raise ValueError(f"Campos no válidos: {', '.join(invalidos)}")
+            campos = ("paso",) + tuple(campos)
+
+        hasta = min(hasta, ultimo)
+        fin = min(hasta, desde + min(limite, MAX_PASOS_PAGINA_HISTORIAL) - 1)
+        siguiente = fin + 1 if fin < hasta else None
+
+        def seleccionar(datos):
+            if campos is None:
+                return datos
+            return {campo: datos[campo] for campo in campos if campo in datos}
+
+        def generar():
+            encabezado = {
+                "status": "success",
+                "sesion": sesion.idSesion,
+                "generacion": generacion,
+                "primer_paso": modelo.estadosSimulacion.primerPaso,
+                "ultimo_paso": ultimo,
+                "desde": desde,
+                "hasta": fin,
+                "siguiente": siguiente,
+                "modo": modo
             }
+            yield codificar_json(encabezado)[:-1] + b',"estados":['
+            separador = b""
+            for paso in range(desde, fin + 1):
+                if modo == "delta" and separador:
+                    datos = modelo.obtenerDeltaPaso(paso)
+                else:
+                    datos = modelo.obtenerEstadoPaso(paso)
+                if datos is None:
+                    continue
+                yield separador + codificar_json(seleccionar(datos))
+                separador = b","
+            yield b"]}"
+
+        return Response(generar(), mimetype="application/json")
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@app.route('/sesiones', methods=['GET'])
+def listar_sesiones():
+    """Lista las sesiones vivas con los bytes de su historial
+    (?memoria=0 para omitirlos, ?memoria=estimada para medir todo el modelo, que es lento)"""
+    try:
+        memoria = request.args.get("memoria", "1")
+        if memoria not in ("0", "1", "estimada"):
+            raise ValueError("El parámetro 'memoria' debe ser 0, 1 o estimada")
+        incluir_memoria = memoria != "0"
+        estimar_memoria = memoria == "estimada"
+        sesiones = [s.resumen(incluir_memoria, estimar_memoria) for s in gestor_sesiones.listarSesiones()]
+        response = {
+            "status": "success",
+            "max_sesiones": gestor_sesiones.maxSesiones,
+            "total": len(sesiones),
+            "sesiones": sesiones
         }
-        return jsonify(info)
+        if incluir_memoria:
+            response["memoria_total_bytes"] = sum(s["memoria_bytes"] for s in sesiones)
+        if estimar_memoria:
+            # Las sesiones que se cerraron mientras se medían no tienen estimación.
+            response["memoria_estimada_total_bytes"] = sum(s["memoria_estimada_bytes"] or 0 for s in sesiones)
+        return jsonify(response)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
+@app.route('/sesiones/<id_sesion>', methods=['DELETE'])
+def cerrar_sesion(id_sesion):
+    """Cierra una sesión y libera su modelo"""
+    if not gestor_sesiones.eliminarSesion(id_sesion):
+        return jsonify({"status": "error", "message": "Sesión no encontrada"}), 404
+    return jsonify({"status": "success", "message": f"Sesión {id_sesion} cerrada"})
+
+@app.route('/metrics', methods=['GET'])
+def metricas():
+    """Métricas en formato de texto de Prometheus"""
+    return Response(registro_metricas.generarTexto(), content_type=TIPO_CONTENIDO_PROMETHEUS)
+
 if __name__ == '__main__':
     print("Servidor Flask iniciado en http://localhost:5000")
     print("Endpoints disponibles:")
-    print("  POST /inicializar - Inicializa la simulación")
-    print("  POST /step - Ejecuta un paso")
+    print("  POST /inicializar - Inicializa la simulación (nueva_sesion=true para una sesión propia)")
+    print("  POST /step - Ejecuta un paso (n=<pasos> o hasta_fin=true para avanzar en lote)")
     print("  POST /reiniciar - Reinicia la simulación")
     print("  POST /auto_run - Activa/desactiva ejecución automática")
-    print("  GET /estado - Obtiene el estado actual")
+    print("  GET /estado - Obtiene el estado actual (?desde=<paso> para solo cambios)")
+    print("    /estado y /step aceptan ?formato=json|columnar|binario o el header Accept")
     print("  GET /info - Información básica")
-    
+    print("  GET /stream - Stream SSE de pasos (?formato=delta|completo)")
+    print("  GET /historial - Estados guardados por páginas (?desde=&hasta=&limite=&campos=&modo=delta)")
+    print("  GET /sesiones - Lista las sesiones activas")
+    print("  DELETE /sesiones/<id> - Cierra una sesión")
+    print("  GET /metrics - Métricas en formato Prometheus")
+    print("Todas las rutas aceptan 'sesion' en la query, en el JSON o en el header X-Sesion.")
+
+    iniciar_servidor()
+
     # Crear modelo inicial
-    crear_modelo()
-    
-    app.run(host='localhost', port=5000, debug=True, threaded=True)
\ No newline at end of file
+    gestor_sesiones.crearSesion(crear_modelo(), "estrategia", SESION_POR_DEFECTO)
+
+    app.run(host='localhost', port=5000, debug=DEBUG_FLASK, threaded=True)
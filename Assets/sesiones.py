@@ -0,0 +1,314 @@
+# ======================================
+# ====== Sesiones de Simulación ========
+# ======================================
+
+# Cada cliente (Unity, pruebas, etc.) trabaja sobre su propio modelo.
+# El gestor limita cuántas sesiones viven a la vez y desaloja las que
+# llevan más tiempo sin usarse (LRU) o que pasaron el tiempo de inactividad.
+
+import queue
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from difusion import CDifusor
+
+# Id de la sesión que usan los clientes que no mandan una.
+SESION_POR_DEFECTO = "default"
+
+# Función que estima el tamaño en bytes de un objeto y todo lo que contiene.
+def estimarTamano(objeto, vistos=None):
+    if vistos is None:
+        vistos = set()
+    if id(objeto) in vistos:
+        return 0
+    vistos.add(id(objeto))
+
+    # No se cuentan clases, funciones ni módulos compartidos.
+    if isinstance(objeto, (type, type(sys), type(estimarTamano))):
+        return 0
+
+    tamano = sys.getsizeof(objeto)
+    if isinstance(objeto, dict):
+        for llave, valor in objeto.items():
+            tamano += estimarTamano(llave, vistos) + estimarTamano(valor, vistos)
+    elif isinstance(objeto, (list, tuple, set, frozenset)):
+        for elemento in objeto:
+            tamano += estimarTamano(elemento, vistos)
+    elif hasattr(objeto, "__dict__"):
+        tamano += estimarTamano(vars(objeto), vistos)
+    return tamano
+
+# Guarda las respuestas ya codificadas del paso más reciente de una sesión, para
+# que los lectores del mismo paso compartan una sola codificación.
+class CCacheRespuestas:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.vigente = None  # (generación, paso) de las entradas guardadas
+        self.entradas = {}
+
+    # Método que regresa la respuesta guardada o la genera una sola vez.
+    # La llave empieza con (generación, paso); al llegar un paso nuevo se descarta lo anterior.
+    def obtener(self, llave, generar):
+        with self.lock:
+            vigente = llave[:2]
+            if self.vigente is None or vigente > self.vigente:
+                self.entradas.clear()
+                self.vigente = vigente
+            elif vigente < self.vigente:
+                # Petición atrasada: se responde sin guardar.
+                return generar()
+
+            valor = self.entradas.get(llave)
+            if valor is None:
+                valor = generar()
+                self.entradas[llave] = valor
+            return valor
+
+class CSesion:
+    def __init__(self, idSesion, modelo, modo):
+        self.idSesion = idSesion
+        self.modelo = modelo
+        self.modo = modo
+        self.autoRun = False
+        # Segundos entre pasos del auto-run (0 = lo más rápido posible) y qué hacer si un paso se atrasa.
+        self.intervaloAutoRun = 1.0
+        self.politicaAutoRun = "saltar"
+        self.creada = time.time()
+        self.ultimoAcceso = self.creada
+        self.difusor = CDifusor()
+        self.cerrada = False
+
+        # Último modelo, estado capturado y generación (cambia al reiniciar); los lectores
+        # los usan sin tocar el modelo. Se reemplaza completo después de cada comando.
+        self.publicado = (modelo, modelo.obtenerUltimoEstado(), 0)
+        self.cacheRespuestas = CCacheRespuestas()
+
+        # Solo el hilo de la sesión toca el modelo; los demás hilos le mandan comandos.
+        self.comandos = queue.Queue()
+        self.hilo = threading.Thread(target=self.procesarComandos, daemon=True,
+                                     name=f"sesion-{idSesion}")
+        self.hilo.start()
+
+    # Método del hilo de la sesión: ejecuta los comandos en orden, uno a la vez.
+    def procesarComandos(self):
+        while True:
+            comando = self.comandos.get()
+            if comando is None:
+                break
+            futuro, funcion, args = comando
+            if not futuro.set_running_or_notify_cancel():
+                continue
+            try:
+                futuro.set_result(funcion(*args))
+            except Exception as e:
+                futuro.set_exception(e)
+
+        # Los comandos que quedaron después de cerrar la sesión ya no se ejecutan.
+        while not self.comandos.empty():
+            comando = self.comandos.get()
+            if comando is not None:
+                comando[0].set_exception(RuntimeError("Sesión cerrada"))
+
+    # Método que manda un comando al hilo de la sesión y regresa un Future con su resultado.
+    # Si se llama desde el mismo hilo de la sesión, se ejecuta directo.
+    def ejecutar(self, funcion, *args):
+        futuro = Future()
+        if self.cerrada:
+            futuro.set_exception(RuntimeError("Sesión cerrada"))
+            return futuro
+        if threading.current_thread() is self.hilo:
+            try:
+                futuro.set_result(funcion(*args))
+            except Exception as e:
+                futuro.set_exception(e)
+            return futuro
+        self.comandos.put((futuro, funcion, args))
+        return futuro
+
+    @property
+    def estado(self):
+        return self.publicado[1]
+
+    # Método que marca la sesión como usada.
+    def tocar(self):
+        self.ultimoAcceso = time.time()
+
+    # Método que indica si la sesión no se ha usado desde el límite dado.
+    # Una sesión con clientes conectados al stream no se considera inactiva.
+    def estaInactiva(self, limite):
+        return self.ultimoAcceso < limite and len(self.difusor) == 0
+
+    # Método que avanza un paso, publica el nuevo estado y lo manda a los suscriptores.
+    # Se ejecuta dentro del hilo de la sesión.
+    def procesarPaso(self):
+        if self.modelo.juegoTerminado:
+            return False
+        self.modelo.step()
+        self.publicado = (self.modelo, self.modelo.obtenerUltimoEstado(), self.publicado[2])
+        self.difusor.publicar(self.modelo)
+        return True
+
+    # Método que pide un paso al hilo de la sesión.
+    def avanzar(self):
+        return self.ejecutar(self.procesarPaso)
+
+    # Método que cambia el modelo por uno nuevo sin perder a los suscriptores.
+    # Se ejecuta dentro del hilo de la sesión.
+    def procesarReinicio(self, modelo, modo):
+        self.modelo = modelo
+        self.modo = modo
+        self.autoRun = False
+        self.publicado = (modelo, modelo.obtenerUltimoEstado(), self.publicado[2] + 1)
+        self.difusor.publicar(modelo, reinicio=True)
+
+    # Método que pide reiniciar la sesión con otro modelo.
+    def reiniciar(self, modelo, modo):
+        return self.ejecutar(self.procesarReinicio, modelo, modo)
+
+    # Método que libera los recursos de la sesión.
+    def cerrar(self):
+        self.cerrada = True
+        self.autoRun = False
+        self.difusor.cerrar()
+        self.comandos.put(None)
+
+    # Método que regresa los bytes que guarda el historial del modelo publicado,
+    # lo que crece con cada paso. Lee la cuenta que lleva el historial, así que
+    # no espera al hilo de la sesión y se puede llamar con el lock del gestor.
+    def memoriaHistorial(self):
+        historial = getattr(self.publicado[0], "estadosSimulacion", None)
+        return historial.bytes if historial is not None else 0
+
+    # Método que estima la memoria usada por el modelo y su historial recorriendo
+    # todo lo que contienen; espera a que el hilo de la sesión termine lo que
+    # tenga pendiente. Regresa None si la sesión se cerró antes de medirla.
+    # La plantilla del tablero es compartida entre modelos, así que no se cuenta.
+    def estimarMemoria(self):
+        def estimar():
+            vistos = set()
+            plantilla = getattr(self.modelo, "plantilla", None)
+            if plantilla is not None:
+                estimarTamano(plantilla, vistos)
+            return estimarTamano(self.modelo, vistos)
+        try:
+            return self.ejecutar(estimar).result()
+        except RuntimeError:
+            if self.cerrada:
+                return None
+            raise
+
+    # Método que resume la sesión para el endpoint de sesiones. Con incluirMemoria
+    # se agregan los bytes del historial; con estimarMemoria, además, la
+    # estimación completa (lenta: espera al hilo de la sesión).
+    def resumen(self, incluirMemoria=False, estimarMemoria=False):
+        estadisticas = self.estado["estadisticas"]
+        datos = {
+            "sesion": self.idSesion,
+            "modo": self.modo,
+            "turno": estadisticas["turno"],
+            "juego_terminado": estadisticas["juegoTerminado"],
+            "auto_run": self.autoRun,
+            "intervalo_auto_run": self.intervaloAutoRun,
+            "suscriptores": len(self.difusor),
+            "comandos_pendientes": self.comandos.qsize(),
+            "inactiva_segundos": round(time.time() - self.ultimoAcceso, 1)
+        }
+        if incluirMemoria:
+            datos["memoria_bytes"] = self.memoriaHistorial()
+        if estimarMemoria:
+            datos["memoria_estimada_bytes"] = self.estimarMemoria()
+        return datos
+
+class CGestorSesiones:
+    def __init__(self, maxSesiones=50, tiempoInactividad=1800, maxMemoria=None):
+        self.maxSesiones = maxSesiones
+        self.tiempoInactividad = tiempoInactividad
+        self.maxMemoria = maxMemoria
+        # El orden del diccionario es el orden de uso: la primera es la menos reciente.
+        self.sesiones = OrderedDict()
+        self.lock = threading.Lock()
+
+    # Método que registra un modelo nuevo. Si la sesión ya existía, se reinicia
+    # en su propio hilo y conserva a sus suscriptores.
+    def crearSesion(self, modelo, modo, idSesion=None):
+        if idSesion is None:
+            idSesion = uuid.uuid4().hex
+
+        with self.lock:
+            sesion = self.sesiones.get(idSesion)
+            if sesion is not None:
+                self.sesiones.move_to_end(idSesion)
+                sesion.tocar()
+            else:
+                sesion = CSesion(idSesion, modelo, modo)
+                self.sesiones[idSesion] = sesion
+                self.purgarInactivas()
+                while len(self.sesiones) > self.maxSesiones:
+                    self.sesiones.popitem(last=False)[1].cerrar()
+
+        if sesion.modelo is not modelo:
+            sesion.reiniciar(modelo, modo).result()
+        if self.maxMemoria is not None:
+            with self.lock:
+                self.desalojarPorMemoria(idSesion)
+        return sesion
+
+    # Método que regresa la sesión y la marca como la más reciente.
+    def obtenerSesion(self, idSesion):
+        with self.lock:
+            sesion = self.sesiones.get(idSesion)
+            if sesion is None:
+                return None
+            if sesion.estaInactiva(time.time() - self.tiempoInactividad):
+                del self.sesiones[idSesion]
+                sesion.cerrar()
+                return None
+            self.sesiones.move_to_end(idSesion)
+            sesion.tocar()
+            return sesion
+
+    # Método que elimina una sesión.
+    def eliminarSesion(self, idSesion):
+        with self.lock:
+            sesion = self.sesiones.pop(idSesion, None)
+        if sesion is None:
+            return False
+        sesion.cerrar()
+        return True
+
+    # Método que elimina las sesiones que pasaron el tiempo de inactividad.
+    # Se debe llamar con el lock tomado.
+    def purgarInactivas(self):
+        limite = time.time() - self.tiempoInactividad
+        for idSesion, sesion in list(self.sesiones.items()):
+            if sesion.estaInactiva(limite):
+                del self.sesiones[idSesion]
+                sesion.cerrar()
+
+    # Método que desaloja sesiones (de la menos reciente) hasta quedar bajo el límite de memoria.
+    # Usa la cuenta de bytes del historial de cada sesión, que se lee sin esperar a
+    # sus hilos: una sesión ocupada no detiene al gestor.
+    # Se debe llamar con el lock tomado.
+    def desalojarPorMemoria(self, idProtegida):
+        memorias = {idSesion: sesion.memoriaHistorial() for idSesion, sesion in self.sesiones.items()}
+        total = sum(memorias.values())
+        for idSesion in list(self.sesiones.keys()):
+            if total <= self.maxMemoria:
+                break
+            if idSesion == idProtegida:
+                continue
+            self.sesiones.pop(idSesion).cerrar()
+            total -= memorias[idSesion]
+
+    # Método que regresa una copia de las sesiones vivas.
+    def listarSesiones(self):
+        with self.lock:
+            self.purgarInactivas()
+            return list(self.sesiones.values())
+
+    def __len__(self):
+        return len(self.sesiones)
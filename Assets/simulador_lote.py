@@ -0,0 +1,834 @@
+# ======================================
+# ===== Simulador de Juegos en Lote ====
+# ======================================
+
+# Avanza muchos juegos independientes a la vez, todos en el mismo turno. Cada
+# capa del tablero es un arreglo de NumPy de (juegos, celdas) y las reglas de
+# los bomberos se aplican a todos los juegos juntos; los juegos que ya
+# terminaron se quedan fuera con una máscara.
+#
+# Las reglas son las de CJuego y sus bomberos, pero las elecciones aleatorias
+# salen de otro generador: un juego no se repite paso por paso, lo que coincide
+# es la distribución de los resultados. Además:
+#   - Entre rutas del mismo costo gana la que toma primero el vecino de la
+#     izquierda, luego arriba, abajo y derecha (calcularRuta depende del heap).
+#   - En un empate de distancia al elegir objetivo gana la celda de menor
+#     índice, igual que en el modelo (ordenCelda).
+#   - Cada bombero hace una sola acción por turno y ninguna cuesta más de 4
+#     puntos, así que los puntos de acción no se llevan. Solo el salvador y el
+#     abre puertas siguen moviéndose en su turno con los puntos que les quedan.
+#
+#   python simulador_lote.py 10000     compara las dos estrategias con 10000 juegos
+
+import sys
+import time
+
+import numpy as np
+
+from analisis import analizarResultados
+from reto import RESULTADO_TOPE_TURNOS, CModoAgente, CTipoBombero, obtenerPlantilla
+
+# Contenido de una celda en la capa de POIs.
+SIN_POI = 0
+POI_VICTIMA = 1
+POI_FALSA_ALARMA = 2
+
+# Estados de los bomberos (los de CEstadoBombero que usan las reglas).
+ESTADO_AFK = 0
+ESTADO_MOVIENDOSE = 1
+ESTADO_LLEVANDO_VICTIMA = 2
+
+# Resultado de cada juego: 0 mientras sigue, luego el índice de su texto. Un
+# juego que sigue al final de runModel se cortó por el tope de turnos.
+RESULTADOS = (RESULTADO_TOPE_TURNOS, "🏆.", "💀.", "💥.")
+
+# Tipo de cada bombero del equipo, en el orden de crearBomberos.
+TIPOS_BOMBERO = tuple(CTipoBombero)
+EQUIPO = np.array([TIPOS_BOMBERO.index(tipo) for tipo in (
+    CTipoBombero.APAGAFUEGOS, CTipoBombero.APAGAFUEGOS,
+    CTipoBombero.BUSCADOR, CTipoBombero.BUSCADOR,
+    CTipoBombero.SALVADOR, CTipoBombero.ABRE_PUERTAS)])
+# Bomberos que se mueven con todos sus puntos de acción (CSalvador y sus hijos).
+RESCATISTAS = np.isin(EQUIPO, [TIPOS_BOMBERO.index(CTipoBombero.SALVADOR),
+                               TIPOS_BOMBERO.index(CTipoBombero.ABRE_PUERTAS)])
+
+# Puntos de acción de cada bombero por turno (maxPuntosAccion de CBombero).
+PUNTOS_ACCION = 4
+
+# Juegos por celdas que se buscan juntos en objetivoCercano (acota la memoria de
+# la búsqueda en lotes grandes o tableros grandes).
+CELDAS_POR_BLOQUE_BUSQUEDA = 1 << 18
+
+# Modo de los bomberos para cada tipo de solución de ejecutarMultiplesIteraciones.
+MODOS_SOLUCION = {"aleatoria": CModoAgente.ALEATORIO, "estrategica": CModoAgente.ESTRATEGIA}
+
+class CSimuladorLote:
+    def __init__(self, archivoConfiguracion, numJuegos, modo=CModoAgente.ESTRATEGIA, semilla=None):
+        self.plantilla = obtenerPlantilla(archivoConfiguracion)
+        self.numJuegos = numJuegos
+        self.modo = modo
+        self.random = np.random.default_rng(semilla)
+
+        # Configuración del family game setup (la misma de CJuego).
+        self.maxPuntosDano = 24
+        self.maxVictimasPerdidas = 4
+        self.victimasParaGanar = 7
+        self.maxPoisActivos = 3
+        self.maxVictimasEncontradas = 2
+
+        self.prepararTablero()
+        self.prepararJuegos()
+
+        # Acción de cada tipo de bombero según el modo.
+        if modo == CModoAgente.ALEATORIO:
+            acciones = {
+                CTipoBombero.APAGAFUEGOS: self.actuarApagafuegosAleatorio,
+                CTipoBombero.BUSCADOR: self.actuarBuscadorAleatorio,
+                CTipoBombero.SALVADOR: self.actuarSalvadorAleatorio,
+                CTipoBombero.ABRE_PUERTAS: self.actuarAbrePuertasAleatorio
+            }
+        else:
+            acciones = {
+                CTipoBombero.APAGAFUEGOS: self.actuarApagafuegos,
+                CTipoBombero.BUSCADOR: self.actuarBuscador,
+                CTipoBombero.SALVADOR: self.actuarSalvador,
+                CTipoBombero.ABRE_PUERTAS: self.actuarAbrePuertas
+            }
+        self.acciones = tuple(acciones[tipo] for tipo in TIPOS_BOMBERO)
+
+    # ======================================
+    # ========= Tablero y Juegos ===========
+    # ======================================
+
+    # Método que convierte la plantilla en arreglos por celda (índice y * ancho + x).
+    # Todos llevan una celda extra al final (índice numCeldas) que hace de vecino
+    # inexistente: nunca es piso, nunca se descubre y nunca tiene fuego.
+    def prepararTablero(self):
+        plantilla = self.plantilla
+        self.ancho, self.alto = plantilla.ancho, plantilla.alto
+        numCeldas = self.numCeldas = plantilla.ancho * plantilla.alto
+        indices = plantilla.indices
+
+        self.xs = np.array([x for x, y in plantilla.posiciones])
+        self.ys = np.array([y for x, y in plantilla.posiciones])
+        self.piso = np.zeros(numCeldas + 1, dtype=bool)
+        self.piso[:numCeldas] = [plantilla.gridPiso.get(pos, False) for pos in plantilla.posiciones]
+        self.entradas = np.zeros(numCeldas + 1, dtype=bool)
+        self.entradas[[indices[pos] for pos in plantilla.entradas]] = True
+
+        # Vecinos de cada celda en el orden de adyacentes (izquierda, arriba,
+        # abajo, derecha); el que no existe apunta a la celda extra.
+        self.vecinos = np.full((numCeldas, 4), numCeldas)
+        # Si se puede pasar a cada vecino sin contar puertas, y de qué lado hay puerta.
+        self.abierto = np.zeros((numCeldas, 4), dtype=bool)
+        self.puertaPropia = np.zeros((numCeldas, 4), dtype=bool)
+        self.puertaVecina = np.zeros((numCeldas, 4), dtype=bool)
+        for pos, i in indices.items():
+            x, y = pos
+            pasos = dict(plantilla.pasos[pos])
+            for k, vecino in enumerate(((x - 1, y), (x, y - 1), (x, y + 1), (x + 1, y))):
+                if vecino not in indices:
+                    continue
+                self.vecinos[i, k] = indices[vecino]
+                if vecino in pasos:
+                    self.abierto[i, k] = True
+                    self.puertaPropia[i, k] = pos in pasos[vecino]
+                    self.puertaVecina[i, k] = vecino in pasos[vecino]
+        self.conPuerta = self.puertaPropia | self.puertaVecina
+
+        # Tablero con un borde de celdas extra alrededor para las rutas: celda de
+        # cada lugar (la extra en el borde), lugar de cada celda, desplazamiento a
+        # cada vecino y banda de lugares que va de la primera a la última celda.
+        anchoBorde = self.ancho + 2
+        self.celdaConBorde = np.full(anchoBorde * (self.alto + 2), numCeldas)
+        self.bordeDeCelda = (self.ys + 1) * anchoBorde + self.xs + 1
+        self.celdaConBorde[self.bordeDeCelda] = np.arange(numCeldas)
+        self.desplazamientos = np.array([-1, -anchoBorde, anchoBorde, 1])
+        self.banda = slice(anchoBorde + 1, len(self.celdaConBorde) - anchoBorde - 1)
+        celdasBanda = self.celdaConBorde[self.banda]
+        sinCelda = np.zeros((1, 4), dtype=bool)
+        self.abiertoBanda = np.vstack((self.abierto, sinCelda))[celdasBanda].T.copy()
+        self.conPuertaBanda = np.vstack((self.conPuerta, sinCelda))[celdasBanda].T.copy()
+        self.puertaPropiaBanda = np.vstack((self.puertaPropia, sinCelda))[celdasBanda].T.copy()
+        self.puertaVecinaBanda = np.vstack((self.puertaVecina, sinCelda))[celdasBanda].T.copy()
+
+        # Las distancias caben en 16 bits en tableros chicos. sinRuta marca un paso
+        # o una ruta imposible: es mayor que cualquier ruta real y la suma de dos
+        # no se desborda.
+        self.tipoDistancia = np.int16 if 2 * numCeldas < (1 << 13) else np.int32
+        self.sinRuta = np.iinfo(self.tipoDistancia).max // 2
+
+    # Método que arma el estado inicial de todos los juegos, en el mismo orden que
+    # CJuego: configuración, bomberos, POIs, celdas descubiertas y humo inicial.
+    def prepararJuegos(self):
+        plantilla = self.plantilla
+        indices = plantilla.indices
+        numJuegos, numCeldas = self.numJuegos, self.numCeldas
+        forma = (numJuegos, numCeldas + 1)
+
+        self.descubiertas = np.zeros(forma, dtype=bool)
+        self.fuego = np.zeros(forma, dtype=bool)
+        self.humo = np.zeros(forma, dtype=bool)
+        self.pois = np.zeros(forma, dtype=np.int8)
+        self.victimasEncontradasPosiciones = np.zeros(forma, dtype=bool)
+        self.puertasCerradas = np.zeros(forma, dtype=bool)
+
+        self.fuego[:, [indices[pos] for pos in plantilla.fuegosIniciales]] = True
+        self.puertasCerradas[:, [indices[pos] for pos in plantilla.puertasIniciales]] = True
+        for pos, tipo in plantilla.poisIniciales.items():
+            self.pois[:, indices[pos]] = POI_VICTIMA if tipo == "victima" else POI_FALSA_ALARMA
+
+        # Contadores de cada juego.
+        self.turno = np.zeros(numJuegos, dtype=np.int64)
+        self.victimasRescatadas = np.zeros(numJuegos, dtype=np.int64)
+        self.victimasPerdidas = np.zeros(numJuegos, dtype=np.int64)
+        self.puntosDano = np.zeros(numJuegos, dtype=np.int64)
+        self.victimasEncontradas = np.zeros(numJuegos, dtype=np.int64)
+        self.resultado = np.zeros(numJuegos, dtype=np.int8)
+        self.juegoTerminado = np.zeros(numJuegos, dtype=bool)
+
+        # Bomberos: (juegos, bomberos del equipo).
+        forma = (numJuegos, len(EQUIPO))
+        self.posiciones = np.zeros(forma, dtype=np.int64)
+        self.estados = np.full(forma, ESTADO_AFK, dtype=np.int8)
+        self.objetivos = np.full(forma, -1, dtype=np.int64)
+        self.llevandoVictima = np.zeros(forma, dtype=bool)
+
+        # Ruta guardada de cada bombero, como en CBombero: celdas y costo de cada
+        # paso (crecen al largo de la ruta más larga), cuántos pasos tiene, cuántos
+        # lleva, objetivo, celda desde la que sigue y versión de las puertas.
+        self.rutas = np.zeros(forma + (0,), dtype=np.int64)
+        self.costosRuta = np.zeros(forma + (0,), dtype=np.int8)
+        self.largoRuta = np.zeros(forma, dtype=np.int64)
+        self.pasoRuta = np.zeros(forma, dtype=np.int64)
+        self.objetivoRuta = np.full(forma, -1, dtype=np.int64)
+        self.inicioRuta = np.full(forma, -1, dtype=np.int64)
+        self.versionRuta = np.zeros(forma, dtype=np.int64)
+        # Puertas abiertas en cada juego.
+        self.versionPuertas = np.zeros(numJuegos, dtype=np.int64)
+        # Bomberos que se mueven hacia su objetivo al terminar el turno en curso.
+        self.avancesPendientes = []
+
+        # Cada bombero cae en una celda de piso sin fuego, POI ni puerta cerrada.
+        todos = np.arange(numJuegos)
+        for agente in range(len(EQUIPO)):
+            opciones = self.piso & ~self.fuego & (self.pois == SIN_POI) & ~self.puertasCerradas
+            celdas, hay = self.elegirAlAzar(opciones)
+            self.posiciones[:, agente] = np.where(hay, celdas, 0)
+
+        # POIs iniciales.
+        while True:
+            faltan = todos[(self.pois[:, :numCeldas] != SIN_POI).sum(axis=1) < self.maxPoisActivos]
+            if not len(faltan) or not self.generarNuevoPoi(faltan).any():
+                break
+
+        # Celdas descubiertas: las entradas y sus vecinas.
+        entradas = np.flatnonzero(self.entradas)
+        self.descubiertas[:, entradas] = True
+        self.descubiertas[:, self.vecinos[entradas].ravel()] = True
+        self.descubiertas[:, numCeldas] = False
+
+        # Humo inicial: vecinos de piso del fuego que no tienen fuego.
+        fuego = np.flatnonzero(self.fuego[0, :numCeldas])
+        humo = np.unique(self.vecinos[fuego].ravel())
+        self.humo[:, humo] = True
+        self.humo &= self.piso & ~self.fuego
+
+    # Método que elige al azar una opción verdadera por fila de la máscara.
+    # Regresa la columna elegida y si la fila tenía alguna opción.
+    def elegirAlAzar(self, opciones):
+        pesos = self.random.random(opciones.shape)
+        pesos[~opciones] = -1.0
+        return pesos.argmax(axis=1), opciones.any(axis=1)
+
+    # Método que pone un POI nuevo en una celda libre de cada juego dado (piso sin
+    # POI, fuego, humo, entrada ni puerta cerrada). Regresa en qué juegos se pudo.
+    def generarNuevoPoi(self, juegos):
+        libres = (self.piso & ~self.entradas & (self.pois[juegos] == SIN_POI) &
+                  ~self.fuego[juegos] & ~self.humo[juegos] & ~self.puertasCerradas[juegos])
+        celdas, hay = self.elegirAlAzar(libres)
+        juegos, celdas = juegos[hay], celdas[hay]
+        tipos = np.where(self.random.random(len(juegos)) < 0.6, POI_VICTIMA, POI_FALSA_ALARMA)
+        self.pois[juegos, celdas] = tipos
+        return hay
+
+    # Método que descubre la celda (si se pide) y sus vecinas en cada juego.
+    def descubrirAlrededor(self, juegos, celdas, incluirCelda=True):
+        if incluirCelda:
+            self.descubiertas[juegos, celdas] = True
+        self.descubiertas[juegos[:, None], self.vecinos[celdas]] = True
+        self.descubiertas[:, self.numCeldas] = False
+
+    # ======================================
+    # ========= Acciones Comunes ===========
+    # ======================================
+
+    # Método que apaga el fuego de la celda del bombero o, si no hay, el de la
+    # primera vecina con fuego. Regresa en qué juegos se apagó.
+    def apagarFuego(self, juegos, agentes):
+        posiciones = self.posiciones[juegos, agentes]
+        candidatas = np.concatenate((posiciones[:, None], self.vecinos[posiciones]), axis=1)
+        conFuego = self.fuego[juegos[:, None], candidatas]
+        hay = conFuego.any(axis=1)
+        celdas = candidatas[np.arange(len(juegos)), conFuego.argmax(axis=1)][hay]
+        self.fuego[juegos[hay], celdas] = False
+        self.humo[juegos[hay], celdas] = True
+        return hay
+
+    # Método que revela el POI de la celda del bombero. Regresa en qué juegos ya
+    # no hay nada más que hacer en el turno: falsa alarma o víctima marcada. Una
+    # víctima que ya no cabe en los marcadores se pierde sin contar y el bombero
+    # sigue con su turno.
+    def buscarPoi(self, juegos, agentes):
+        posiciones = self.posiciones[juegos, agentes]
+        tipos = self.pois[juegos, posiciones]
+        hay = tipos != SIN_POI
+        juegosPoi, celdas, tipos = juegos[hay], posiciones[hay], tipos[hay]
+        self.pois[juegosPoi, celdas] = SIN_POI
+        self.generarNuevoPoi(juegosPoi)
+
+        victima = tipos == POI_VICTIMA
+        marcar = victima & (self.victimasEncontradas[juegosPoi] < self.maxVictimasEncontradas)
+        self.victimasEncontradasPosiciones[juegosPoi[marcar], celdas[marcar]] = True
+        self.victimasEncontradas[juegosPoi[marcar]] += 1
+
+        hecho = np.zeros(len(juegos), dtype=bool)
+        hecho[hay] = ~victima | marcar
+        return hecho
+
+    # Método que entrega la víctima que lleva el bombero si está en una entrada.
+    def entregarVictima(self, juegos, agentes):
+        entrega = (self.llevandoVictima[juegos, agentes] &
+                   self.entradas[self.posiciones[juegos, agentes]])
+        juegosEntrega, agentesEntrega = juegos[entrega], agentes[entrega]
+        self.victimasRescatadas[juegosEntrega] += 1
+        encontradas = self.victimasEncontradas[juegosEntrega]
+        self.victimasEncontradas[juegosEntrega] = np.maximum(encontradas - 1, 0)
+        self.llevandoVictima[juegosEntrega, agentesEntrega] = False
+        self.estados[juegosEntrega, agentesEntrega] = ESTADO_AFK
+        self.objetivos[juegosEntrega, agentesEntrega] = -1
+        return entrega
+
+    # Método que recoge la víctima encontrada de la celda del bombero y lo manda
+    # a la entrada más cercana con ruta (si no hay, la vuelve a buscar en su turno).
+    def recogerVictima(self, juegos, agentes):
+        posiciones = self.posiciones[juegos, agentes]
+        recoge = ~self.llevandoVictima[juegos, agentes] & self.victimasEncontradasPosiciones[juegos, posiciones]
+        juegosRecoge, agentesRecoge = juegos[recoge], agentes[recoge]
+        self.victimasEncontradasPosiciones[juegosRecoge, posiciones[recoge]] = False
+        self.llevandoVictima[juegosRecoge, agentesRecoge] = True
+        self.estados[juegosRecoge, agentesRecoge] = ESTADO_LLEVANDO_VICTIMA
+        self.objetivos[juegosRecoge, agentesRecoge] = self.entradaCercana(juegosRecoge, posiciones[recoge])
+        return recoge
+
+    # Método que abre la puerta de la celda del bombero y descubre sus vecinas.
+    def abrirPuerta(self, juegos, agentes):
+        posiciones = self.posiciones[juegos, agentes]
+        abre = self.puertasCerradas[juegos, posiciones]
+        self.puertasCerradas[juegos[abre], posiciones[abre]] = False
+        self.versionPuertas[juegos[abre]] += 1
+        self.descubrirAlrededor(juegos[abre], posiciones[abre], incluirCelda=False)
+        return abre
+
+    # Método que mueve a cada bombero a una vecina descubierta al azar.
+    def movimientoAleatorio(self, juegos, agentes):
+        vecinos = self.vecinos[self.posiciones[juegos, agentes]]
+        eleccion, hay = self.elegirAlAzar(self.descubiertas[juegos[:, None], vecinos])
+        nuevas = vecinos[np.arange(len(juegos)), eleccion][hay]
+        self.posiciones[juegos[hay], agentes[hay]] = nuevas
+        self.descubrirAlrededor(juegos[hay], nuevas)
+
+    # ======================================
+    # ========= Rutas y Objetivos ==========
+    # ======================================
+
+    # Método que calcula la ruta más barata de cada bombero a su objetivo
+    # (Bellman-Ford en todos los juegos a la vez, desde el objetivo). Las reglas
+    # de paso son las de calcularRuta: sin cruzar paredes, entrar a una celda con
+    # fuego o humo cuesta 2 y pasar por una puerta cerrada de los dos lados cuesta
+    # 1 más. Regresa las celdas de cada ruta, el costo de entrar a cada una (sin
+    # la puerta, como costosRuta de CBombero) y cuántos pasos tiene (0 si no hay
+    # ruta).
+    # Se trabaja sobre el tablero con borde, así que los vecinos de toda la banda
+    # de celdas son la misma banda desplazada.
+    def calcularRutas(self, juegos, posiciones, objetivos):
+        filas = np.arange(len(juegos))
+        inicio, fin = self.banda.start, self.banda.stop
+        sinRuta = self.sinRuta
+        celdas = self.celdaConBorde
+
+        cerradas = self.puertasCerradas[juegos][:, celdas]
+        costos = ((self.fuego[juegos] | self.humo[juegos]).astype(self.tipoDistancia) + 1)[:, celdas]
+
+        # costosPaso[k][juego, b]: costo de ir de la celda b de la banda a su vecino k
+        # (sinRuta si no se puede).
+        costosPaso = np.empty((4, len(juegos), fin - inicio), dtype=self.tipoDistancia)
+        for k, desplazamiento in enumerate(self.desplazamientos):
+            vecinas = slice(inicio + desplazamiento, fin + desplazamiento)
+            puerta = self.conPuertaBanda[k] & (~self.puertaPropiaBanda[k] | cerradas[:, inicio:fin]) & \
+                     (~self.puertaVecinaBanda[k] | cerradas[:, vecinas])
+            np.copyto(costosPaso[k], np.where(self.abiertoBanda[k], costos[:, vecinas] + puerta, sinRuta))
+
+        # distancias[c]: costo mínimo de c al objetivo sin contar la celda c. Después
+        # de la vuelta i ya son exactas las rutas de hasta i pasos, y como cada paso
+        # cuesta al menos 1, un juego termina cuando i alcanza la distancia de la
+        # posición del bombero: las celdas de sus rutas de ese costo ya no cambian.
+        # Los juegos que terminan salen de los arreglos de trabajo cuando ya son al
+        # menos la cuarta parte; mientras, siguen relajándose sin que cambie la
+        # ruta que se extrae (sus vecinos óptimos ya tienen distancia exacta).
+        posiciones = self.bordeDeCelda[posiciones]
+        objetivos = self.bordeDeCelda[objetivos]
+        distancias = np.full((len(juegos), len(celdas)), sinRuta, dtype=self.tipoDistancia)
+        distancias[filas, objetivos] = 0
+        pendientes, trabajo, costosTrabajo, inicios = filas, distancias.copy(), costosPaso, posiciones
+        activas = np.ones(len(filas), dtype=bool)
+        vuelta = 0
+        while len(pendientes):
+            vuelta += 1
+            anteriores = trabajo[:, inicio:fin]
+            nuevas = anteriores.copy()
+            suma = np.empty_like(nuevas)
+            for k, desplazamiento in enumerate(self.desplazamientos):
+                np.add(costosTrabajo[k], trabajo[:, inicio + desplazamiento:fin + desplazamiento], out=suma)
+                np.minimum(nuevas, suma, out=nuevas)
+            activas &= (nuevas < anteriores).any(axis=1)
+            trabajo[:, inicio:fin] = nuevas
+            activas &= trabajo[np.arange(len(pendientes)), inicios] > vuelta
+            if np.count_nonzero(activas) * 4 <= len(pendientes) * 3:
+                distancias[pendientes[~activas]] = trabajo[~activas]
+                pendientes, trabajo, inicios = pendientes[activas], trabajo[activas], inicios[activas]
+                costosTrabajo = costosTrabajo[:, activas]
+                activas = activas[activas]
+
+        # Se siguen las rutas paso a paso; en un empate gana el primer vecino.
+        largos = np.zeros(len(juegos), dtype=np.int64)
+        rutas, costosRutas = [], []
+        actuales, siguen = posiciones, filas
+        while len(siguen):
+            costosVecinos = costosPaso[:, siguen, actuales - inicio].T
+            totales = costosVecinos + distancias[siguen[:, None], actuales[:, None] + self.desplazamientos]
+            mejor = totales.argmin(axis=1)
+            conRuta = totales[np.arange(len(siguen)), mejor] < sinRuta
+            siguen, actuales, mejor = siguen[conRuta], actuales[conRuta], mejor[conRuta]
+            actuales = actuales + self.desplazamientos[mejor]
+
+            paso = np.zeros(len(juegos), dtype=np.int64)
+            costoPaso = np.zeros(len(juegos), dtype=np.int8)
+            paso[siguen] = celdas[actuales]
+            costoPaso[siguen] = costos[siguen, actuales]
+            rutas.append(paso)
+            costosRutas.append(costoPaso)
+            largos[siguen] += 1
+            faltan = actuales != objetivos[siguen]
+            siguen, actuales = siguen[faltan], actuales[faltan]
+
+        if not rutas:
+            return np.zeros((len(juegos), 0), dtype=np.int64), np.zeros((len(juegos), 0), dtype=np.int8), largos
+        return np.stack(rutas, axis=1), np.stack(costosRutas, axis=1), largos
+
+    # Método que regresa el siguiente paso de cada bombero hacia su objetivo y si
+    # es de su ruta guardada. La ruta se vuelve a calcular cuando ya no sirve, con
+    # las mismas condiciones de rutaVigente: otro objetivo u otra posición, una
+    # puerta abierta desde entonces o un cambio de costo en las celdas que faltan.
+    # Sin ruta el siguiente paso es la misma posición.
+    def siguientePaso(self, juegos, agentes, posiciones, objetivos):
+        pasos = self.pasoRuta[juegos, agentes]
+        largos = self.largoRuta[juegos, agentes]
+        vigentes = ((self.objetivoRuta[juegos, agentes] == objetivos) &
+                    (self.inicioRuta[juegos, agentes] == posiciones) &
+                    (self.versionRuta[juegos, agentes] == self.versionPuertas[juegos]) &
+                    (pasos < largos))
+        largoMaximo = self.rutas.shape[2]
+        if largoMaximo:
+            celdasRuta = self.rutas[juegos, agentes]
+            costosActuales = (self.fuego[juegos[:, None], celdasRuta] | self.humo[juegos[:, None], celdasRuta]) + 1
+            indices = np.arange(largoMaximo)
+            faltan = (indices >= pasos[:, None]) & (indices < largos[:, None])
+            vigentes &= ~((costosActuales != self.costosRuta[juegos, agentes]) & faltan).any(axis=1)
+
+        nuevas = np.flatnonzero(~vigentes)
+        if len(nuevas):
+            rutas, costos, largosNuevos = self.calcularRutas(juegos[nuevas], posiciones[nuevas], objetivos[nuevas])
+            if rutas.shape[1] > largoMaximo:
+                crecer = ((0, 0), (0, 0), (0, rutas.shape[1] - largoMaximo))
+                self.rutas = np.pad(self.rutas, crecer)
+                self.costosRuta = np.pad(self.costosRuta, crecer)
+                largoMaximo = rutas.shape[1]
+            juegosNuevos, agentesNuevos = juegos[nuevas], agentes[nuevas]
+            self.rutas[juegosNuevos, agentesNuevos, :rutas.shape[1]] = rutas
+            self.costosRuta[juegosNuevos, agentesNuevos, :rutas.shape[1]] = costos
+            self.largoRuta[juegosNuevos, agentesNuevos] = largosNuevos
+            self.pasoRuta[juegosNuevos, agentesNuevos] = 0
+            self.objetivoRuta[juegosNuevos, agentesNuevos] = objetivos[nuevas]
+            self.inicioRuta[juegosNuevos, agentesNuevos] = posiciones[nuevas]
+            self.versionRuta[juegosNuevos, agentesNuevos] = self.versionPuertas[juegosNuevos]
+            pasos[nuevas] = 0
+            largos[nuevas] = largosNuevos
+
+        porRuta = pasos < largos
+        siguientes = posiciones.copy()
+        siguientes[porRuta] = self.rutas[juegos[porRuta], agentes[porRuta], pasos[porRuta]]
+        return siguientes, porRuta
+
+    # Método que mueve un paso a cada bombero hacia su objetivo si le alcanzan los
+    # puntos (puntos, uno por bombero, se descuenta). Regresa en qué juegos el
+    # bombero ya está en el objetivo y en cuáles dio el paso. El que no tiene ruta
+    # se queda en su lugar y suelta el objetivo (soltarObjetivo de CBombero). El
+    # que cruza una puerta cerrada la abre al pasar, sin invalidar su propia ruta.
+    def moverseAlObjetivo(self, juegos, agentes, puntos):
+        posiciones = self.posiciones[juegos, agentes]
+        objetivos = self.objetivos[juegos, agentes]
+        self.descubrirAlrededor(juegos, posiciones)
+        llego = posiciones == objetivos
+        movio = np.zeros(len(juegos), dtype=bool)
+        mover = np.flatnonzero(~llego)
+        juegos, agentes = juegos[mover], agentes[mover]
+        posiciones, objetivos = posiciones[mover], objetivos[mover]
+
+        siguientes, porRuta = self.siguientePaso(juegos, agentes, posiciones, objetivos)
+        sinRuta = ~porRuta
+        juegosSin, agentesSin = juegos[sinRuta], agentes[sinRuta]
+        self.objetivos[juegosSin, agentesSin] = -1
+        cargando = self.estados[juegosSin, agentesSin] == ESTADO_LLEVANDO_VICTIMA
+        self.estados[juegosSin[~cargando], agentesSin[~cargando]] = ESTADO_AFK
+
+        puede = porRuta & self.descubiertas[juegos, siguientes]
+        mover = mover[puede]
+        juegos, agentes, posiciones, siguientes = juegos[puede], agentes[puede], posiciones[puede], siguientes[puede]
+        puertas = self.puertaDelPaso(juegos, posiciones, siguientes)
+        costos = (self.fuego[juegos, siguientes] | self.humo[juegos, siguientes]) + 1 + (puertas >= 0)
+        alcanza = puntos[mover] >= costos
+        mover, costos, puertas = mover[alcanza], costos[alcanza], puertas[alcanza]
+        juegos, agentes, siguientes = juegos[alcanza], agentes[alcanza], siguientes[alcanza]
+        puntos[mover] -= costos
+
+        abre = puertas >= 0
+        juegosAbre = juegos[abre]
+        self.puertasCerradas[juegosAbre, puertas[abre]] = False
+        self.versionPuertas[juegosAbre] += 1
+        self.versionRuta[juegosAbre, agentes[abre]] = self.versionPuertas[juegosAbre]
+
+        self.posiciones[juegos, agentes] = siguientes
+        self.pasoRuta[juegos, agentes] += 1
+        self.inicioRuta[juegos, agentes] = siguientes
+        self.descubrirAlrededor(juegos, siguientes)
+        llego[mover] = siguientes == objetivos[puede][alcanza]
+        movio[mover] = True
+        return llego, movio
+
+    # Método que regresa la celda de puerta que hay que abrir para dar cada paso, o
+    # -1 si no cruza una puerta cerrada de los dos lados (puertaCerradaEntre de
+    # CJuego: la del lado de la posición si la tiene).
+    def puertaDelPaso(self, juegos, posiciones, siguientes):
+        direcciones = (self.vecinos[posiciones] == siguientes[:, None]).argmax(axis=1)
+        propia = self.puertaPropia[posiciones, direcciones]
+        vecina = self.puertaVecina[posiciones, direcciones]
+        cerradas = self.puertasCerradas
+        cruza = ((propia | vecina) & (~propia | cerradas[juegos, posiciones]) &
+                 (~vecina | cerradas[juegos, siguientes]))
+        return np.where(cruza, np.where(propia, posiciones, siguientes), -1)
+
+    # Método que regresa, para cada juego, la celda fuente más cercana a la
+    # posición con ruta hasta ella (BFS desde la posición sin cruzar paredes; las
+    # puertas se pueden abrir, igual que en el campo de distancias del modelo) y
+    # si había alguna. En un empate gana la fuente de menor índice (argmax regresa
+    # la primera). Los juegos se buscan por bloques de unas
+    # CELDAS_POR_BLOQUE_BUSQUEDA celdas para no armar arreglos de (juegos, celdas)
+    # de todo el lote a la vez.
+    def objetivoCercano(self, juegos, fuentes, posiciones):
+        objetivos = np.full(len(juegos), -1, dtype=np.int64)
+        bloque = max(1, CELDAS_POR_BLOQUE_BUSQUEDA // (self.numCeldas + 1))
+        for inicio in range(0, len(juegos), bloque):
+            fin = inicio + bloque
+            objetivos[inicio:fin] = self.buscarObjetivosBloque(juegos[inicio:fin], fuentes[inicio:fin],
+                                                               posiciones[inicio:fin])
+        return objetivos, objetivos >= 0
+
+    # Método que hace la búsqueda de objetivoCercano para un bloque de juegos.
+    # Los juegos que siguen buscando se mantienen al principio de los arreglos,
+    # que se reusan en cada nivel del BFS; el frente avanza una dirección a la vez
+    # con los pasos del plano (self.abierto), que son los mismos en todos los juegos.
+    def buscarObjetivosBloque(self, juegos, fuentes, posiciones):
+        numCeldas = self.numCeldas
+        objetivos = np.full(len(juegos), -1, dtype=np.int64)
+        pendientes = np.arange(len(juegos))
+        permitidos = self.abierto.T.copy()
+        fuentes = np.array(fuentes, dtype=bool)
+        frente = np.zeros((len(juegos), numCeldas + 1), dtype=bool)
+        frente[pendientes, posiciones] = True
+        alcanzadas = frente.copy()
+        nuevas = np.zeros_like(frente)
+        desdeVecino = np.empty((len(juegos), numCeldas), dtype=bool)
+        while len(pendientes):
+            k = len(pendientes)
+            enFuente = frente[:k] & fuentes[:k]
+            hay = enFuente.any(axis=1)
+            objetivos[pendientes[hay]] = enFuente[hay].argmax(axis=1)
+            # Los pasos son simétricos: se llega a una celda desde un vecino del frente.
+            nuevas[:k, :numCeldas] = False
+            for direccion in range(4):
+                np.take(frente[:k], self.vecinos[:, direccion], axis=1, out=desdeVecino[:k], mode="clip")
+                desdeVecino[:k] &= permitidos[direccion]
+                nuevas[:k, :numCeldas] |= desdeVecino[:k]
+            np.greater(nuevas[:k], alcanzadas[:k], out=nuevas[:k])  # nuevas & ~alcanzadas
+            alcanzadas[:k] |= nuevas[:k]
+            frente, nuevas = nuevas, frente
+            sigue = ~hay & frente[:k].any(axis=1)
+            if not sigue.all():
+                pendientes = pendientes[sigue]
+                for arreglo in (frente, alcanzadas, fuentes):
+                    arreglo[:len(pendientes)] = arreglo[:k][sigue]
+        return objetivos
+
+    # Método que regresa la entrada más cercana con ruta desde cada posición (-1 si no hay).
+    def entradaCercana(self, juegos, posiciones):
+        entradas = np.broadcast_to(self.entradas, (len(juegos), self.numCeldas + 1))
+        return self.objetivoCercano(juegos, entradas, posiciones)[0]
+
+    # Método que regresa las celdas que puede buscar cada bombero según su tipo de objetivo.
+    def fuentesObjetivo(self, tipo, juegos):
+        descubiertas = self.descubiertas[juegos]
+        if tipo == "fuego":
+            return self.fuego[juegos] & descubiertas
+        if tipo == "pois":
+            return (self.pois[juegos] != SIN_POI) & descubiertas
+        if tipo == "victimas":
+            return self.victimasEncontradasPosiciones[juegos]
+        # Piso sin descubrir.
+        return self.piso & ~descubiertas
+
+    # Método que le da objetivo a los bomberos sin nada que hacer: el más cercano
+    # de su tipo con ruta o, si no hay, la celda de piso sin descubrir más cercana
+    # (elegirObjetivo de CBombero).
+    def buscarObjetivo(self, juegos, agentes, tipo):
+        afk = self.estados[juegos, agentes] == ESTADO_AFK
+        juegos, agentes = juegos[afk], agentes[afk]
+        posiciones = self.posiciones[juegos, agentes]
+        objetivos, hay = self.objetivoCercano(juegos, self.fuentesObjetivo(tipo, juegos), posiciones)
+        explorar = ~hay
+        if explorar.any():
+            juegosExplorar = juegos[explorar]
+            objetivos[explorar], hay[explorar] = self.objetivoCercano(
+                juegosExplorar, self.fuentesObjetivo("exploracion", juegosExplorar), posiciones[explorar])
+        self.objetivos[juegos[hay], agentes[hay]] = objetivos[hay]
+        self.estados[juegos[hay], agentes[hay]] = ESTADO_MOVIENDOSE
+
+    # Método que anota a los bomberos que van hacia su objetivo (o hacia la
+    # entrada con una víctima). Se mueven todos juntos al final de su turno.
+    def avanzarAlObjetivo(self, juegos, agentes):
+        estados = self.estados[juegos, agentes]
+        enCamino = (((estados == ESTADO_MOVIENDOSE) | (estados == ESTADO_LLEVANDO_VICTIMA)) &
+                    (self.objetivos[juegos, agentes] >= 0))
+        self.avancesPendientes.append((juegos[enCamino], agentes[enCamino]))
+
+    # Método que mueve a los bomberos anotados. En cada juego se anota a lo más
+    # uno por turno, así que se pueden mover todos en una sola búsqueda de rutas.
+    # Los que llevan víctima la entregan al llegar; los demás se quedan sin nada
+    # que hacer.
+    def moverPendientes(self):
+        if not self.avancesPendientes:
+            return
+        juegos = np.concatenate([juegos for juegos, _ in self.avancesPendientes])
+        agentes = np.concatenate([agentes for _, agentes in self.avancesPendientes])
+        self.avancesPendientes.clear()
+
+        puntos = np.full(len(juegos), PUNTOS_ACCION)
+        llego, movio = self.moverseAlObjetivo(juegos, agentes, puntos)
+        # El salvador y el abre puertas siguen avanzando con los puntos que les
+        # quedan (moverseAlObjetivo de CSalvador).
+        sigue = np.flatnonzero(movio & ~llego & RESCATISTAS[agentes] & (puntos > 0))
+        while len(sigue):
+            restantes = puntos[sigue]
+            llego[sigue], movio[sigue] = self.moverseAlObjetivo(juegos[sigue], agentes[sigue], restantes)
+            puntos[sigue] = restantes
+            sigue = sigue[movio[sigue] & ~llego[sigue] & (restantes > 0)]
+        juegos, agentes = juegos[llego], agentes[llego]
+        cargando = self.estados[juegos, agentes] == ESTADO_LLEVANDO_VICTIMA
+        self.entregarVictima(juegos[cargando], agentes[cargando])
+        juegos, agentes = juegos[~cargando], agentes[~cargando]
+        self.estados[juegos, agentes] = ESTADO_AFK
+        self.objetivos[juegos, agentes] = -1
+
+    # ======================================
+    # ======= Turnos de los Bomberos =======
+    # ======================================
+
+    # Cada método recibe los juegos en los que le toca a un bombero de su tipo y
+    # cuál bombero es; sigue el step() de la clase correspondiente.
+
+    def actuarApagafuegosAleatorio(self, juegos, agentes):
+        resto = ~self.apagarFuego(juegos, agentes)
+        self.movimientoAleatorio(juegos[resto], agentes[resto])
+
+    def actuarBuscadorAleatorio(self, juegos, agentes):
+        resto = ~self.buscarPoi(juegos, agentes)
+        self.movimientoAleatorio(juegos[resto], agentes[resto])
+
+    def actuarSalvadorAleatorio(self, juegos, agentes):
+        resto = ~self.entregarVictima(juegos, agentes)
+        juegos, agentes = juegos[resto], agentes[resto]
+        resto = ~self.recogerVictima(juegos, agentes)
+        self.movimientoAleatorio(juegos[resto], agentes[resto])
+
+    def actuarAbrePuertasAleatorio(self, juegos, agentes):
+        resto = ~self.abrirPuerta(juegos, agentes)
+        self.movimientoAleatorio(juegos[resto], agentes[resto])
+
+    def actuarApagafuegos(self, juegos, agentes):
+        resto = ~self.apagarFuego(juegos, agentes)
+        juegos, agentes = juegos[resto], agentes[resto]
+        self.buscarObjetivo(juegos, agentes, "fuego")
+        self.avanzarAlObjetivo(juegos, agentes)
+
+    def actuarBuscador(self, juegos, agentes):
+        resto = ~self.buscarPoi(juegos, agentes)
+        juegos, agentes = juegos[resto], agentes[resto]
+        self.buscarObjetivo(juegos, agentes, "pois")
+        self.avanzarAlObjetivo(juegos, agentes)
+
+    # El abre puertas abre la puerta donde está o, si no hay, hace lo del salvador.
+    def actuarAbrePuertas(self, juegos, agentes):
+        resto = ~self.abrirPuerta(juegos, agentes)
+        self.actuarSalvador(juegos[resto], agentes[resto])
+
+    # El salvador hace solo una de sus ramas por turno; se eligen con el estado
+    # que tenía al empezar.
+    def actuarSalvador(self, juegos, agentes):
+        resto = ~self.entregarVictima(juegos, agentes)
+        juegos, agentes = juegos[resto], agentes[resto]
+        resto = ~self.recogerVictima(juegos, agentes)
+        juegos, agentes = juegos[resto], agentes[resto]
+
+        llevando = self.llevandoVictima[juegos, agentes]
+        estados = self.estados[juegos, agentes]
+        cargando = llevando & (estados == ESTADO_LLEVANDO_VICTIMA)
+        libre = ~cargando & (estados == ESTADO_AFK) & ~llevando
+        yendo = ~cargando & ~libre & (estados == ESTADO_MOVIENDOSE)
+
+        # Con víctima va hacia la entrada y la entrega al llegar; si al recogerla
+        # no había entrada con ruta, la vuelve a buscar.
+        juegosCargando, agentesCargando = juegos[cargando], agentes[cargando]
+        sinEntrada = self.objetivos[juegosCargando, agentesCargando] < 0
+        juegosSin, agentesSin = juegosCargando[sinEntrada], agentesCargando[sinEntrada]
+        self.objetivos[juegosSin, agentesSin] = self.entradaCercana(juegosSin, self.posiciones[juegosSin, agentesSin])
+        self.avanzarAlObjetivo(juegosCargando, agentesCargando)
+        self.buscarObjetivo(juegos[libre], agentes[libre], "victimas")
+        self.avanzarAlObjetivo(juegos[yendo], agentes[yendo])
+
+    # ======================================
+    # ========= Turno de los Juegos ========
+    # ======================================
+
+    # Método que enciende una celda en cada juego dado: quita el humo, quema los
+    # POIs que quedaron bajo fuego (con uno nuevo por cada uno) y revisa el daño.
+    def encenderFuego(self, juegos, celdas):
+        self.fuego[juegos, celdas] = True
+        self.humo[juegos, celdas] = False
+
+        # Además de la celda encendida, solo pueden estar bajo fuego los POIs que
+        # la configuración puso sobre fuego; se queman en la primera ignición.
+        pois = self.pois[juegos]
+        quemados = (pois != SIN_POI) & self.fuego[juegos]
+        self.victimasPerdidas[juegos] += ((pois == POI_VICTIMA) & quemados).sum(axis=1)
+        self.pois[juegos] = np.where(quemados, SIN_POI, pois)
+        cuantos = quemados.sum(axis=1)
+        for i in range(cuantos.max(initial=0)):
+            self.generarNuevoPoi(juegos[cuantos > i])
+
+        # Daño estructural si hay tres fuegos seguidos en una fila o columna.
+        fuego = self.fuego[juegos, :self.numCeldas].reshape(len(juegos), self.alto, self.ancho)
+        horizontal = (fuego[:, :, :-2] & fuego[:, :, 1:-1] & fuego[:, :, 2:]).any(axis=(1, 2))
+        vertical = (fuego[:, :-2] & fuego[:, 1:-1] & fuego[:, 2:]).any(axis=(1, 2))
+        self.puntosDano[juegos] += horizontal | vertical
+
+    # Método para procesar la expansión del humo y el fuego en cada juego.
+    def procesarHumoYFuego(self, juegos):
+        celdas, hay = self.elegirAlAzar(self.piso & self.descubiertas[juegos])
+        juegos, celdas = juegos[hay], celdas[hay]
+        humo = self.humo[juegos, celdas]
+        fuego = self.fuego[juegos, celdas]
+
+        nuevoHumo = ~humo & ~fuego
+        self.humo[juegos[nuevoHumo], celdas[nuevoHumo]] = True
+
+        # El fuego se extiende a una vecina de piso descubierta sin fuego.
+        juegosFuego = juegos[fuego]
+        vecinos = self.vecinos[celdas[fuego]]
+        validas = (self.piso[vecinos] & ~self.fuego[juegosFuego[:, None], vecinos] &
+                   self.descubiertas[juegosFuego[:, None], vecinos])
+        eleccion, hayVecina = self.elegirAlAzar(validas)
+        expansion = vecinos[np.arange(len(juegosFuego)), eleccion][hayVecina]
+
+        self.encenderFuego(np.concatenate((juegos[humo], juegosFuego[hayVecina])),
+                           np.concatenate((celdas[humo], expansion)))
+
+    # Método para verificar qué juegos terminaron.
+    def verificarCondicionesFin(self, juegos):
+        gano = self.victimasRescatadas[juegos] >= self.victimasParaGanar
+        perdio = ~gano & (self.victimasPerdidas[juegos] >= self.maxVictimasPerdidas)
+        colapso = ~gano & ~perdio & (self.puntosDano[juegos] >= self.maxPuntosDano)
+        self.resultado[juegos] = np.select((gano, perdio, colapso), (1, 2, 3), 0)
+        self.juegoTerminado[juegos] = gano | perdio | colapso
+
+    def step(self):
+        juegos = np.flatnonzero(~self.juegoTerminado)
+        if not len(juegos):
+            return
+        self.turno[juegos] += 1
+
+        # Orden de activación al azar en cada juego (RandomActivation).
+        orden = self.random.random((len(juegos), len(EQUIPO))).argsort(axis=1)
+        for turnoAgente in range(len(EQUIPO)):
+            agentes = orden[:, turnoAgente]
+            tipos = EQUIPO[agentes]
+            for tipo, actuar in enumerate(self.acciones):
+                elegidos = tipos == tipo
+                if elegidos.any():
+                    actuar(juegos[elegidos], agentes[elegidos])
+            self.moverPendientes()
+
+        self.procesarHumoYFuego(juegos)
+        self.verificarCondicionesFin(juegos)
+
+    # Método que juega todos los juegos hasta que terminen (o hasta maxTurnos) y
+    # regresa sus resultados.
+    def runModel(self, maxTurnos=None):
+        turnos = 0
+        while not self.juegoTerminado.all() and (maxTurnos is None or turnos < maxTurnos):
+            self.step()
+            turnos += 1
+        return self.obtenerResultados()
+
+    # Método que regresa un diccionario por juego, con las llaves de CJuego.runModel.
+    def obtenerResultados(self):
+        numCeldas = self.numCeldas
+        fuegos = self.fuego[:, :numCeldas].sum(axis=1)
+        humos = self.humo[:, :numCeldas].sum(axis=1)
+        pois = (self.pois[:, :numCeldas] != SIN_POI).sum(axis=1)
+        return [{
+            "resultado": RESULTADOS[self.resultado[i]],
+            "victimasRescatadas": int(self.victimasRescatadas[i]),
+            "victimasPerdidas": int(self.victimasPerdidas[i]),
+            "puntosDano": int(self.puntosDano[i]),
+            "turnos": int(self.turno[i]),
+            "fuegosFinales": int(fuegos[i]),
+            "humosFinales": int(humos[i]),
+            "poisRestantes": int(pois[i])
+        } for i in range(self.numJuegos)]
+
+# Función equivalente a ejecutarMultiplesIteraciones que juega todo en un lote.
+def ejecutarLote(num_iteraciones, archivo_config, tipo_solucion, semilla=None, maxTurnos=None):
+    modo = MODOS_SOLUCION.get(tipo_solucion)
+    if modo is None:
+        raise ValueError(f"Tipo de solución no válido: {tipo_solucion}")
+    return CSimuladorLote(archivo_config, num_iteraciones, modo, semilla).runModel(maxTurnos)
+
+if __name__ == "__main__":
+    numJuegos = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    archivo = sys.argv[2] if len(sys.argv) > 2 else "txtxd.txt"
+
+    for tipo, nombre in (("aleatoria", "ALEATORIA"), ("estrategica", "ESTRATÉGICA")):
+        inicio = time.perf_counter()
+        resultados = ejecutarLote(numJuegos, archivo, tipo)
+        print(f"\n{numJuegos} juegos en {time.perf_counter() - inicio:.2f} s")
+        analizarResultados(resultados, nombre)
@@ -0,0 +1,15 @@
+# Las pruebas importan los módulos del motor directamente (reto, simulador_lote, ...),
+# que están en la carpeta de arriba.
+
+import os
+import sys
+
+import pytest
+
+CARPETA_MOTOR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, CARPETA_MOTOR)
+
+# Archivo de configuración del tablero con el que se juegan las pruebas.
+@pytest.fixture
+def archivoConfig():
+    return os.path.join(CARPETA_MOTOR, "txtxd.txt")
@@ -0,0 +1,56 @@
+# Una corrida queda determinada por la plantilla, el modo, la semilla y la versión
+# del motor: lo que regresa el cache debe ser lo mismo que volver a jugar.
+
+import pytest
+
+from cache_resultados import CCacheResultados
+from reto import (VERSION_MOTOR, CEstrategia, CEstrategiaUnity, ejecutarMultiplesIteraciones, modoCache,
+                  obtenerPlantilla, semillaIteracion)
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = CCacheResultados(str(tmp_path / "resultados.sqlite"))
+    yield cache
+    cache.cerrar()
+
+def test_guardaYRegresaResultados(archivoConfig, cache):
+    huella = obtenerPlantilla(archivoConfig).huella
+    # Las semillas de semillaIteracion pueden pasar de 64 bits con signo.
+    semillas = [semillaIteracion(1, i) for i in range(6)] + [2 ** 64 - 1]
+    resultados = [(semilla, CEstrategia(archivoConfig, semilla=semilla).runModel()) for semilla in semillas]
+    cache.guardar(huella, "estrategica", resultados)
+
+    assert cache.buscar(huella, "estrategica", semillas) == dict(resultados)
+    assert cache.buscar(huella, "aleatoria", semillas) == {}
+    assert len(cache) == len(semillas)
+
+    # Otra versión del motor no ve los resultados, y purgarlos desde ella los borra.
+    otra = CCacheResultados(cache.archivo, version=VERSION_MOTOR + 1)
+    try:
+        assert otra.buscar(huella, "estrategica", semillas) == {}
+        assert otra.purgarOtrasVersiones() == len(semillas)
+    finally:
+        otra.cerrar()
+    assert len(cache) == 0
+
+@pytest.mark.parametrize("maxTurnos", [None, 10])
+def test_corridaConCacheIgualASinCache(archivoConfig, cache, maxTurnos):
+    sinCache = ejecutarMultiplesIteraciones(8, archivoConfig, "estrategica", semilla=5, maxTurnos=maxTurnos)
+    primera = ejecutarMultiplesIteraciones(8, archivoConfig, "estrategica", semilla=5, cache=cache,
+                                           maxTurnos=maxTurnos)
+    # La segunda vez todo sale del cache.
+    segunda = ejecutarMultiplesIteraciones(8, archivoConfig, "estrategica", semilla=5, cache=cache,
+                                           maxTurnos=maxTurnos)
+    assert primera == sinCache
+    assert segunda == sinCache
+    huella = obtenerPlantilla(archivoConfig).huella
+    semillas = [semillaIteracion(5, i) for i in range(8)]
+    assert len(cache.buscar(huella, modoCache("estrategica", maxTurnos), semillas)) == 8
+
+def test_reinicioRepiteLaPartida(archivoConfig):
+    modelo = CEstrategiaUnity(archivoConfig, semilla=11)
+    resultado = modelo.runModel()
+    modelo.reiniciarSimulacion()
+    assert modelo.turno == 0
+    assert modelo.runModel() == resultado
+    assert CEstrategia(archivoConfig, semilla=11).runModel() == resultado
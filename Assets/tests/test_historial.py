@@ -0,0 +1,95 @@
+# El historial guarda keyframes y deltas; cada paso que regresa debe ser igual al
+# estado que se capturó directamente en ese paso.
+
+import json
+
+import pytest
+
+from reto import TABLERO_BITS, TABLERO_CONJUNTOS, CEstrategiaUnity, CUnity, aplicarDeltaEstado
+
+PASOS = 60
+
+# Función que juega una partida con semilla y regresa el modelo y lo que se
+# capturó en cada paso (copiado como JSON, igual que lo guarda el historial).
+def jugarCapturando(archivo, tablero=TABLERO_CONJUNTOS, semilla=3):
+    modelo = CEstrategiaUnity(archivo, tablero, semilla=semilla)
+    capturas = [json.loads(json.dumps(modelo.obtenerUltimoEstado()))]
+    while not modelo.juegoTerminado and len(capturas) <= PASOS:
+        modelo.step()
+        capturas.append(json.loads(json.dumps(modelo.obtenerUltimoEstado())))
+    return modelo, capturas
+
+@pytest.fixture
+def historialChico(monkeypatch):
+    monkeypatch.setattr(CUnity, "intervaloKeyframe", 5)
+    monkeypatch.setattr(CUnity, "maxPasosHistorial", None)
+    monkeypatch.setattr(CUnity, "maxBytesHistorial", None)
+
+@pytest.mark.parametrize("tablero", [TABLERO_CONJUNTOS, TABLERO_BITS])
+def test_reconstruyeCadaPaso(archivoConfig, historialChico, tablero):
+    modelo, capturas = jugarCapturando(archivoConfig, tablero)
+    historial = modelo.estadosSimulacion
+    # La partida debe cruzar varios keyframes para que la prueba sirva.
+    assert len(capturas) > 3 * historial.intervaloKeyframe
+    assert len(historial) == len(capturas)
+
+    # Hacia adelante, hacia atrás y salteado (la reconstrucción anterior se reusa).
+    orden = list(range(len(capturas)))
+    for paso in orden + orden[::-1] + orden[::7] + orden[3::5]:
+        assert historial.obtener(paso) == capturas[paso], paso
+    assert historial.obtenerTodos() == capturas
+
+def test_deltasLlevanDeUnPasoAlSiguiente(archivoConfig, historialChico):
+    modelo, capturas = jugarCapturando(archivoConfig)
+    for paso in range(1, len(capturas)):
+        delta = modelo.obtenerDeltaPaso(paso)
+        assert aplicarDeltaEstado(capturas[paso - 1], delta) == capturas[paso], paso
+
+def test_descartaBloquesPorPasos(archivoConfig, historialChico, monkeypatch):
+    monkeypatch.setattr(CUnity, "maxPasosHistorial", 12)
+    modelo, capturas = jugarCapturando(archivoConfig)
+    historial = modelo.estadosSimulacion
+    assert historial.primerPaso > 0
+    # Se descartan bloques completos: lo que queda empieza en un keyframe.
+    assert historial.primerPaso % historial.intervaloKeyframe == 0
+    assert len(historial) <= 12
+    for paso in range(historial.primerPaso):
+        assert historial.obtener(paso) is None
+    for paso in range(historial.primerPaso, len(capturas)):
+        assert historial.obtener(paso) == capturas[paso], paso
+
+def test_descartaBloquesPorBytes(archivoConfig, historialChico, monkeypatch):
+    monkeypatch.setattr(CUnity, "maxBytesHistorial", 40000)
+    modelo, capturas = jugarCapturando(archivoConfig)
+    historial = modelo.estadosSimulacion
+    assert historial.primerPaso > 0
+    assert historial.bytes == sum(len(datos) for _, datos in historial.entradas)
+    assert historial.bytes <= 40000
+    for paso in range(historial.primerPaso, len(capturas)):
+        assert historial.obtener(paso) == capturas[paso], paso
+
+def test_capturasNoCambianLosEstadosAnteriores(archivoConfig):
+    # Los estados se guardan sin copiar, así que la captura de un paso no puede tocar
+    # los objetos del anterior; lo que no cambió se comparte en lugar de rehacerse.
+    modelo = CEstrategiaUnity(archivoConfig, semilla=3)
+    estados = [modelo.obtenerUltimoEstado()]
+    copias = [json.dumps(estados[0])]
+    while not modelo.juegoTerminado and len(estados) <= PASOS:
+        modelo.step()
+        estados.append(modelo.obtenerUltimoEstado())
+        copias.append(json.dumps(estados[-1]))
+    assert [json.dumps(estado) for estado in estados] == copias
+
+    anterior = modelo.obtenerUltimoEstado()
+    repetido = modelo.capturarEstadoActual()
+    assert repetido["grid"] is anterior["grid"]
+    assert repetido["marcadores"] is anterior["marcadores"]
+    assert repetido["bomberos"] is anterior["bomberos"]
+
+    # Un bombero que cambia solo rehace su propio diccionario.
+    bombero = modelo.bomberos[0]
+    bombero.puntosAccion += 1
+    cambiado = modelo.capturarEstadoActual()
+    assert cambiado["bomberos"] is not anterior["bomberos"]
+    assert cambiado["bomberos"][0]["puntosAccion"] == bombero.puntosAccion
+    assert all(nuevo is viejo for nuevo, viejo in zip(cambiado["bomberos"][1:], anterior["bomberos"][1:]))
@@ -0,0 +1,43 @@
+# La cuenta de líneas de tres fuegos (lineasDeFuego) se actualiza al encender y
+# apagar fuego; debe ser igual a recorrer todo el tablero en cualquier momento.
+
+import pytest
+
+from reto import TABLERO_BITS, TABLERO_CONJUNTOS, CAleatorio, CEstrategia
+
+# Función que cuenta las líneas de tres fuegos seguidos (horizontales y
+# verticales) recorriendo todas las celdas del tablero.
+def contarLineasRecorriendo(modelo):
+    fuego = modelo.fuegoPosiciones
+    total = 0
+    for x in range(modelo.width):
+        for y in range(modelo.height):
+            if x + 2 < modelo.width and all((x + i, y) in fuego for i in range(3)):
+                total += 1
+            if y + 2 < modelo.height and all((x, y + i) in fuego for i in range(3)):
+                total += 1
+    return total
+
+@pytest.mark.parametrize("tablero", [TABLERO_CONJUNTOS, TABLERO_BITS])
+@pytest.mark.parametrize("clase", [CAleatorio, CEstrategia])
+def test_cuentaIncrementalIgualAlRecorrido(archivoConfig, clase, tablero):
+    cambios = 0
+    for semilla in range(15):
+        modelo = clase(archivoConfig, tablero, semilla=semilla)
+        assert modelo.lineasDeFuego == contarLineasRecorriendo(modelo)
+
+        # Se revisa en cada cambio de fuego, no solo al final del paso.
+        registrarCambioCelda = modelo.registrarCambioCelda
+        def revisarCambio(posicion, capa=None):
+            nonlocal cambios
+            if capa == "fuego":
+                cambios += 1
+                assert modelo.lineasDeFuego == contarLineasRecorriendo(modelo), (semilla, modelo.turno)
+            registrarCambioCelda(posicion, capa)
+        modelo.registrarCambioCelda = revisarCambio
+
+        while not modelo.juegoTerminado:
+            modelo.step()
+            assert modelo.lineasDeFuego == contarLineasRecorriendo(modelo), (semilla, modelo.turno)
+    # Las partidas deben haber encendido y apagado fuego para que la prueba sirva.
+    assert cambios > 100
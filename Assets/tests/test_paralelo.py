@@ -0,0 +1,47 @@
+# Cada iteración tiene su propia semilla, así que repartir los juegos entre más o
+# menos procesos y bloques no cambia los resultados; y un proceso que se cae solo
+# le gasta reintentos al bloque que lo tumbó.
+
+import os
+
+import numpy as np
+import pytest
+
+import paralelo
+from paralelo import ejecutarEnParalelo, jugarBloque
+
+pytestmark = pytest.mark.skipif(paralelo.CONTEXTO_PROCESOS.get_start_method() != "fork",
+                                reason="las pruebas reemplazan jugarBloque, que solo ven los procesos con fork")
+
+def test_resultadosNoDependenDelReparto(archivoConfig):
+    base = ejecutarEnParalelo(24, archivoConfig, "estrategica", procesos=1, tamanoBloque=24,
+                              semilla=3, comoArreglo=True)
+    for procesos, tamanoBloque in ((2, 5), (3, 1), (4, None)):
+        filas = ejecutarEnParalelo(24, archivoConfig, "estrategica", procesos=procesos,
+                                   tamanoBloque=tamanoBloque, semilla=3, comoArreglo=True)
+        assert np.array_equal(filas, base)
+
+# Carpeta donde jugarBloqueQueSeCae marca los bloques que ya tumbaron su proceso.
+CARPETA_MARCAS = None
+
+# Función que tumba el proceso la primera vez que le toca un bloque que empieza en
+# 5 o en 10, y juega normal todo lo demás.
+def jugarBloqueQueSeCae(archivo_config, tipo_solucion, semilla, indices, maxTurnos=None):
+    marca = os.path.join(CARPETA_MARCAS, str(indices[0]))
+    if indices[0] in (5, 10) and not os.path.exists(marca):
+        open(marca, "w").close()
+        os._exit(1)
+    return jugarBloque(archivo_config, tipo_solucion, semilla, indices, maxTurnos)
+
+def test_procesoCaidoSoloCuentaSuBloque(archivoConfig, tmp_path, monkeypatch):
+    monkeypatch.setitem(globals(), "CARPETA_MARCAS", str(tmp_path))
+    esperado = ejecutarEnParalelo(20, archivoConfig, "aleatoria", procesos=1, tamanoBloque=5,
+                                  semilla=2, comoArreglo=True)
+
+    # Dos caídas en vueltas distintas: con un solo proceso el bloque en curso es el
+    # que avisa primero, y los que solo esperaban no gastan su único reintento.
+    monkeypatch.setattr(paralelo, "jugarBloque", jugarBloqueQueSeCae)
+    filas = ejecutarEnParalelo(20, archivoConfig, "aleatoria", procesos=1, tamanoBloque=5,
+                               semilla=2, reintentos=1, comoArreglo=True)
+    assert np.array_equal(filas, esperado)
+    assert sorted(os.listdir(tmp_path)) == ["10", "5"]
@@ -0,0 +1,379 @@
+# Pruebas de los endpoints del servidor con el cliente de pruebas de Flask. Cada
+# prueba trabaja con su propio gestor de sesiones, así que no comparte partidas
+# con las demás; no se llama a iniciar_servidor(), los modelos se construyen en
+# el momento salvo en las pruebas de la reserva.
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import servidor_flask
+from codificacion import TIPO_CONTENIDO_BINARIO, codificarColumnar, decodificarBinario
+from metricas import TIPO_CONTENIDO_PROMETHEUS
+from reto import CJuego, CUnity, aplicarDeltaEstado
+from sesiones import CGestorSesiones
+
+@pytest.fixture
+def gestor(archivoConfig, monkeypatch):
+    gestor = CGestorSesiones(maxSesiones=5, tiempoInactividad=1800)
+    monkeypatch.setattr(servidor_flask, "gestor_sesiones", gestor)
+    monkeypatch.setattr(servidor_flask, "archivo_config", archivoConfig)
+    yield gestor
+    for sesion in gestor.listarSesiones():
+        servidor_flask.planificador.cancelar(sesion.idSesion)
+        gestor.eliminarSesion(sesion.idSesion)
+
+@pytest.fixture
+def cliente(gestor):
+    return servidor_flask.app.test_client()
+
+# Función que crea la sesión por defecto y regresa su estado inicial.
+def inicializar(cliente, **datos):
+    respuesta = cliente.post("/inicializar", json=datos)
+    assert respuesta.status_code == 200
+    return respuesta.get_json()["estado"]
+
+# Función que avanza n pasos de uno en uno y regresa los estados de cada paso.
+def avanzar(cliente, n):
+    return [cliente.post("/step").get_json()["estado"] for _ in range(n)]
+
+def test_estadoDesdeRegresaSoloCambios(cliente):
+    estados = [inicializar(cliente)] + avanzar(cliente, 6)
+    for desde in (0, 3, 5):
+        delta = cliente.get(f"/estado?desde={desde}").get_json()["estado"]
+        assert delta["completo"] is False
+        assert delta["desde"] == desde
+        assert aplicarDeltaEstado(estados[desde], delta) == estados[-1]
+
+    # /step con 'desde' regresa lo que cambió desde ese paso hasta el nuevo.
+    delta = cliente.post("/step", json={"desde": 6}).get_json()["estado"]
+    actual = cliente.get("/estado").get_json()["estado"]
+    assert aplicarDeltaEstado(estados[6], delta) == actual
+
+def test_estadoDesdeSinHistorialRegresaCompleto(cliente, gestor):
+    inicializar(cliente)
+    avanzar(cliente, 5)
+    actual = cliente.get("/estado").get_json()["estado"]
+    gestor.obtenerSesion("default").modelo.maxPasosDelta = 2
+
+    # Un paso futuro o demasiado viejo no tiene delta: se manda el estado completo.
+    for desde in (9, 1):
+        completo = cliente.get(f"/estado?desde={desde}").get_json()["estado"]
+        assert completo["completo"] is True
+        assert completo["desde"] == desde
+        assert {llave: valor for llave, valor in completo.items() if llave not in ("completo", "desde")} == actual
+    assert cliente.get("/estado?desde=3").get_json()["estado"]["completo"] is False
+
+def test_desalojaLaSesionMenosUsada(cliente, gestor):
+    gestor.maxSesiones = 2
+    for idSesion in ("a", "b"):
+        inicializar(cliente, sesion=idSesion)
+    # Usar "a" la vuelve la más reciente, así que al crear "c" sale "b".
+    assert cliente.get("/info?sesion=a").get_json()["status"] == "initialized"
+    inicializar(cliente, sesion="c")
+
+    assert [s.idSesion for s in gestor.listarSesiones()] == ["a", "c"]
+    assert cliente.get("/info?sesion=b").get_json()["status"] == "no_initialized"
+    assert cliente.get("/estado?sesion=b").status_code == 400
+
+def test_desalojaSesionesInactivas(cliente, gestor):
+    inicializar(cliente, sesion="vieja")
+    inicializar(cliente, sesion="nueva")
+    # Se atrasa el último acceso en lugar de esperar el tiempo de inactividad.
+    gestor.obtenerSesion("vieja").ultimoAcceso -= 3600
+    assert cliente.get("/estado?sesion=vieja").status_code == 400
+    assert cliente.get("/estado?sesion=nueva").status_code == 200
+
+    gestor.obtenerSesion("nueva").ultimoAcceso -= 3600
+    respuesta = cliente.get("/sesiones?memoria=0").get_json()
+    assert respuesta["total"] == 0
+    assert len(gestor) == 0
+
+# Función que regresa el evento y el paso de un frame SSE.
+def leerFrame(frame):
+    lineas = dict(linea.split(": ", 1) for linea in frame.decode("utf-8").strip().split("\n"))
+    return lineas["event"], int(lineas["id"])
+
+def test_streamSuscribeYDesuscribe(cliente, gestor):
+    inicializar(cliente)
+    difusor = gestor.obtenerSesion("default").difusor
+    primero = cliente.get("/stream")
+    segundo = cliente.get("/stream?formato=completo")
+    assert primero.status_code == segundo.status_code == 200
+    assert len(difusor) == 2
+
+    # Primero llega el estado completo y después un frame por paso en el formato pedido.
+    frames = primero.iter_encoded()
+    assert leerFrame(next(frames)) == ("completo", 0)
+    cliente.post("/step")
+    assert leerFrame(next(frames)) == ("delta", 1)
+    framesCompletos = segundo.iter_encoded()
+    assert leerFrame(next(framesCompletos)) == ("completo", 0)
+    assert leerFrame(next(framesCompletos)) == ("completo", 1)
+
+    # Al cerrar la respuesta se quita la suscripción, aunque el generador siga a medias
+    # o ni siquiera haya empezado.
+    primero.close()
+    assert len(difusor) == 1
+    segundo.close()
+    assert len(difusor) == 0
+
+    assert cliente.get("/stream?formato=otro").status_code == 400
+    assert len(difusor) == 0
+
+def test_avanzaVariosPasos(cliente):
+    estado = inicializar(cliente)
+    respuesta = cliente.post("/step", json={"n": 5}).get_json()
+    assert respuesta["pasos_ejecutados"] == 5
+    # La trayectoria trae los cambios de cada paso; aplicados en orden llevan al estado final.
+    assert [delta["paso"] for delta in respuesta["trayectoria"]] == [1, 2, 3, 4, 5]
+    for delta in respuesta["trayectoria"]:
+        estado = aplicarDeltaEstado(estado, delta)
+    assert estado == respuesta["estado"]
+
+    final = cliente.post("/step?n=3&trayectoria=final").get_json()
+    assert final["pasos_ejecutados"] == 3
+    assert "trayectoria" not in final
+    assert all(set(evento) == {"paso", "estadisticas"} for evento in final["eventos"])
+    assert final["estado"]["paso"] == 8
+
+def test_avanzaHastaElFin(cliente, monkeypatch):
+    inicializar(cliente)
+    # El lote se corta en MAX_PASOS_LOTE aunque el juego no haya terminado.
+    monkeypatch.setattr(servidor_flask, "MAX_PASOS_LOTE", 4)
+    assert cliente.post("/step", json={"hasta_fin": True, "n": 1}).get_json()["pasos_ejecutados"] == 4
+    assert cliente.post("/step", json={"n": 10}).get_json()["pasos_ejecutados"] == 4
+
+    monkeypatch.setattr(servidor_flask, "MAX_PASOS_LOTE", 1000)
+    respuesta = cliente.post("/step?hasta_fin=true&trayectoria=final").get_json()
+    estadisticas = respuesta["estado"]["estadisticas"]
+    assert estadisticas["juegoTerminado"]
+    assert respuesta["estado"]["paso"] == 8 + respuesta["pasos_ejecutados"]
+    assert respuesta["eventos"][-1]["estadisticas"]["juegoTerminado"] is True
+    assert cliente.post("/step").get_json()["status"] == "warning"
+
+@pytest.mark.parametrize("n", [0, -1, "x", 1.5, True])
+def test_rechazaNumeroDePasosInvalido(cliente, n):
+    inicializar(cliente)
+    respuesta = cliente.post("/step", json={"n": n})
+    assert respuesta.status_code == 400
+    assert cliente.get("/estado").get_json()["estado"]["paso"] == 0
+
+def test_loteNoSeRegresaEnBinario(cliente):
+    inicializar(cliente)
+    assert cliente.post("/step?n=2&formato=binario").status_code == 400
+
+def test_pasosConcurrentesNoSePierden(cliente):
+    inicializar(cliente)
+    # Varios clientes piden pasos a la vez; el hilo de la sesión los ejecuta de uno en uno.
+    def pedirPasos():
+        return [cliente.post("/step").get_json()["estado"]["paso"] for _ in range(5)]
+    with ThreadPoolExecutor(4) as ejecutor:
+        listas = list(ejecutor.map(lambda _: pedirPasos(), range(4)))
+
+    # Cada respuesta trae el último estado publicado, que puede incluir pasos de
+    # otros clientes, pero para un mismo cliente siempre avanza.
+    for pasos in listas:
+        assert all(1 <= a < b <= 20 for a, b in zip(pasos, pasos[1:]))
+    assert cliente.get("/estado").get_json()["estado"]["paso"] == 20
+    historial = cliente.get("/historial?campos=estadisticas").get_json()
+    assert [estado["paso"] for estado in historial["estados"]] == list(range(21))
+
+# Función que ordena las listas de marcadores, que el binario arma en el orden del grid.
+def ordenarMarcadores(estado):
+    marcadores = {nombre: sorted(lista, key=lambda m: (m["y"], m["x"]))
+                  for nombre, lista in estado["marcadores"].items()}
+    return {**estado, "marcadores": marcadores}
+
+def test_binarioRegresaElMismoEstadoQueJSON(cliente):
+    inicializar(cliente)
+    avanzar(cliente, 7)
+    estado = cliente.get("/estado").get_json()["estado"]
+
+    porQuery = cliente.get("/estado?formato=binario")
+    porAccept = cliente.get("/estado", headers={"Accept": TIPO_CONTENIDO_BINARIO})
+    assert porQuery.mimetype == porAccept.mimetype == TIPO_CONTENIDO_BINARIO
+    assert porQuery.data == porAccept.data
+    assert porQuery.headers["X-Sesion"] == "default"
+    assert ordenarMarcadores(decodificarBinario(porQuery.data)) == ordenarMarcadores(estado)
+
+    # /step también responde en binario con el estado del paso nuevo.
+    paso = cliente.post("/step?formato=binario")
+    assert paso.headers["X-Status"] == "success"
+    assert decodificarBinario(paso.data)["paso"] == 8
+
+def test_columnarEsElEstadoCodificado(cliente):
+    inicializar(cliente)
+    estado = cliente.get("/estado").get_json()["estado"]
+    columnar = cliente.get("/estado?formato=columnar").get_json()["estado"]
+    assert columnar == codificarColumnar(estado)
+    assert cliente.get("/estado?formato=xml").status_code == 400
+
+def test_etagYRespuestaNoModificada(cliente, gestor):
+    inicializar(cliente)
+    primera = cliente.get("/estado")
+    etag = primera.headers["ETag"]
+    noModificada = cliente.get("/estado", headers={"If-None-Match": etag})
+    assert noModificada.status_code == 304
+    assert noModificada.data == b""
+    assert noModificada.headers["ETag"] == etag
+
+    # Los lectores del mismo paso y formato comparten una sola codificación.
+    cache = gestor.obtenerSesion("default").cacheRespuestas
+    assert cliente.get("/estado").data == primera.data
+    assert len(cache.entradas) == 1
+
+    # El ETag cambia con el formato, el paso, el auto-run y el reinicio.
+    etags = {etag, cliente.get("/estado?formato=binario").headers["ETag"]}
+    cliente.post("/step")
+    etags.add(cliente.get("/estado").headers["ETag"])
+    cliente.post("/auto_run", json={"activate": True, "intervalo": 3600})
+    etags.add(cliente.get("/estado").headers["ETag"])
+    cliente.post("/reiniciar")
+    etags.add(cliente.get("/estado").headers["ETag"])
+    assert len(etags) == 5
+    assert cliente.get("/estado", headers={"If-None-Match": etag}).status_code == 200
+
+    info = cliente.get("/info")
+    assert cliente.get("/info", headers={"If-None-Match": info.headers["ETag"]}).status_code == 304
+
+# Función que espera hasta que se cumpla la condición (o se acabe el tiempo).
+def esperar(condicion, segundos=10):
+    limite = time.monotonic() + segundos
+    while not condicion():
+        if time.monotonic() > limite:
+            return False
+        time.sleep(0.01)
+    return True
+
+def test_autoRunArrancaYSeDetiene(cliente, gestor):
+    inicializar(cliente)
+    planificador = servidor_flask.planificador
+    sesion = gestor.obtenerSesion("default")
+
+    respuesta = cliente.post("/auto_run", json={"activate": True, "intervalo": 0.01, "politica": "recuperar"})
+    assert respuesta.get_json()["auto_run"] is True
+    assert "default" in planificador.activas
+    assert esperar(lambda: sesion.estado["paso"] >= 3)
+
+    assert cliente.post("/auto_run", json={"activate": False}).get_json()["auto_run"] is False
+    assert "default" not in planificador.activas
+    # Un paso que ya estaba en curso puede terminar; después ya no avanza.
+    time.sleep(0.05)
+    paso = sesion.estado["paso"]
+    time.sleep(0.1)
+    assert sesion.estado["paso"] == paso
+
+    # Al terminar el juego la sesión sale sola del planificador.
+    cliente.post("/auto_run", json={"activate": True, "intervalo": 0})
+    assert esperar(lambda: "default" not in planificador.activas)
+    assert sesion.estado["estadisticas"]["juegoTerminado"]
+
+@pytest.mark.parametrize("datos", [{"intervalo": -1}, {"politica": "otra"}])
+def test_autoRunRechazaParametrosInvalidos(cliente, datos):
+    inicializar(cliente)
+    assert cliente.post("/auto_run", json=datos).status_code == 400
+    assert "default" not in servidor_flask.planificador.activas
+
+# Función que lee el valor de una serie del texto de /metrics (0 si no está).
+def valorMetrica(texto, serie):
+    for linea in texto.splitlines():
+        if linea.startswith(serie + " "):
+            return float(linea.split()[-1])
+    return 0.0
+
+def test_metricasCuentanPeticiones(cliente):
+    serie = 'reto_peticiones_total{endpoint="/step",metodo="POST",codigo="200"}'
+    antes = valorMetrica(cliente.get("/metrics").get_data(as_text=True), serie)
+    inicializar(cliente)
+    avanzar(cliente, 3)
+    cliente.post("/step", json={"n": 0})
+
+    respuesta = cliente.get("/metrics")
+    assert respuesta.content_type == TIPO_CONTENIDO_PROMETHEUS
+    texto = respuesta.get_data(as_text=True)
+    assert valorMetrica(texto, serie) == antes + 3
+    assert valorMetrica(texto, 'reto_errores_total{endpoint="/step"}') >= 1
+    assert valorMetrica(texto, "reto_sesiones") == 1
+    assert valorMetrica(texto, 'reto_peticion_segundos_count{endpoint="/step"}') >= 4
+
+# Función que recorre /historial página por página y regresa todos los estados.
+def leerHistorial(cliente, consulta):
+    estados = []
+    desde = 0
+    while desde is not None:
+        pagina = cliente.get(f"/historial?desde={desde}&{consulta}").get_json()
+        assert pagina["desde"] == desde
+        estados.extend(pagina["estados"])
+        desde = pagina["siguiente"]
+    return estados
+
+def test_historialPorPaginas(cliente, monkeypatch):
+    estados = [inicializar(cliente)] + avanzar(cliente, 12)
+    assert leerHistorial(cliente, "limite=5") == estados
+
+    # En modo delta cada página empieza completa y sigue con cambios.
+    pagina = cliente.get("/historial?desde=4&hasta=9&modo=delta").get_json()
+    assert (pagina["hasta"], pagina["siguiente"]) == (9, None)
+    estado = pagina["estados"][0]
+    assert estado == estados[4]
+    for delta in pagina["estados"][1:]:
+        estado = aplicarDeltaEstado(estado, delta)
+        assert estado == estados[delta["paso"]]
+
+    campos = cliente.get("/historial?campos=estadisticas,timestamp").get_json()["estados"]
+    assert campos[3] == {"paso": 3, "estadisticas": estados[3]["estadisticas"], "timestamp": estados[3]["timestamp"]}
+
+    # El tamaño de página no pasa del máximo aunque se pida más.
+    monkeypatch.setattr(servidor_flask, "MAX_PASOS_PAGINA_HISTORIAL", 4)
+    pagina = cliente.get("/historial?limite=100").get_json()
+    assert (len(pagina["estados"]), pagina["siguiente"]) == (4, 4)
+
+@pytest.mark.parametrize("consulta", ["desde=-1", "limite=0", "modo=otro", "campos=paredes"])
+def test_historialRechazaParametrosInvalidos(cliente, consulta):
+    inicializar(cliente)
+    assert cliente.get(f"/historial?{consulta}").status_code == 400
+
+@pytest.fixture
+def reserva(gestor, monkeypatch):
+    # iniciar_servidor() envuelve métodos del motor; se guardan para dejarlos como estaban.
+    monkeypatch.setattr(CJuego, "step", CJuego.step)
+    monkeypatch.setattr(CUnity, "capturarEstadoActual", CUnity.capturarEstadoActual)
+    monkeypatch.setattr(servidor_flask, "MODELOS_EN_RESERVA", 1)
+    monkeypatch.setattr(servidor_flask, "reserva_modelos", None)
+    servidor_flask.iniciar_servidor()
+    return servidor_flask.reserva_modelos
+
+def test_sinReservaConstruyeEnElMomento(cliente, monkeypatch):
+    # Mientras no se llama a iniciar_servidor() no hay reserva ni series de la reserva.
+    monkeypatch.setattr(servidor_flask, "reserva_modelos", None)
+    assert inicializar(cliente)["paso"] == 0
+    assert "reto_reserva_solicitudes_total{" not in cliente.get("/metrics").get_data(as_text=True)
+
+def test_reservaDaModelosYaConstruidos(cliente, reserva, archivoConfig):
+    # Llamar otra vez a iniciar_servidor() no crea otra reserva ni vuelve a envolver los métodos.
+    servidor_flask.iniciar_servidor()
+    assert servidor_flask.reserva_modelos is reserva
+    assert hasattr(CJuego.step, "__wrapped__")
+    assert not hasattr(CJuego.step.__wrapped__, "__wrapped__")
+
+    llave = (archivoConfig, "estrategia")
+    assert esperar(lambda: reserva.disponibles().get(llave) == 1)
+    inicializar(cliente)
+    assert (reserva.aciertos, reserva.fallos) == (1, 0)
+    # El modelo que se tomó se repone en segundo plano para el siguiente reinicio.
+    assert esperar(lambda: reserva.disponibles().get(llave) == 1)
+    assert cliente.post("/reiniciar").status_code == 200
+    assert (reserva.aciertos, reserva.fallos) == (2, 0)
+
+    # Sin modelos listos (y sin reponer) se construye uno en el momento.
+    reserva.tamano = 0
+    assert esperar(lambda: not reserva.construyendo.get(llave))
+    with reserva.condicion:
+        reserva.modelos[llave].clear()
+    inicializar(cliente, sesion="otra")
+    assert reserva.fallos == 1
+    texto = cliente.get("/metrics").get_data(as_text=True)
+    assert valorMetrica(texto, 'reto_reserva_solicitudes_total{resultado="acierto"}') == 2
+    assert valorMetrica(texto, 'reto_reserva_solicitudes_total{resultado="fallo"}') == 1
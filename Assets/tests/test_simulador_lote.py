@@ -0,0 +1,45 @@
+# El simulador por lotes repite las reglas del modelo con arreglos de NumPy y no
+# juega la misma partida para la misma semilla: lo que debe coincidir es la
+# distribución de resultados. Se compara contra el modelo con una tolerancia de
+# varios errores estándar, así que la prueba no depende de la suerte de una semilla.
+
+import math
+from collections import Counter
+
+import pytest
+
+from reto import ejecutarMultiplesIteraciones
+from simulador_lote import ejecutarLote
+
+JUEGOS_MODELO = 300
+JUEGOS_LOTE = 1200
+# Errores estándar de la diferencia que se aceptan entre los dos promedios.
+ERRORES_ESTANDAR = 4
+
+# Función que regresa el promedio y la varianza de una lista de números.
+def promedioYVarianza(valores):
+    promedio = sum(valores) / len(valores)
+    return promedio, sum((v - promedio) ** 2 for v in valores) / (len(valores) - 1)
+
+# Función que revisa que dos muestras tengan promedios compatibles.
+def revisarPromedios(modelo, lote, nombre):
+    promedioModelo, varianzaModelo = promedioYVarianza(modelo)
+    promedioLote, varianzaLote = promedioYVarianza(lote)
+    error = math.sqrt(varianzaModelo / len(modelo) + varianzaLote / len(lote))
+    # Con varianza cero (p. ej. nunca se gana) los promedios deben ser iguales.
+    assert abs(promedioModelo - promedioLote) <= ERRORES_ESTANDAR * error, \
+        f"{nombre}: modelo {promedioModelo:.3f}, lote {promedioLote:.3f} (error estándar {error:.3f})"
+
+@pytest.mark.parametrize("tipoSolucion", ["estrategica", "aleatoria"])
+def test_mismaDistribucionQueElModelo(archivoConfig, tipoSolucion):
+    modelo = ejecutarMultiplesIteraciones(JUEGOS_MODELO, archivoConfig, tipoSolucion, semilla=2)
+    lote = ejecutarLote(JUEGOS_LOTE, archivoConfig, tipoSolucion, semilla=2)
+
+    for campo in ("turnos", "victimasRescatadas", "victimasPerdidas", "puntosDano"):
+        revisarPromedios([r[campo] for r in modelo], [r[campo] for r in lote], campo)
+
+    # Cada resultado posible, como la frecuencia de un 0/1.
+    resultados = Counter(r["resultado"] for r in modelo) + Counter(r["resultado"] for r in lote)
+    for resultado in resultados:
+        revisarPromedios([r["resultado"] == resultado for r in modelo],
+                         [r["resultado"] == resultado for r in lote], resultado)
@@ -0,0 +1,31 @@
+# Con la misma semilla, las capas en conjuntos y en máscaras de bits deben
+# jugar exactamente la misma partida.
+
+import pytest
+
+from reto import TABLERO_BITS, TABLERO_CONJUNTOS, CAleatorio, CEstrategia, CEstrategiaUnity
+
+@pytest.mark.parametrize("clase", [CAleatorio, CEstrategia])
+def test_mismosResultados(archivoConfig, clase):
+    for semilla in range(40):
+        conjuntos = clase(archivoConfig, TABLERO_CONJUNTOS, semilla=semilla).runModel()
+        bits = clase(archivoConfig, TABLERO_BITS, semilla=semilla).runModel()
+        assert conjuntos == bits, semilla
+
+# Función que ordena las listas de marcadores: cada capa las arma en el orden en
+# que recorre sus celdas, que no es el mismo en conjuntos y en bits.
+def normalizar(estado):
+    marcadores = {nombre: sorted(lista, key=lambda m: (m["y"], m["x"]))
+                  for nombre, lista in estado["marcadores"].items()}
+    return {**estado, "marcadores": marcadores}
+
+@pytest.mark.parametrize("semilla", [0, 7, 21])
+def test_mismosEstadosPasoAPaso(archivoConfig, semilla):
+    conjuntos = CEstrategiaUnity(archivoConfig, TABLERO_CONJUNTOS, semilla=semilla)
+    bits = CEstrategiaUnity(archivoConfig, TABLERO_BITS, semilla=semilla)
+    assert normalizar(bits.obtenerUltimoEstado()) == normalizar(conjuntos.obtenerUltimoEstado())
+    while not conjuntos.juegoTerminado:
+        conjuntos.step()
+        bits.step()
+        assert normalizar(bits.obtenerUltimoEstado()) == normalizar(conjuntos.obtenerUltimoEstado()), conjuntos.pasoActual
+    assert bits.juegoTerminado